@@ -0,0 +1,68 @@
+"""Measures the cold import time of the app with `python -X importtime`.
+
+Run with: python benchmarks/bench_import.py [--module tpa_frontend.main] [--top 15] [--max-ms 3000]
+"""
+import argparse
+import subprocess
+import sys
+from typing import List
+from typing import Tuple
+
+
+def measure_import_time(module: str) -> List[Tuple[str, int, int]]:
+    """Imports a module in a fresh interpreter with `-X importtime` and parses the timings.
+
+    Args:
+        module (str): The module to import.
+
+    Returns:
+        List[Tuple[str, int, int]]: The imported modules with their self and cumulative import time in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="tpa_frontend.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Exit with an error if the cumulative import time exceeds this value.",
+    )
+    args = parser.parse_args()
+
+    timings = measure_import_time(args.module)
+    total_ms = (
+        next(cumulative for name, _, cumulative in timings if name == args.module)
+        / 1000
+    )
+
+    print(f"Cumulative import time of {args.module}: {total_ms:.1f} ms")
+    print("Slowest imports (cumulative):")
+    top_level = [
+        t for t in timings if "." not in t[0] or t[0].startswith("tpa_frontend")
+    ]
+    for name, _, cumulative in sorted(top_level, key=lambda t: -t[2])[: args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        sys.exit(f"Import time {total_ms:.1f} ms exceeds {args.max_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
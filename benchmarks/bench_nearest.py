@@ -0,0 +1,53 @@
+"""Benchmarks the nearest-station queries of the spatial index at full German coverage.
+
+Run with: python benchmarks/bench_nearest.py
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+from tpa_frontend.data_loader.stations import NearestStationIndex
+
+
+def make_station_df(n_stations: int = 15_000, seed: int = 1) -> pd.DataFrame:
+    """Creates synthetic stations spread over the bounding box of Germany.
+
+    Args:
+        n_stations (int, optional): The number of stations, Germany has roughly 15,000. Defaults to 15_000.
+        seed (int, optional): The seed of the random coordinates. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: A df with the columns Tankstellen_Name, short_id, latitude, longitude and post_code.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "Tankstellen_Name": [f"Station {i}" for i in range(n_stations)],
+            "short_id": [str(i) for i in range(n_stations)],
+            "latitude": rng.uniform(47.3, 55.0, n_stations),
+            "longitude": rng.uniform(5.9, 15.0, n_stations),
+            "post_code": rng.integers(1067, 99998, n_stations).astype(str),
+        }
+    )
+
+
+if __name__ == "__main__":
+    station_df = make_station_df()
+    number = 1000
+
+    build = timeit.timeit(lambda: NearestStationIndex(station_df=station_df), number=5)
+    nearest_station_index = NearestStationIndex(station_df=station_df)
+    location = nearest_station_index.locate("52.48, 13.43")
+    tree_query = timeit.timeit(
+        lambda: nearest_station_index._tree.query(location, k=10),  # type: ignore
+        number=number,
+    )
+    full_query = timeit.timeit(
+        lambda: nearest_station_index.nearest(location=location, k=10),  # type: ignore
+        number=number,
+    )
+
+    print(f"Stations:             {len(nearest_station_index)}")
+    print(f"Building the index:   {build / 5 * 1000:.3f} ms")
+    print(f"KD-tree query (k=10): {tree_query / number * 1000:.3f} ms")
+    print(f"nearest (k=10):       {full_query / number * 1000:.3f} ms")
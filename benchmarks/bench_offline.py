@@ -0,0 +1,355 @@
+"""Benchmarks loading, forecasting, maps, charts and a full app rerun offline against synthetic fixtures, and saves the results as JSON.
+
+The object storage is replaced by a local directory with a configurable synthetic latency, see `offline.py`.
+The functions are called outside of a streamlit runtime, where `st.cache_resource` doesn't cache, so they measure the cold paths. The warm paths are measured by the rerun of the app.
+
+Run with: python benchmarks/bench_offline.py [--latency 0.05] [--compare benchmarks/results/<previous>.json]
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import streamlit as st
+from offline import offline_backend
+from offline import REPO_ROOT
+from offline import write_fixtures
+from streamlit.testing.v1 import AppTest
+from tpa_frontend.charts.create import create_bar_chart
+from tpa_frontend.charts.create import create_comparison_chart
+from tpa_frontend.charts.create import create_forecast_chart
+from tpa_frontend.charts.create import create_trend_chart
+from tpa_frontend.config_handler import load_configs
+from tpa_frontend.config_handler.load_configs import create_config_from_env
+from tpa_frontend.config_handler.load_configs import create_ForecasterPool
+from tpa_frontend.data_loader.load import getMapDict
+from tpa_frontend.data_loader.load import loadBaseDFs
+from tpa_frontend.data_loader.load import makeForecast
+from tpa_frontend.data_loader.load import makeForecasts
+
+# A median this much slower than the compared run is reported as regression
+REGRESSION_THRESHOLD = 1.2
+
+
+def measure(
+    function: Callable[[], object],
+    repeat: int,
+    setup: Optional[Callable[[], object]] = None,
+) -> Dict[str, float]:
+    """Times a function, the setup runs before every repetition and isn't timed.
+
+    Args:
+        function (Callable[[], object]): The function to time.
+        repeat (int): The number of repetitions.
+        setup (Optional[Callable[[], object]], optional): A function run before every repetition, e.g. to clear caches. Defaults to None.
+
+    Returns:
+        Dict[str, float]: The number of runs and the min, median, mean and max duration in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    return {
+        "runs": repeat,
+        "min_s": min(durations),
+        "median_s": statistics.median(durations),
+        "mean_s": statistics.mean(durations),
+        "max_s": max(durations),
+    }
+
+
+def forecast_page_app() -> AppTest:
+    """Creates an AppTest of the forecast page, patched like the forecast page fixture of the tests.
+
+    Returns:
+        AppTest: The app, which hasn't run yet.
+    """
+    main_patched = (
+        (REPO_ROOT / "src" / "tpa_frontend" / "main.py")
+        .read_text()
+        .replace("selectedSideBar=selectedSideBar", "selectedSideBar='forecast'")
+        .replace('selectedSideBar == "forecast"', "True")
+    )
+    return AppTest.from_string(main_patched, default_timeout=120)
+
+
+def run_benchmarks(
+    config_path: str, repeat: int, n_compared_stations: int = 10
+) -> Dict[str, Dict[str, float]]:
+    """Runs all benchmarks, the offline backend must be active.
+
+    Args:
+        config_path (str): The config file written by `write_fixtures`.
+        repeat (int): The number of repetitions of every benchmark.
+        n_compared_stations (int, optional): The number of stations of the comparison benchmarks. Defaults to 10.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The results of `measure` per benchmark.
+    """
+    config_dict, language_config = create_config_from_env()
+    language_bundle = language_config["Ger"]
+    runtime_config = config_dict["runtime_config"]
+    # Resolve the connections through the module, so that the patches of the offline backend apply
+    pandas_oci = load_configs.create_pandasOCI(config_dict=config_dict)
+    files_oci = load_configs.create_filesOCI(config_dict=config_dict)
+    results = {}
+
+    results["loadBaseDFs"] = measure(
+        lambda: loadBaseDFs(config_dict=config_dict, _pandas_connection=pandas_oci),
+        repeat=repeat,
+    )
+    base_df_dict = loadBaseDFs(config_dict=config_dict, _pandas_connection=pandas_oci)
+    stations = list(base_df_dict["station_info_30"]["short_id"])
+    last_week = base_df_dict["week_mapper"]["week_total"].max()
+
+    # Forecasting live, the fixtures have no forecast store
+    forecaster = create_ForecasterPool(
+        todays_date=config_dict["todays_date"],
+        size=runtime_config.get("forecaster_pool_size", 4),
+    )
+
+    def make_forecast() -> dict:
+        return makeForecast(
+            config_dict=config_dict,
+            station=stations[0],
+            gas_type="e5",
+            _forecaster=forecaster,
+        )
+
+    results["makeForecast"] = measure(make_forecast, repeat=repeat)
+    results["makeForecasts"] = measure(
+        lambda: makeForecasts(
+            config_dict=config_dict,
+            stations=stations[:n_compared_stations],
+            gas_type="e5",
+            _forecaster=forecaster,
+        ),
+        repeat=repeat,
+    )
+
+    results["getMapDict"] = measure(
+        lambda: getMapDict(
+            config_dict=config_dict,
+            last_week=last_week,
+            _files_oci_connection=files_oci,
+        ),
+        repeat=repeat,
+    )
+
+    # Building and serializing the charts, as done for every uncached chart spec
+    forecast_summary_dict = make_forecast()
+    forecast_dfs = {
+        station: forecast_summary["forecast_df"]
+        for station, forecast_summary in makeForecasts(
+            config_dict=config_dict,
+            stations=stations[:n_compared_stations],
+            gas_type="e5",
+            _forecaster=forecaster,
+        ).items()
+    }
+    for name, build_chart in (
+        (
+            "create_forecast_chart",
+            lambda: create_forecast_chart(
+                df=forecast_summary_dict["forecast_df"], language_bundle=language_bundle
+            ),
+        ),
+        (
+            "create_bar_chart.hour",
+            lambda: create_bar_chart(
+                df=forecast_summary_dict["summary_hour_df"],
+                language_bundle=language_bundle,
+            ),
+        ),
+        (
+            "create_bar_chart.weekday",
+            lambda: create_bar_chart(
+                df=forecast_summary_dict["summary_weekday_df"],
+                language_bundle=language_bundle,
+            ),
+        ),
+        (
+            "create_trend_chart",
+            lambda: create_trend_chart(
+                df=forecast_summary_dict["summary_trend_df"],
+                language_bundle=language_bundle,
+            ),
+        ),
+        (
+            "create_comparison_chart",
+            lambda: create_comparison_chart(
+                forecast_dfs=forecast_dfs, language_bundle=language_bundle
+            ),
+        ),
+    ):
+        results[f"charts.{name}"] = measure(
+            lambda build_chart=build_chart: build_chart().to_json(), repeat=repeat
+        )
+
+    # A full rerun of the forecast page, with cold caches and with warm caches
+    def run_app(app: AppTest) -> None:
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+
+    def select_station(app: AppTest) -> None:
+        app.selectbox(key="SELECT_station").select_index(0)
+        run_app(app)
+
+    apps: List[AppTest] = []
+
+    def new_app() -> None:
+        st.cache_resource.clear()
+        apps.append(forecast_page_app())
+        run_app(apps[-1])
+
+    results["AppTest.forecast_page.cold"] = measure(
+        lambda: select_station(apps[-1]), repeat=repeat, setup=new_app
+    )
+    results["AppTest.forecast_page.rerun"] = measure(
+        lambda: run_app(apps[-1]), repeat=repeat
+    )
+
+    return results
+
+
+def compare_results(results: Dict[str, dict], compared_path: str) -> List[str]:
+    """Compares the medians with a previous run.
+
+    Args:
+        results (Dict[str, dict]): The results of this run.
+        compared_path (str): The JSON file of a previous run.
+
+    Returns:
+        List[str]: The benchmarks whose median regressed by more than REGRESSION_THRESHOLD.
+    """
+    with open(compared_path, "r") as file:
+        compared_results = json.load(file)["results"]
+
+    regressions = []
+    print(f"\nCompared with {compared_path}:")
+    for name, result in results.items():
+        if name not in compared_results:
+            continue
+        ratio = result["median_s"] / compared_results[name]["median_s"]
+        if ratio > REGRESSION_THRESHOLD:
+            regressions.append(name)
+        print(
+            f"{name:40s} {ratio:6.2f}x{'  REGRESSION' if ratio > REGRESSION_THRESHOLD else ''}"
+        )
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """The command line entry point of the offline benchmarks.
+
+    Args:
+        argv (Optional[List[str]], optional): The command line arguments. Defaults to None, i.e. sys.argv.
+
+    Returns:
+        int: The exit code, 1 if a benchmark regressed compared with the --compare run.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="The synthetic latency of every request to the object storage in seconds.",
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=None,
+        help="The synthetic bandwidth of the object storage in bytes per second.",
+    )
+    parser.add_argument("--stations", type=int, default=15_000)
+    parser.add_argument("--forecast-stations", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--map-bytes", type=int, default=2_000_000)
+    parser.add_argument(
+        "--fixture-dir",
+        default=None,
+        help="Where to write the fixtures. Defaults to a temporary directory.",
+    )
+    parser.add_argument(
+        "--output", default=None, help="The JSON file to write the results to."
+    )
+    parser.add_argument(
+        "--compare", default=None, help="The JSON file of a previous run."
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fixture_dir = args.fixture_dir or temp_dir
+        config_path = write_fixtures(
+            root=fixture_dir,
+            n_stations=args.stations,
+            n_forecast_stations=args.forecast_stations,
+            days=args.days,
+            map_bytes=args.map_bytes,
+            todays_date=date.today(),
+        )
+        with offline_backend(
+            root=fixture_dir,
+            config_path=config_path,
+            latency=args.latency,
+            bandwidth=args.bandwidth,
+        ):
+            results = run_benchmarks(config_path=config_path, repeat=args.repeat)
+
+    for name, result in results.items():
+        print(
+            f"{name:40s} median {result['median_s'] * 1000:10.2f} ms  min {result['min_s'] * 1000:10.2f} ms"
+        )
+
+    output = Path(
+        args.output
+        or Path(__file__).parent
+        / "results"
+        / f"offline_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    params = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("fixture_dir", "output", "compare")
+    }
+    with open(output, "w") as file:
+        json.dump(
+            {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "params": params,
+                "results": results,
+            },
+            file,
+            indent=2,
+        )
+    print(f"\nSaved the results to {output}")
+
+    if args.compare:
+        return 1 if compare_results(results, args.compare) else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Benchmarks the single-pass summaries against one groupby per summary on a full-year station history.
+
+The baseline is a hand-written groupby for timing only, the parity of `_create_summaries` with `Forecast.create_summaries` is checked by test_create_summaries_parity and, once per process, by `_summarize`.
+
+Run with: python benchmarks/bench_summaries.py
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+from tpa_frontend.data_loader.load import _create_summaries
+
+
+def make_history_df(days: int = 365, seed: int = 1) -> pd.DataFrame:
+    """Creates a synthetic hourly price history of one station.
+
+    Args:
+        days (int, optional): The number of days of the history. Defaults to 365.
+        seed (int, optional): The seed of the random prices. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: A df with the columns Day_Hours, price, day_of_week, hour_format and week.
+    """
+    rng = np.random.default_rng(seed)
+    day_hours = pd.date_range(end="2024-10-14", periods=days * 24, freq="h")
+    return pd.DataFrame(
+        {
+            "Day_Hours": day_hours,
+            "price": 1.75 + rng.normal(0, 0.05, len(day_hours)),
+            "day_of_week": day_hours.dayofweek,
+            "hour_format": day_hours.strftime("%H:%M"),
+            "week": day_hours.isocalendar().week.to_numpy(),
+        }
+    )
+
+
+def summaries_per_groupby(history_df: pd.DataFrame) -> dict:
+    """The baseline: one groupby over the full history per summary, modelled on three `create_summaries` calls.
+
+    Args:
+        history_df (pd.DataFrame): The price history.
+
+    Returns:
+        dict: The three summary DataFrames.
+    """
+    summaries = {}
+    for col, name, centralize_mean in (
+        ("day_of_week", "summary_weekday_df", True),
+        ("hour_format", "summary_hour_df", True),
+        ("week", "summary_trend_df", False),
+    ):
+        summary = history_df.groupby(col)["price"].mean()
+        if centralize_mean:
+            summary = summary - summary.mean()
+        summaries[name] = summary.to_frame().reset_index()
+
+    return summaries
+
+
+if __name__ == "__main__":
+    history_df = make_history_df()
+    number = 200
+    baseline = timeit.timeit(lambda: summaries_per_groupby(history_df), number=number)
+    single_pass = timeit.timeit(lambda: _create_summaries(history_df), number=number)
+
+    print(f"Rows in history: {len(history_df)}")
+    print(f"One groupby per summary: {baseline / number * 1000:.3f} ms")
+    print(f"Single pass:             {single_pass / number * 1000:.3f} ms")
+    print(f"Speedup:                 {baseline / single_pass:.2f}x")
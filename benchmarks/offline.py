@@ -0,0 +1,301 @@
+"""A local stand-in for the OCI object storage and the synthetic fixtures of the offline benchmarks.
+
+The fixtures are written to a local directory in the layout of the bucket, `offline_backend` patches the app to read them through `LocalPandasOCI` and `LocalFilesOCI` instead of OCI.
+"""
+import os
+import time
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Iterator
+from typing import Optional
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import yaml  # type: ignore
+from bench_nearest import make_station_df
+from tpa_frontend.data_loader.load import GAS_TYPES
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+class LocalPandasOCI:
+    """A filesystem-backed stand-in for `PandasOCI`, which delays every retrieval like a request to the object storage."""
+
+    def __init__(
+        self, root: str, latency: float = 0.0, bandwidth: Optional[float] = None
+    ) -> None:
+        """Initializes the stand-in.
+
+        Args:
+            root (str): The directory holding the objects, e.g. written by `write_fixtures`.
+            latency (float, optional): The synthetic latency of every request in seconds. Defaults to 0.0.
+            bandwidth (Optional[float], optional): The synthetic bandwidth in bytes per second. Defaults to None, i.e. unlimited.
+        """
+        self.root = Path(root)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.requests = 0
+
+    def _delay(self, path: Path) -> None:
+        """Sleeps for the synthetic latency and the transfer time of an object.
+
+        Args:
+            path (Path): The local path of the object.
+        """
+        self.requests += 1
+        delay = self.latency
+        if self.bandwidth:
+            delay += path.stat().st_size / self.bandwidth
+        if delay > 0:
+            time.sleep(delay)
+
+    def retrieve_df(self, path: str, df_format: str) -> pd.DataFrame:
+        """Reads a df like `PandasOCI.retrieve_df`.
+
+        Args:
+            path (str): The path of the df in the bucket.
+            df_format (str): The format of the df, either 'ftr' or 'csv'.
+
+        Returns:
+            pd.DataFrame: The df.
+        """
+        local_path = self.root / path
+        self._delay(local_path)
+        if df_format == "ftr":
+            return pd.read_feather(local_path)
+        if df_format == "csv":
+            return pd.read_csv(local_path)
+
+        raise ValueError(f"Unsupported df_format '{df_format}'")
+
+
+class LocalFilesOCI(LocalPandasOCI):
+    """A filesystem-backed stand-in for `FilesOCI`, which delays every retrieval like a request to the object storage."""
+
+    def retrieve_file_content(self, file_name: str, decode: bool = True):
+        """Reads a file like `FilesOCI.retrieve_file_content`.
+
+        Args:
+            file_name (str): The path of the file in the bucket.
+            decode (bool, optional): Whether to decode the content as UTF-8. Defaults to True.
+
+        Returns:
+            Union[str, bytes]: The content of the file.
+        """
+        local_path = self.root / file_name
+        self._delay(local_path)
+        content = local_path.read_bytes()
+        return content.decode("utf-8") if decode else content
+
+
+class LocalForecast:
+    """A stand-in for `tpa_analytics_engine.api.Forecast`, which reads the wide price df through a `LocalPandasOCI`.
+
+    The forecast repeats the mean price per hour of the last week, which is cheap but returns the shapes of the real forecast.
+    """
+
+    def __init__(self, pandas_connection: LocalPandasOCI, config_path: str) -> None:
+        """Initializes the stand-in.
+
+        Args:
+            pandas_connection (LocalPandasOCI): The stand-in of the object storage.
+            config_path (str): The path to the config file, the wide price df is read from its data_config.
+        """
+        with open(config_path, "r") as file:
+            self._data_config = yaml.safe_load(file)["data_config"]
+        self._pandas_connection = pandas_connection
+        self.df: Optional[pd.DataFrame] = None
+
+    def load_df(self, station: str, sorte: str) -> None:
+        """Retrieves the wide price df and keeps the hourly prices of a station and gas_type.
+
+        Args:
+            station (str): The short_id of the station.
+            sorte (str): The gas_type.
+        """
+        date_column = self._data_config.get("date_column", "Day_Hours")
+        wide_df = self._pandas_connection.retrieve_df(
+            path=self._data_config["df_path"], df_format=self._data_config["df_format"]
+        )
+        day_hours = pd.DatetimeIndex(wide_df[date_column])
+        self.df = pd.DataFrame(
+            {
+                "Day_Hours": day_hours,
+                "Day": day_hours.normalize(),
+                "price": wide_df[f"{station}_{sorte}"].to_numpy(),
+                "day_of_week": day_hours.dayofweek,
+                "hour_format": day_hours.strftime("%H:%M"),
+                "week": day_hours.isocalendar().week.to_numpy(),
+            }
+        )
+
+    def create_forecast(self) -> pd.DataFrame:
+        """Forecasts the next day.
+
+        Returns:
+            pd.DataFrame: The last week of prices with is_last 0 followed by the forecast with is_last 1.
+        """
+        history_df = self.df.tail(7 * 24).assign(pred=np.nan, is_last=0)  # type: ignore
+        forecast_hours = pd.date_range(
+            history_df["Day_Hours"].max() + pd.Timedelta(hours=1), periods=24, freq="h"
+        )
+        hourly_means = history_df.groupby("hour_format")["price"].mean()
+        forecast_df = pd.DataFrame(
+            {
+                "Day_Hours": forecast_hours,
+                "Day": forecast_hours.normalize(),
+                "price": np.nan,
+                "hour_format": forecast_hours.strftime("%H:%M"),
+                "is_last": 1,
+            }
+        )
+        forecast_df["pred"] = hourly_means.reindex(forecast_df["hour_format"]).values
+        return pd.concat([history_df, forecast_df], ignore_index=True)
+
+    def create_summaries(self, groupCol: str, centralize_mean: bool) -> pd.DataFrame:
+        """Averages the prices per group like `Forecast.create_summaries`.
+
+        Args:
+            groupCol (str): The column to group by.
+            centralize_mean (bool): Whether to subtract the mean of the group means.
+
+        Returns:
+            pd.DataFrame: The mean price per group.
+        """
+        summary = self.df.groupby(groupCol)[["price"]].mean()  # type: ignore
+        return summary - summary.mean() if centralize_mean else summary
+
+
+def write_fixtures(
+    root: str,
+    n_stations: int = 15_000,
+    n_forecast_stations: int = 100,
+    days: int = 365,
+    map_bytes: int = 2_000_000,
+    todays_date: Optional[date] = None,
+    seed: int = 1,
+) -> str:
+    """Writes synthetic stations, wide prices, week mapper and maps in the layout of the bucket, and a config file reading them.
+
+    Args:
+        root (str): The directory to write to.
+        n_stations (int, optional): The number of stations in station_info. Defaults to 15_000.
+        n_forecast_stations (int, optional): The number of stations with prices, i.e. in station_info_30. Defaults to 100.
+        days (int, optional): The number of days of hourly prices. Defaults to 365.
+        map_bytes (int, optional): The approximate size of every HTML map. Defaults to 2_000_000.
+        todays_date (Optional[date], optional): The last day of the prices. Defaults to None, i.e. today.
+        seed (int, optional): The seed of the random data. Defaults to 1.
+
+    Returns:
+        str: The path to the written config file.
+    """
+    root_path = Path(root)
+    root_path.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    todays_date = todays_date or date.today()
+    with open(REPO_ROOT / "configs" / "config.yaml", "r") as file:
+        config = yaml.safe_load(file)
+
+    # The stations, station_info_30 are the stations with prices
+    station_df = make_station_df(n_stations=n_stations, seed=seed)
+    station_df.to_feather(root_path / config["df_config"]["station_info"]["df_path"])
+    forecast_station_df = station_df.head(n_forecast_stations).reset_index(drop=True)
+    for name in ("station_info_30", "station_info_365"):
+        forecast_station_df.to_feather(root_path / config["df_config"][name]["df_path"])
+
+    # The hourly prices, one column per station and gas_type
+    day_hours = pd.date_range(
+        end=pd.Timestamp(todays_date) - pd.Timedelta(hours=1),
+        periods=days * 24,
+        freq="h",
+    )
+    daily_pattern = 0.04 * np.cos(2 * np.pi * day_hours.hour.to_numpy() / 24)
+    wide_df = pd.DataFrame(
+        {
+            f"{short_id}_{gas_type}": 1.75
+            + daily_pattern
+            + rng.normal(0, 0.02, len(day_hours))
+            for short_id in forecast_station_df["short_id"]
+            for gas_type in GAS_TYPES
+        }
+    )
+    wide_df.insert(0, config["data_config"]["date_column"], day_hours)
+    wide_df.to_feather(root_path / config["data_config"]["df_path"])
+
+    # The week mapper and a map of the last week per gas_type
+    iso_calendar = day_hours.isocalendar()
+    week_mapper_df = pd.DataFrame(
+        {
+            "week_total": (
+                iso_calendar.year.astype(str)
+                + "_"
+                + iso_calendar.week.astype(str).str.zfill(2)
+            ).unique()
+        }
+    )
+    week_mapper_df.to_csv(
+        root_path / config["df_config"]["week_mapper"]["df_path"], index=False
+    )
+    map_dir = root_path / config["map_config"]["map_path"]
+    map_dir.mkdir(parents=True, exist_ok=True)
+    marker = '<div class="marker" style="left:{:.4f}px;top:{:.4f}px"></div>\n'
+    n_markers = max(1, map_bytes // len(marker.format(0, 0)))
+    for gas_type in GAS_TYPES:
+        markers = "".join(
+            marker.format(*position)
+            for position in rng.uniform(0, 1000, (n_markers, 2))
+        )
+        (
+            map_dir / f"Map_{gas_type}_{week_mapper_df['week_total'].max()}.html"
+        ).write_text(f"<html><body>{markers}</body></html>")
+
+    # The config reads everything from the local bucket and forecasts live
+    config["language_config"] = str(REPO_ROOT / "configs" / "language_content.yaml")
+    config["runtime_config"].update(
+        {
+            "forecast_store_path": None,
+            "disk_cache_dir": None,
+            "prefetch_maps": False,
+            "data_watch_interval": None,
+        }
+    )
+    config["map_config"]["serving_mode"] = "inline"
+    config_path = root_path / "config.yaml"
+    with open(config_path, "w") as file:
+        yaml.safe_dump(config, file)
+
+    return str(config_path)
+
+
+@contextmanager
+def offline_backend(
+    root: str, config_path: str, latency: float = 0.0, bandwidth: Optional[float] = None
+) -> Iterator[LocalPandasOCI]:
+    """Patches the app to read the object storage from a local directory and to forecast with `LocalForecast`.
+
+    Args:
+        root (str): The directory holding the fixtures.
+        config_path (str): The config file written by `write_fixtures`, it is set as CONFIG_PATH.
+        latency (float, optional): The synthetic latency of every request in seconds. Defaults to 0.0.
+        bandwidth (Optional[float], optional): The synthetic bandwidth in bytes per second. Defaults to None, i.e. unlimited.
+
+    Yields:
+        LocalPandasOCI: The stand-in used for the dfs, e.g. to count its requests.
+    """
+    pandas_oci = LocalPandasOCI(root=root, latency=latency, bandwidth=bandwidth)
+    files_oci = LocalFilesOCI(root=root, latency=latency, bandwidth=bandwidth)
+    with mock.patch.dict(os.environ, {"CONFIG_PATH": config_path}), mock.patch(
+        "tpa_frontend.config_handler.load_configs.create_pandasOCI",
+        return_value=pandas_oci,
+    ), mock.patch(
+        "tpa_frontend.config_handler.load_configs.create_filesOCI",
+        return_value=files_oci,
+    ), mock.patch(
+        "tpa_frontend.config_handler.load_configs.Forecast",
+        side_effect=lambda config_path: LocalForecast(
+            pandas_connection=pandas_oci, config_path=config_path
+        ),
+    ):
+        yield pandas_oci
@@ -1,12 +1,14 @@
 # Import packages
 from typing import Any
+from typing import Dict
 
 import altair as alt
 import numpy as np
 import pandas as pd
-from tpa_frontend.config_handler.load_configs import create_config_from_env
+from tpa_frontend.config_handler.language import LanguageBundle
 
-language_dict = create_config_from_env()[1]
+# Serialize the chart specs without whitespace, they are only read by machines
+_COMPACT_JSON: Dict[str, Any] = {"indent": None, "separators": (",", ":")}
 
 
 def _provide_interactive_chart_elements(
@@ -14,17 +16,17 @@ def _provide_interactive_chart_elements(
     x_field: str,
     y_field: str,
     decimals: int,
-    df: pd.DataFrame,
     current_chart: Any,
 ) -> dict:
     """A helper function to create the interactive elements of the chart.
 
+    The elements carry no data of their own, they inherit the data defined once at the top-level layer of the chart.
+
     Args:
         language_selection (str): The language selection from the app.
         x_field (str): The field in the data frame to be plotted on the x-axis.
         y_field (str): The field in the data frame to be plotted on the y-axis.
         decimals (int): The number of decimals to display in the chart markers.
-        df (pd.DataFrame): The df with the data to plot.
         current_chart (Any): The chart to which to add the interactive elements.
 
     Returns:
@@ -42,7 +44,7 @@ def _provide_interactive_chart_elements(
 
     # Transparent selectors across the chart. This is what tells us
     selectors = (
-        alt.Chart(df)
+        alt.Chart()
         .mark_point()
         .encode(x=f"{x_field}:N", opacity=alt.value(0), tooltip=alt.value(None))
         .add_params(nearest)
@@ -50,7 +52,7 @@ def _provide_interactive_chart_elements(
 
     # Draw a rule at the location of the selection
     rules = (
-        alt.Chart(df)
+        alt.Chart()
         .mark_rule(color="gray")
         .encode(
             x=f"{x_field}:N",
@@ -81,34 +83,36 @@ def _provide_interactive_chart_elements(
     }
 
 
-def create_forecast_chart(df: pd.DataFrame, language_selection: str) -> alt.LayerChart:
+def create_forecast_chart(
+    df: pd.DataFrame, language_bundle: LanguageBundle
+) -> alt.LayerChart:
     """Creates the forecast chart.
 
     Args:
         df (pd.DataFrame): The df containing the forecast data.
-        language_selection (str): The language selection from the app.
+        language_bundle (LanguageBundle): The texts of the selected language.
 
     Returns:
         alt.LayerChart: The altair chart to display in the app.
     """
-    legend_name: str = (
-        language_dict.get("forecast", {})
-        .get(language_selection, {})
-        .get("legend_name", "")
-    )
-    legend_forecast: str = (
-        language_dict.get("forecast", {})
-        .get(language_selection, {})
-        .get("legend_forecast")
-    )
-    legend_yesterday: str = (
-        language_dict.get("forecast", {})
-        .get(language_selection, {})
-        .get("legend_yesterday")
-    )
+    forecast_texts = language_bundle.forecast
+    legend_name = forecast_texts.legend_name
+    legend_forecast = forecast_texts.legend_forecast
+    legend_yesterday = forecast_texts.legend_yesterday
 
-    df[legend_name] = np.where(df.is_last == 1, legend_forecast, legend_yesterday)
     x_field, y_field = "hour_format", "pred"
+    # df is shared with the cache of makeForecast, so the legend is written to a narrow frame of the plotted columns instead.
+    # The copy is deliberate: altair copies the data again before serializing it, and a forecast has at most 48 rows
+    data = pd.DataFrame(
+        {
+            x_field: df[x_field],
+            y_field: df[y_field],
+            legend_name: pd.Categorical.from_codes(
+                np.where(df.is_last == 1, 0, 1),
+                categories=[legend_forecast, legend_yesterday],
+            ),
+        }
+    )
 
     scale = alt.Scale(
         domain=[legend_forecast, legend_yesterday],
@@ -116,21 +120,17 @@ def create_forecast_chart(df: pd.DataFrame, language_selection: str) -> alt.Laye
     )
 
     line = (
-        alt.Chart(df)
+        alt.Chart()
         .mark_line(interpolate="step")
         .encode(
             x=alt.X(
                 f"{x_field}:N",
-                title=language_dict.get("forecast", {})
-                .get(language_selection)
-                .get("x_title"),
+                title=forecast_texts.x_title,
             ),
             y=alt.Y(
                 f"{y_field}:Q",
                 scale=alt.Scale(zero=False),
-                title=language_dict.get("forecast", {})
-                .get(language_selection)
-                .get("y_title"),
+                title=forecast_texts.y_title,
             ),
             color=alt.Color(
                 f"{legend_name}:N",
@@ -147,11 +147,10 @@ def create_forecast_chart(df: pd.DataFrame, language_selection: str) -> alt.Laye
     )
 
     shared_elements = _provide_interactive_chart_elements(
-        language_selection=language_selection,
+        language_selection=language_bundle.language,
         x_field=x_field,
         y_field=y_field,
         decimals=2,
-        df=df,
         current_chart=line,
     )
 
@@ -161,55 +160,46 @@ def create_forecast_chart(df: pd.DataFrame, language_selection: str) -> alt.Laye
         shared_elements.get("points"),
         shared_elements.get("rules"),
         shared_elements.get("text"),
+        # Define the data once for all layers
+        data=data,
     ).properties(width=1000, height=400)
 
 
-def create_bar_chart(df: pd.DataFrame, language_selection: str) -> alt.LayerChart:
+def create_bar_chart(
+    df: pd.DataFrame, language_bundle: LanguageBundle
+) -> alt.LayerChart:
     """Creates the bar charts for the price impacts.
 
     Args:
         df (pd.DataFrame): The df containing the bar chart data, i.e. price impacts.
-        language_selection (str): The language selection from the app.
+        language_bundle (LanguageBundle): The texts of the selected language.
 
     Returns:
         alt.LayerChart: The altair chart to display in the app.
     """
     x_field, y_field = df.columns[0], df.columns[1]
+    # df is shared with the cache of makeForecast, so the weekday names are written to a narrow frame of the plotted columns instead.
+    # The copy is deliberate: altair copies the data again before serializing it, and a summary has at most 24 rows
+    data = pd.DataFrame({x_field: df[x_field], y_field: df[y_field]})
 
-    y_axis_title: str = (
-        language_dict.get("forecast", {})
-        .get(language_selection, {})
-        .get("y_title_barchart", "")
-    )
+    forecast_texts = language_bundle.forecast
+    y_axis_title = forecast_texts.y_title_barchart
     if x_field == "hour_format":
-        x_axis_title: str = (
-            language_dict.get("forecast", {})
-            .get(language_selection, {})
-            .get("x_title_hour", "")
-        )
+        x_axis_title = forecast_texts.x_title_hour
         bar_color = "#A3C7D6"
         decimals = 2
     elif x_field == "day_of_week":
-        x_axis_title = (
-            language_dict.get("forecast", {})
-            .get(language_selection, {})
-            .get("x_title_hour", "")
-        )
-        weekday_list = [
-            x
-            for x in language_dict.get("forecast", {})
-            .get(language_selection, {})
-            .get("weekday_list", [])
-        ]
-        # Transform x_field with the weekdays in the selected language
-        df[x_field] = df[x_field].apply(
-            lambda x: weekday_list[x] if isinstance(x, int) else x
-        )
+        x_axis_title = forecast_texts.x_title_hour
+        # Map the weekday numbers to the weekdays in the selected language
+        if pd.api.types.is_integer_dtype(data[x_field]):
+            data[x_field] = pd.Categorical.from_codes(
+                data[x_field], categories=forecast_texts.weekday_list
+            )
         bar_color = "#9F73AB"
         decimals = 3
 
     bar = (
-        alt.Chart(df)
+        alt.Chart()
         .mark_bar(color=bar_color)
         .encode(
             x=alt.X(
@@ -224,11 +214,10 @@ def create_bar_chart(df: pd.DataFrame, language_selection: str) -> alt.LayerChar
     )
 
     shared_elements = _provide_interactive_chart_elements(
-        language_selection=language_selection,
+        language_selection=language_bundle.language,
         x_field=x_field,
         y_field=y_field,
         decimals=decimals,
-        df=df,
         current_chart=bar,
     )
 
@@ -237,15 +226,19 @@ def create_bar_chart(df: pd.DataFrame, language_selection: str) -> alt.LayerChar
         shared_elements.get("selectors"),
         shared_elements.get("points"),
         shared_elements.get("text"),
+        # Define the data once for all layers
+        data=data,
     ).properties(width=800, height=300)
 
 
-def create_trend_chart(df: pd.DataFrame, language_selection: str) -> alt.LayerChart:
+def create_trend_chart(
+    df: pd.DataFrame, language_bundle: LanguageBundle
+) -> alt.LayerChart:
     """Creates the longterm trend chart.
 
     Args:
         df (pd.DataFrame): The df containing the longterm trend data.
-        language_selection (str): The language selection from the app.
+        language_bundle (LanguageBundle): The texts of the selected language.
 
     Returns:
         alt.LayerChart: The altair chart to display in the app.
@@ -253,17 +246,11 @@ def create_trend_chart(df: pd.DataFrame, language_selection: str) -> alt.LayerCh
 
     x_field, y_field = df.columns[0], df.columns[1]
 
-    y_axis_title: str = (
-        language_dict.get("forecast", {}).get(language_selection, {}).get("y_title", "")
-    )
-    x_axis_title: str = (
-        language_dict.get("forecast", {})
-        .get(language_selection, {})
-        .get("x_title_trend", "")
-    )
+    y_axis_title = language_bundle.forecast.y_title
+    x_axis_title = language_bundle.forecast.x_title_trend
 
     line = (
-        alt.Chart(df)
+        alt.Chart()
         .mark_line(interpolate="basis", color="#624F82")
         .encode(
             x=alt.X(
@@ -279,11 +266,10 @@ def create_trend_chart(df: pd.DataFrame, language_selection: str) -> alt.LayerCh
     )
 
     shared_elements = _provide_interactive_chart_elements(
-        language_selection=language_selection,
+        language_selection=language_bundle.language,
         x_field=x_field,
         y_field=y_field,
         decimals=2,
-        df=df,
         current_chart=line,
     )
 
@@ -293,4 +279,127 @@ def create_trend_chart(df: pd.DataFrame, language_selection: str) -> alt.LayerCh
         shared_elements.get("points"),
         shared_elements.get("rules"),
         shared_elements.get("text"),
+        # Define the data once for all layers, limited to the plotted columns
+        data=df[[x_field, y_field]],
     ).properties(width=800, height=300)
+
+
+def create_comparison_chart(
+    forecast_dfs: Dict[str, pd.DataFrame], language_bundle: LanguageBundle
+) -> alt.LayerChart:
+    """Creates one layered chart comparing the forecasts of several stations, styled like the forecast chart.
+
+    Every station gets its own color, the actual prices of the last 24h are dashed.
+
+    Args:
+        forecast_dfs (Dict[str, pd.DataFrame]): A dictionary mapping the station labels to their forecast_df.
+        language_bundle (LanguageBundle): The texts of the selected language.
+
+    Returns:
+        alt.LayerChart: The altair chart to display in the app.
+    """
+    forecast_texts = language_bundle.forecast
+    legend_name = forecast_texts.legend_name
+    legend_station = forecast_texts.legend_station
+    x_field, y_field = "hour_format", "pred"
+
+    df = pd.concat(
+        [
+            forecast_df[[x_field, y_field, "is_last"]].assign(
+                **{legend_station: station}
+            )
+            for station, forecast_df in forecast_dfs.items()
+        ],
+        ignore_index=True,
+    )
+    df[legend_name] = np.where(
+        df.is_last == 1, forecast_texts.legend_forecast, forecast_texts.legend_yesterday
+    )
+
+    line = (
+        alt.Chart()
+        .mark_line(interpolate="step")
+        .encode(
+            x=alt.X(
+                f"{x_field}:N",
+                title=forecast_texts.x_title,
+            ),
+            y=alt.Y(
+                f"{y_field}:Q",
+                scale=alt.Scale(zero=False),
+                title=forecast_texts.y_title,
+            ),
+            color=alt.Color(
+                f"{legend_station}:N",
+                sort=list(forecast_dfs),
+                legend=alt.Legend(
+                    orient="top-right",
+                    offset=1,
+                    padding=2,
+                    direction="vertical",
+                    titleAnchor="start",
+                ),
+            ),
+            strokeDash=alt.StrokeDash(
+                f"{legend_name}:N",
+                scale=alt.Scale(
+                    domain=[
+                        forecast_texts.legend_forecast,
+                        forecast_texts.legend_yesterday,
+                    ],
+                    range=[[1, 0], [4, 2]],
+                ),
+                legend=None,
+            ),
+        )
+    )
+
+    shared_elements = _provide_interactive_chart_elements(
+        language_selection=language_bundle.language,
+        x_field=x_field,
+        y_field=y_field,
+        decimals=2,
+        current_chart=line,
+    )
+
+    return alt.layer(
+        line,
+        shared_elements.get("selectors"),
+        shared_elements.get("points"),
+        shared_elements.get("rules"),
+        shared_elements.get("text"),
+        # Define the data once for all layers, limited to the plotted columns
+        data=df[[x_field, y_field, legend_station, legend_name]],
+    ).properties(width=1000, height=400)
+
+
+def create_chart_specs(
+    forecast_summary_dict: Dict[str, pd.DataFrame], language_bundle: LanguageBundle
+) -> Dict[str, str]:
+    """Creates the charts of the forecast page and serializes them to Vega-Lite JSON, so that they can be cached and rendered without pandas or altair work.
+
+    Args:
+        forecast_summary_dict (Dict[str, pd.DataFrame]): The DataFrames as returned by `makeForecast`.
+        language_bundle (LanguageBundle): The texts of the selected language.
+
+    Returns:
+        Dict[str, str]: A dictionary mapping the charts 'forecast', 'hour', 'weekday' and 'trend' to their Vega-Lite JSON.
+    """
+    return {
+        "forecast": create_forecast_chart(
+            df=forecast_summary_dict.get("forecast_df", pd.DataFrame()),
+            language_bundle=language_bundle,
+        ).to_json(**_COMPACT_JSON),
+        "hour": create_bar_chart(
+            df=forecast_summary_dict.get("summary_hour_df"),  # type: ignore
+            language_bundle=language_bundle,
+        ).to_json(**_COMPACT_JSON),
+        "weekday": create_bar_chart(
+            df=forecast_summary_dict.get("summary_weekday_df"),  # type: ignore
+            language_bundle=language_bundle,
+        ).to_json(**_COMPACT_JSON),
+        "trend": create_trend_chart(
+            df=forecast_summary_dict.get("summary_trend_df"),  # type: ignore
+            language_bundle=language_bundle,
+        ).to_json(**_COMPACT_JSON),
+    }
@@ -0,0 +1,251 @@
+import argparse
+import io
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import as_completed
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import vl_convert as vlc
+from tpa_analytics_engine.api import Forecast
+from tpa_frontend.charts.create import create_chart_specs
+from tpa_frontend.config_handler.language import LanguageConfig
+from tpa_frontend.config_handler.load_configs import load_config_dict
+from tpa_frontend.config_handler.load_configs import load_language_config_dict
+from tpa_frontend.data_loader.load import _computeForecast
+from tpa_frontend.data_loader.load import GAS_TYPES
+from tpa_frontend.data_loader.store import ForecastStore
+
+EXPORT_FORMATS = ("png", "svg")
+
+# The objects of a worker process of the batch export, they are created once per process by _init_worker
+_worker_forecaster: Optional[Forecast] = None
+_worker_store: Optional[ForecastStore] = None
+_worker_language_config: Optional[LanguageConfig] = None
+
+
+def export_chart(chart_spec: str, export_format: str, scale: float = 2) -> bytes:
+    """Renders a chart to an image on the server.
+
+    Args:
+        chart_spec (str): The Vega-Lite JSON of the chart, e.g. from `create_chart_specs`.
+        export_format (str): The image format, either 'png' or 'svg'.
+        scale (float, optional): The scale factor of PNG images. Defaults to 2.
+
+    Raises:
+        ValueError: If the export_format isn't supported.
+
+    Returns:
+        bytes: The rendered image.
+    """
+    if export_format == "png":
+        return vlc.vegalite_to_png(vl_spec=chart_spec, scale=scale)
+    if export_format == "svg":
+        return vlc.vegalite_to_svg(vl_spec=chart_spec).encode("utf-8")
+
+    raise ValueError(
+        f"export_format must be one of {EXPORT_FORMATS}, not '{export_format}'"
+    )
+
+
+def export_chart_specs(chart_specs: Dict[str, str], export_format: str) -> bytes:
+    """Renders the charts of the forecast page to images and bundles them in a ZIP archive.
+
+    Args:
+        chart_specs (Dict[str, str]): A dictionary mapping the chart names to their Vega-Lite JSON as returned by `create_chart_specs`.
+        export_format (str): The image format, either 'png' or 'svg'.
+
+    Returns:
+        bytes: The ZIP archive containing one '<chart name>.<export_format>' file per chart.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, chart_spec in chart_specs.items():
+            archive.writestr(
+                f"{name}.{export_format}", export_chart(chart_spec, export_format)
+            )
+
+    return buffer.getvalue()
+
+
+def _init_worker(config_path: str, store_path: str) -> None:
+    """Initializes a worker process of the batch export with its own `Forecast` object, store and language config.
+
+    Args:
+        config_path (str): The path to the config file.
+        store_path (str): The root directory of the forecast store.
+    """
+    global _worker_forecaster, _worker_store, _worker_language_config
+    _worker_forecaster = Forecast(config_path=config_path)
+    _worker_store = ForecastStore(root=store_path)
+    _worker_language_config = load_language_config_dict(
+        load_config_dict(todays_date=date.today(), config_path=config_path)
+    )
+
+
+def _export_one(
+    todays_date: date,
+    station: str,
+    gas_type: str,
+    languages: Tuple[str, ...],
+    export_format: str,
+    output_dir: str,
+) -> Tuple[str, str, Optional[str]]:
+    """Exports the charts of one station and gas_type in all languages in a worker process.
+
+    The forecast is read from the forecast store and only computed if it is missing there.
+
+    Args:
+        todays_date (date): The date of the forecast.
+        station (str): The station of the forecast.
+        gas_type (str): The gas_type of the forecast.
+        languages (Tuple[str, ...]): The languages of the charts, e.g. ('Ger', 'Eng').
+        export_format (str): The image format, either 'png' or 'svg'.
+        output_dir (str): The directory to which the archives are written.
+
+    Returns:
+        Tuple[str, str, Optional[str]]: The station, the gas_type and an error message or None if the charts were exported.
+    """
+    try:
+        forecast_summary_dict = _worker_store.read(todays_date, station, gas_type)  # type: ignore
+        if forecast_summary_dict is None:
+            forecast_summary_dict = _computeForecast(
+                station=station, gas_type=gas_type, forecaster=_worker_forecaster  # type: ignore
+            )
+
+        export_dir = Path(output_dir) / todays_date.isoformat() / gas_type
+        export_dir.mkdir(parents=True, exist_ok=True)
+        for language in languages:
+            chart_specs = create_chart_specs(
+                forecast_summary_dict=forecast_summary_dict,
+                language_bundle=_worker_language_config[language],  # type: ignore
+            )
+            (export_dir / f"{station}_{language}.zip").write_bytes(
+                export_chart_specs(chart_specs, export_format)
+            )
+    except Exception as e:
+        return station, gas_type, f"{type(e).__name__}: {e}"
+
+    return station, gas_type, None
+
+
+def batch_export_charts(
+    config_dict: dict,
+    config_path: str,
+    stations: Iterable[str],
+    output_dir: str,
+    gas_types: Iterable[str] = GAS_TYPES,
+    languages: Iterable[str] = ("Ger", "Eng"),
+    export_format: str = "png",
+    max_workers: Optional[int] = None,
+) -> List[Tuple[str, str, str]]:
+    """Exports the charts of the forecast page for all combinations of stations and gas_types on a process pool, e.g. for the weekly reports.
+
+    Every combination is written as one ZIP archive per language to `<output_dir>/<date>/<gas_type>/<station>_<language>.zip`.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration, the forecasts of its todays_date are exported.
+        config_path (str): The path to the config file, used to initialize each worker process.
+        stations (Iterable[str]): The short_ids of the stations.
+        output_dir (str): The directory to which the archives are written.
+        gas_types (Iterable[str], optional): The gas_types. Defaults to ("e5", "e10", "diesel").
+        languages (Iterable[str], optional): The languages of the charts. Defaults to ("Ger", "Eng").
+        export_format (str, optional): The image format, either 'png' or 'svg'. Defaults to "png".
+        max_workers (Optional[int], optional): The number of worker processes. Defaults to None, i.e. the number of CPUs.
+
+    Raises:
+        ValueError: If the export_format isn't supported.
+
+    Returns:
+        List[Tuple[str, str, str]]: The station, gas_type and error message of every failed export.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"export_format must be one of {EXPORT_FORMATS}, not '{export_format}'"
+        )
+
+    todays_date = config_dict["todays_date"]
+    store_path = config_dict.get("runtime_config", {}).get(
+        "forecast_store_path", "forecast_store"
+    )
+    jobs = [(station, gas_type) for station in stations for gas_type in gas_types]
+    failed = []
+
+    start = time.time()
+    # Spawn the workers, the threads of vl-convert don't survive a fork
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(config_path, store_path),
+    ) as executor:
+        futures = [
+            executor.submit(
+                _export_one,
+                todays_date,
+                station,
+                gas_type,
+                tuple(languages),
+                export_format,
+                output_dir,
+            )
+            for station, gas_type in jobs
+        ]
+        for i, future in enumerate(as_completed(futures), start=1):
+            station, gas_type, error = future.result()
+            if error is not None:
+                failed.append((station, gas_type, error))
+            if i % 100 == 0 or i == len(jobs):
+                print(f"Exported {i}/{len(jobs)} charts in ", time.time() - start)
+
+    return failed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """The command line entry point of the batch chart export.
+
+    Args:
+        argv (Optional[List[str]], optional): The command line arguments. Defaults to None, i.e. sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        description="Export the forecast and impact charts of the given stations as PNG or SVG images."
+    )
+    parser.add_argument("stations", nargs="+", help="The short_ids of the stations.")
+    parser.add_argument(
+        "--config-path", default=os.getenv("CONFIG_PATH", "configs/config.yaml")
+    )
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--output-dir", default="chart_exports")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="png")
+    parser.add_argument("--gas-types", nargs="+", default=list(GAS_TYPES))
+    parser.add_argument("--languages", nargs="+", default=["Ger", "Eng"])
+    parser.add_argument("--max-workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    failed = batch_export_charts(
+        config_dict=load_config_dict(
+            todays_date=args.date, config_path=args.config_path
+        ),
+        config_path=args.config_path,
+        stations=args.stations,
+        output_dir=args.output_dir,
+        gas_types=args.gas_types,
+        languages=args.languages,
+        export_format=args.format,
+        max_workers=args.max_workers,
+    )
+    print(f"Failed exports: {len(failed)}")
+    for station, gas_type, error in failed:
+        print(f"{station} {gas_type}: {error}")
+
+
+if __name__ == "__main__":
+    main()
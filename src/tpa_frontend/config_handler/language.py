@@ -0,0 +1,234 @@
+from dataclasses import dataclass
+from dataclasses import fields
+from types import MappingProxyType
+from typing import Any
+from typing import Mapping
+from typing import Tuple
+
+
+class LanguageConfigError(ValueError):
+    """Raised when the language config misses a key or contains a value of the wrong type."""
+
+
+@dataclass(frozen=True)
+class ForecastTexts:
+    """The texts of the forecast page and its charts in one language."""
+
+    please_choose: str
+    tab_title1: str
+    tab_title2: str
+    page_title_forecast: str
+    y_title: str
+    x_title: str
+    page_title_impact: str
+    y_title_barchart: str
+    chart_title_hour: str
+    x_title_hour: str
+    chart_title_weekday: str
+    x_title_weekday: str
+    chart_title_trend: str
+    x_title_trend: str
+    legend_forecast: str
+    legend_yesterday: str
+    legend_name: str
+    page_title_comparison: str
+    legend_station: str
+    loading_forecast: str
+    refreshing_forecast: str
+    export_charts: str
+    download_charts: str
+    weekday_list: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class SidebarTexts:
+    """The texts of the sidebar in one language."""
+
+    menu_title: str
+    menu_options: Tuple[str, ...]
+    menu_pages: Tuple[str, ...]
+    station_label: str
+    station_help: str
+    station_search_label: str
+    compare_label: str
+    compare_help: str
+    gas_type_label_forecast: str
+    gas_type_label_maps: str
+
+    def page_of(self, menu_option: str) -> str:
+        """Returns the page of a menu option.
+
+        Args:
+            menu_option (str): The menu option as displayed in the sidebar.
+
+        Returns:
+            str: The page, e.g. 'welcome', 'forecast' or 'maps'.
+        """
+        return self.menu_pages[self.menu_options.index(menu_option)]
+
+
+@dataclass(frozen=True)
+class LanguageBundle:
+    """All texts of the app in one language."""
+
+    language: str
+    welcome_text: str
+    sidebar: SidebarTexts
+    forecast: ForecastTexts
+
+
+@dataclass(frozen=True)
+class LanguageConfig:
+    """The precompiled language config: one `LanguageBundle` per language plus the language independent elements."""
+
+    bundles: Mapping[str, LanguageBundle]
+    menu_icons: Tuple[str, ...]
+    english_flag: str
+    german_flag: str
+
+    @property
+    def languages(self) -> Tuple[str, ...]:
+        """The available languages, e.g. ('Ger', 'Eng')."""
+        return tuple(self.bundles)
+
+    def __getitem__(self, language: str) -> LanguageBundle:
+        return self.bundles[language]
+
+
+def _lookup(raw: Any, *path: Any) -> Any:
+    """A helper function resolving a key path in the raw language config.
+
+    Args:
+        raw (Any): The raw language config as loaded from the YAML file.
+        *path (Any): The keys (or list indices) to resolve one after another.
+
+    Raises:
+        LanguageConfigError: If a key of the path is missing.
+
+    Returns:
+        Any: The resolved value.
+    """
+    value = raw
+    for i, key in enumerate(path):
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            raise LanguageConfigError(
+                f"The language config is missing '{'.'.join(map(str, path[: i + 1]))}'"
+            ) from None
+
+    return value
+
+
+def _text(raw: Any, *path: Any) -> str:
+    """A helper function resolving a key path in the raw language config, which must point to a string.
+
+    Args:
+        raw (Any): The raw language config as loaded from the YAML file.
+        *path (Any): The keys (or list indices) to resolve one after another.
+
+    Raises:
+        LanguageConfigError: If a key of the path is missing or the value isn't a string.
+
+    Returns:
+        str: The resolved text.
+    """
+    value = _lookup(raw, *path)
+    if not isinstance(value, str):
+        raise LanguageConfigError(
+            f"The language config value '{'.'.join(map(str, path))}' must be a string"
+        )
+
+    return value
+
+
+def _compile_forecast_texts(raw: dict, language: str) -> ForecastTexts:
+    """A helper function compiling the forecast texts of one language.
+
+    Args:
+        raw (dict): The raw language config as loaded from the YAML file.
+        language (str): The language, e.g. 'Eng'.
+
+    Returns:
+        ForecastTexts: The forecast texts.
+    """
+    weekday_list = _lookup(raw, "forecast", language, "weekday_list")
+    if len(weekday_list) != 7:
+        raise LanguageConfigError(
+            f"The language config value 'forecast.{language}.weekday_list' must contain 7 weekdays"
+        )
+
+    texts = {
+        field.name: _text(raw, "forecast", language, field.name)
+        for field in fields(ForecastTexts)
+        if field.name != "weekday_list"
+    }
+    # Add leading spaces to the weekday_list for formatting in the relevant graph
+    texts["weekday_list"] = tuple(
+        " " * (len(weekday_list) - i) + weekday
+        for i, weekday in enumerate(weekday_list)
+    )
+
+    return ForecastTexts(**texts)
+
+
+def _compile_sidebar_texts(raw: dict, language: str) -> SidebarTexts:
+    """A helper function compiling the sidebar texts of one language.
+
+    Args:
+        raw (dict): The raw language config as loaded from the YAML file.
+        language (str): The language, e.g. 'Eng'.
+
+    Returns:
+        SidebarTexts: The sidebar texts.
+    """
+    # The first entry of the upper sidebar is the menu title, the others map the menu options to the pages
+    menu_entries = list(_lookup(raw, "sidebar_upper", language).items())
+    if len(menu_entries) < 2:
+        raise LanguageConfigError(
+            f"The language config value 'sidebar_upper.{language}' must contain a title and at least one option"
+        )
+
+    return SidebarTexts(
+        menu_title=menu_entries[0][0],
+        menu_options=tuple(option for option, _ in menu_entries[1:]),
+        menu_pages=tuple(page for _, page in menu_entries[1:]),
+        station_label=_text(raw, "sidebar_lower", "forecast", language, 0),
+        station_help=_text(raw, "sidebar_lower", "forecast", language, 1),
+        gas_type_label_forecast=_text(raw, "sidebar_lower", "forecast", language, 2),
+        station_search_label=_text(raw, "sidebar_lower", "forecast", language, 3),
+        compare_label=_text(raw, "sidebar_lower", "compare", language, 0),
+        compare_help=_text(raw, "sidebar_lower", "compare", language, 1),
+        gas_type_label_maps=_text(raw, "sidebar_lower", "maps", language),
+    )
+
+
+def compile_language_config(raw: dict) -> LanguageConfig:
+    """Validates the raw language config and compiles it into an immutable `LanguageConfig`.
+
+    Args:
+        raw (dict): The raw language config as loaded from the YAML file.
+
+    Raises:
+        LanguageConfigError: If a key is missing or a value has the wrong type.
+
+    Returns:
+        LanguageConfig: The precompiled language config.
+    """
+    languages = tuple(_lookup(raw, "welcome_text"))
+    bundles = {
+        language: LanguageBundle(
+            language=language,
+            welcome_text=_text(raw, "welcome_text", language),
+            sidebar=_compile_sidebar_texts(raw, language),
+            forecast=_compile_forecast_texts(raw, language),
+        )
+        for language in languages
+    }
+
+    return LanguageConfig(
+        bundles=MappingProxyType(bundles),
+        menu_icons=tuple(_lookup(raw, "sidebar_upper", "symbols")),
+        english_flag=_text(raw, "markdown", "english_flag"),
+        german_flag=_text(raw, "markdown", "german_flag"),
+    )
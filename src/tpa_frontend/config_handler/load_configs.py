@@ -1,6 +1,9 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from typing import Optional
 from typing import Tuple
+from typing import Union
 
 import streamlit as st
 import yaml  # type: ignore
@@ -9,6 +12,20 @@ from cloud_storage_wrapper.oci_access.files import FilesOCI
 from cloud_storage_wrapper.oci_access.pandas import create_PandasOCI_from_dict
 from cloud_storage_wrapper.oci_access.pandas import PandasOCI
 from tpa_analytics_engine.api import Forecast
+from tpa_frontend.config_handler.language import compile_language_config
+from tpa_frontend.config_handler.language import LanguageConfig
+from tpa_frontend.data_loader.cache import CompressedMapCache
+from tpa_frontend.data_loader.cache import ExpiringLRUCache
+from tpa_frontend.data_loader.disk_cache import CachedFilesOCI
+from tpa_frontend.data_loader.disk_cache import CachedPandasOCI
+from tpa_frontend.data_loader.disk_cache import DiskCache
+from tpa_frontend.data_loader.disk_cache import ObjectVersionProbe
+from tpa_frontend.data_loader.map_assets import MapAssetServer
+from tpa_frontend.data_loader.pool import ForecasterPool
+from tpa_frontend.data_loader.refresh import ForecastRefresher
+from tpa_frontend.data_loader.store import ForecastStore
+from tpa_frontend.monitoring.metrics import MetricsServer
+from tpa_frontend.monitoring.metrics import span
 
 
 @st.cache_resource  # This caches accross all sessions
@@ -19,6 +36,19 @@ def load_config_dict(todays_date: date, config_path: str) -> dict:
         todays_date (date): A date, this argument is not used but enables streamlit caching which is refreshed daily.
         config_path (str): The path to the config file. This can be a local file path or a URL to a .yaml file on Github.
 
+    Returns:
+        dict: A dictionary containing the contents of the content file config.yaml.
+    """
+    return _read_config_dict(todays_date=todays_date, config_path=config_path)
+
+
+def _read_config_dict(todays_date: date, config_path: str) -> dict:
+    """A helper function implementing `load_config_dict` without caching, e.g. for batch jobs running outside of streamlit.
+
+    Args:
+        todays_date (date): The date added to the config as todays_date.
+        config_path (str): The path to the config file. This can be a local file path or a URL to a .yaml file on Github.
+
     Returns:
         dict: A dictionary containing the contents of the content file config.yaml.
     """
@@ -37,32 +67,97 @@ def load_config_dict(todays_date: date, config_path: str) -> dict:
 
 
 @st.cache_resource  # This caches accross all sessions
-def create_pandasOCI(config_dict: dict) -> PandasOCI:
+def create_pandasOCI(config_dict: dict) -> Union[PandasOCI, CachedPandasOCI]:
     """
     This function provides a PandasOCI object based on the provided config_dict.
+    If a disk_cache_dir is configured in the runtime_config, the PandasOCI object is put behind the shared disk cache.
 
     Args:
         config_dict (dict): A dictionary containing the app configuration.
 
     Returns:
-        PandasOCI: An instance of PandasOCI created from the config_dict.
+        Union[PandasOCI, CachedPandasOCI]: An instance of PandasOCI created from the config_dict, optionally behind the disk cache.
     """
-    return create_PandasOCI_from_dict(configDict=config_dict)
+    pandas_oci = create_PandasOCI_from_dict(configDict=config_dict)
+    disk_cache_dir = config_dict.get("runtime_config", {}).get("disk_cache_dir")
+    if not disk_cache_dir:
+        return pandas_oci
+
+    return CachedPandasOCI(
+        pandas_oci=pandas_oci,
+        disk_cache=_create_disk_cache(config_dict),
+        version_probe=create_ObjectVersionProbe(config_dict=config_dict),
+    )
 
 
 @st.cache_resource  # This caches accross all sessions
-def create_filesOCI(config_dict: dict) -> FilesOCI:
+def create_filesOCI(config_dict: dict) -> Union[FilesOCI, CachedFilesOCI]:
     """
     This function provides a FilesOCI object based on the provided config_dict.
+    If a disk_cache_dir is configured in the runtime_config, the FilesOCI object is put behind the shared disk cache.
 
     Args:
         config_dict (dict): A dictionary containing the app configuration.
 
     Returns:
-        FilesOCI: An instance of FilesOCI created from the config_dict.
+        Union[FilesOCI, CachedFilesOCI]: An instance of FilesOCI created from the config_dict, optionally behind the disk cache.
     """
     configDict_Base = OCI_Config_Base(**config_dict["oci_config"]).model_dump()
-    return FilesOCI(**configDict_Base)
+    files_oci = FilesOCI(**configDict_Base)
+    disk_cache_dir = config_dict.get("runtime_config", {}).get("disk_cache_dir")
+    if not disk_cache_dir:
+        return files_oci
+
+    return CachedFilesOCI(
+        files_oci=files_oci,
+        disk_cache=_create_disk_cache(config_dict),
+        version_probe=create_ObjectVersionProbe(config_dict=config_dict),
+    )
+
+
+def _create_disk_cache(config_dict: dict) -> DiskCache:
+    """A helper function providing the disk cache configured in the runtime_config.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+
+    Returns:
+        DiskCache: The disk cache shared by the PandasOCI and FilesOCI objects.
+    """
+    runtime_config = config_dict.get("runtime_config", {})
+    return create_DiskCache(
+        directory=runtime_config["disk_cache_dir"],
+        max_bytes=runtime_config.get("disk_cache_max_bytes", 2_000_000_000),
+    )
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_DiskCache(directory: str, max_bytes: int) -> DiskCache:
+    """
+    This function provides the disk cache in front of the object storage.
+
+    Args:
+        directory (str): The directory of the cache, it can be shared by several app processes on one host.
+        max_bytes (int): The maximal size of all cached files in bytes.
+
+    Returns:
+        DiskCache: An instance of DiskCache.
+    """
+    return DiskCache(directory=directory, max_bytes=max_bytes)
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_ObjectVersionProbe(config_dict: dict) -> ObjectVersionProbe:
+    """
+    This function provides an ObjectVersionProbe reading the versions of the objects in the bucket of the config_dict.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+
+    Returns:
+        ObjectVersionProbe: An instance of ObjectVersionProbe created from the oci_config.
+    """
+    return ObjectVersionProbe(oci_config=config_dict["oci_config"])
 
 
 @st.cache_resource  # This caches accross all sessions
@@ -81,39 +176,198 @@ def create_Forecast(todays_date: date) -> Forecast:
 
 
 @st.cache_resource  # This caches accross all sessions
-def load_language_config_dict(config_dict: dict) -> dict:
-    """This function loads the language_config and returns it as a dict.
+def create_ForecasterPool(todays_date: date, size: int) -> ForecasterPool:
+    """
+    This function provides a pool of `Forecast` objects, so that forecasts for different sessions can run in parallel without sharing state.
+
+    Args:
+        todays_date (date): A date, this argument is not used but enables streamlit caching which is refreshed daily.
+        size (int): The maximal number of `Forecast` objects in the pool.
+
+    Returns:
+        ForecasterPool: A pool creating its `Forecast` objects lazily from the configuration file located at "configs/config.yaml".
+    """
+    config_path = os.getenv("CONFIG_PATH", "configs/config.yaml")
+    return ForecasterPool(factory=lambda: Forecast(config_path=config_path), size=size)
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_forecast_cache(
+    max_entries: int, ttl: Optional[float] = None
+) -> ExpiringLRUCache:
+    """
+    This function provides the cache for the forecasts, which is shared accross all sessions.
+
+    Args:
+        max_entries (int): The maximal number of forecasts kept in the cache.
+        ttl (Optional[float], optional): The time to live of a forecast in seconds. Forecasts always expire at midnight. Defaults to None.
+
+    Returns:
+        ExpiringLRUCache: A size-bounded LRU cache whose entries expire at midnight.
+    """
+    return ExpiringLRUCache(max_entries=max_entries, ttl=ttl, expire_at_midnight=True)
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_chart_spec_cache(max_entries: int) -> ExpiringLRUCache:
+    """
+    This function provides the cache for the serialized Vega-Lite specs of the forecast page, which is shared accross all sessions.
+
+    Args:
+        max_entries (int): The maximal number of (date, station, gas_type, language) entries kept in the cache.
+
+    Returns:
+        ExpiringLRUCache: A size-bounded LRU cache whose entries expire at midnight and which counts its hits.
+    """
+    return ExpiringLRUCache(max_entries=max_entries, expire_at_midnight=True)
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_chart_export_cache(max_entries: int) -> ExpiringLRUCache:
+    """
+    This function provides the cache for the charts rendered to PNG or SVG, which is shared accross all sessions.
+
+    Args:
+        max_entries (int): The maximal number of (date, station, gas_type, language, format) exports kept in the cache.
+
+    Returns:
+        ExpiringLRUCache: A size-bounded LRU cache whose entries expire at midnight.
+    """
+    return ExpiringLRUCache(max_entries=max_entries, expire_at_midnight=True)
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_forecast_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    This function provides the executor computing forecasts in the background, which is shared accross all sessions.
+
+    Args:
+        max_workers (int): The maximal number of forecasts computed at the same time, usually the size of the `ForecasterPool`.
+
+    Returns:
+        ThreadPoolExecutor: The executor, jobs exceeding max_workers wait in its queue and can be cancelled there.
+    """
+    return ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="forecast_jobs"
+    )
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_ForecastRefresher(max_workers: int, max_entries: int) -> ForecastRefresher:
+    """
+    This function provides the refresher serving the forecasts of the previous day after midnight while recomputing them in the background, which is shared accross all sessions.
+    It isn't cached on the date, so that the forecasts of the previous day survive midnight.
+
+    Args:
+        max_workers (int): The number of forecasts recomputed in parallel, it should be below the size of the `ForecasterPool`.
+        max_entries (int): The maximal number of (station, gas_type) forecasts kept.
+
+    Returns:
+        ForecastRefresher: The refresher, whose workers start on the first recomputation.
+    """
+    return ForecastRefresher(max_workers=max_workers, max_entries=max_entries)
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_map_cache(max_bytes: int) -> CompressedMapCache:
+    """
+    This function provides the cache for the HTML maps, which is shared accross all sessions.
+
+    Args:
+        max_bytes (int): The maximal compressed size of all cached maps in bytes.
+
+    Returns:
+        CompressedMapCache: A cache keeping the maps of the current week gzip-compressed.
+    """
+    return CompressedMapCache(max_bytes=max_bytes)
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_ForecastStore(store_path: str) -> ForecastStore:
+    """
+    This function provides the store of the forecasts precomputed by the nightly job.
+
+    Args:
+        store_path (str): The root directory of the forecast store.
+
+    Returns:
+        ForecastStore: An instance of ForecastStore reading from store_path.
+    """
+    return ForecastStore(root=store_path)
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_MapAssetServer(
+    directory: str, host: str, port: int, public_url: Optional[str] = None
+) -> MapAssetServer:
+    """
+    This function provides a started MapAssetServer serving the HTML maps as static files.
+
+    Args:
+        directory (str): The directory to which the maps are written and from which they are served.
+        host (str): The host the HTTP server binds to.
+        port (int): The port the HTTP server binds to.
+        public_url (Optional[str], optional): The base URL under which browsers reach the served directory. Defaults to None, i.e. http://<host>:<port>.
+
+    Returns:
+        MapAssetServer: An instance of MapAssetServer whose HTTP server is running.
+    """
+    server = MapAssetServer(
+        directory=directory, host=host, port=port, public_url=public_url
+    )
+    server.start()
+    return server
+
+
+@st.cache_resource  # This caches accross all sessions
+def create_MetricsServer(host: str, port: int) -> MetricsServer:
+    """
+    This function provides a started MetricsServer serving the metrics of the app process in the Prometheus text format.
+
+    Args:
+        host (str): The host the HTTP server binds to.
+        port (int): The port the HTTP server binds to.
+
+    Returns:
+        MetricsServer: An instance of MetricsServer whose HTTP server is running.
+    """
+    server = MetricsServer(host=host, port=port)
+    server.start()
+    return server
+
+
+@st.cache_resource  # This caches accross all sessions
+def load_language_config_dict(config_dict: dict) -> LanguageConfig:
+    """This function loads the language_config, validates it and returns it as a precompiled `LanguageConfig`.
 
     Args:
         config_dict (dict): A dictionary with the app configuration.
 
+    Raises:
+        LanguageConfigError: If the language_config misses a key, so that the app fails at startup and not during a render.
+
     Returns:
-        dict: The language_config as a dict.
+        LanguageConfig: The immutable language_config with one `LanguageBundle` per language.
     """
     # Load the language config
     with open(config_dict.get("language_config", ""), "r") as file:
         # Load the YAML data
         language_dict: dict = yaml.safe_load(file)
 
-    # Add leading spaces to the weekday_list for formatting in the relevant graph
-    for forecast_dict in language_dict.get("forecast", {}).values():
-        weekday_list = forecast_dict.get("weekday_list")
-        for i in range(len(weekday_list)):
-            weekday_list[i] = " " * (len(weekday_list) - i) + weekday_list[i]
+    return compile_language_config(language_dict)
 
-    return language_dict
 
-
-def create_config_from_env() -> Tuple[dict, dict]:
+def create_config_from_env() -> Tuple[dict, LanguageConfig]:
     """A function that loads the app and language config based on the environment variable "CONFIG_PATH" and returns them as a tuple.
 
     Returns:
-        Tuple[dict, dict]: A tuple containing the app config and the language dict.
+        Tuple[dict, LanguageConfig]: A tuple containing the app config and the language config.
     """
-    config_dict = load_config_dict(
-        todays_date=date.today(),
-        config_path=os.getenv("CONFIG_PATH", "configs/config.yaml"),
-    )
-    language_dict = load_language_config_dict(config_dict=config_dict)
+    with span("config_load"):
+        config_dict = load_config_dict(
+            todays_date=date.today(),
+            config_path=os.getenv("CONFIG_PATH", "configs/config.yaml"),
+        )
+        language_config = load_language_config_dict(config_dict=config_dict)
 
-    return (config_dict, language_dict)
+    return (config_dict, language_config)
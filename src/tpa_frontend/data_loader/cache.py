@@ -0,0 +1,254 @@
+import gzip
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from datetime import time as dt_time
+from datetime import timedelta
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import Optional
+from typing import Tuple
+
+
+class ExpiringLRUCache:
+    """A thread-safe, size-bounded cache with LRU eviction and expiry at midnight and/or after a ttl.
+
+    The cache counts hits, misses, evictions (entries dropped because the cache is full) and expirations (entries dropped because they are outdated).
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: Optional[float] = None,
+        expire_at_midnight: bool = True,
+        clock: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        """Initializes an empty cache.
+
+        Args:
+            max_entries (int): The maximal number of entries kept in the cache.
+            ttl (Optional[float], optional): The time to live of an entry in seconds. Defaults to None, i.e. no ttl.
+            expire_at_midnight (bool, optional): Whether entries expire at the first midnight after they were set. Defaults to True.
+            clock (Callable[[], datetime], optional): A function returning the current time. Defaults to datetime.now.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.expire_at_midnight = expire_at_midnight
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expires_at(self, now: datetime) -> Optional[datetime]:
+        """Calculates the expiry time for an entry set at `now`.
+
+        Args:
+            now (datetime): The time at which the entry is set.
+
+        Returns:
+            Optional[datetime]: The expiry time or None if the entry never expires.
+        """
+        expiry_times = []
+        if self.expire_at_midnight:
+            expiry_times.append(
+                datetime.combine(now.date() + timedelta(days=1), dt_time.min)
+            )
+        if self.ttl is not None:
+            expiry_times.append(now + timedelta(seconds=self.ttl))
+
+        return min(expiry_times) if expiry_times else None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the value cached for `key` and marks it as recently used.
+
+        Args:
+            key (Hashable): The key of the entry.
+            default (Any, optional): The value returned on a miss. Defaults to None.
+
+        Returns:
+            Any: The cached value or `default` if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or self._clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                del self._entries[key]
+                self.expirations += 1
+
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Caches `value` for `key` and evicts the least recently used entries if the cache is full.
+
+        Args:
+            key (Hashable): The key of the entry.
+            value (Any): The value to cache.
+        """
+        with self._lock:
+            self._entries[key] = (value, self._expires_at(self._clock()))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[1] is None or self._clock() < entry[1])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Removes all entries from the cache without resetting the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the current size and the counters of the cache.
+
+        Returns:
+            dict: A dictionary with the keys size, max_entries, hits, misses, evictions and expirations.
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def week_order(week: str) -> Tuple[int, ...]:
+    """Returns the sort key of a week like '2024_41', comparing the year and week numerically, so that '2024_9' comes before '2024_10'.
+
+    Args:
+        week (str): The week as '<year>_<week>'.
+
+    Returns:
+        Tuple[int, ...]: The year and week as integers.
+    """
+    return tuple(int(part) for part in str(week).split("_"))
+
+
+class CompressedMapCache:
+    """A thread-safe cache for the HTML maps, which stores them gzip-compressed and only keeps the maps of the current week.
+
+    The current week is the latest week set so far, maps of other weeks are evicted. On top, the least recently used maps are evicted once the compressed size exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int, compresslevel: int = 6) -> None:
+        """Initializes an empty cache.
+
+        Args:
+            max_bytes (int): The maximal compressed size of all cached maps in bytes.
+            compresslevel (int, optional): The gzip compression level from 1 (fastest) to 9 (smallest). Defaults to 6.
+        """
+        self.max_bytes = max_bytes
+        self.compresslevel = compresslevel
+        self.current_week: Optional[str] = None
+        self._entries: OrderedDict = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def nbytes(self) -> int:
+        """The current compressed size of all cached maps in bytes."""
+        return self._nbytes
+
+    def get(self, last_week: str, gas_type: str) -> Optional[str]:
+        """Returns the decompressed HTML of a cached map.
+
+        Args:
+            last_week (str): The week of the map.
+            gas_type (str): The gas_type of the map.
+
+        Returns:
+            Optional[str]: The decoded HTML of the map or None if it isn't cached.
+        """
+        with self._lock:
+            compressed = self._entries.get((last_week, gas_type))
+            if compressed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((last_week, gas_type))
+            self.hits += 1
+
+        return gzip.decompress(compressed).decode("utf-8")
+
+    def set(self, last_week: str, gas_type: str, map_html: str) -> None:
+        """Caches a map compressed, if it belongs to the current week, and evicts maps of other weeks and maps exceeding `max_bytes`.
+
+        Args:
+            last_week (str): The week of the map.
+            gas_type (str): The gas_type of the map.
+            map_html (str): The decoded HTML of the map.
+        """
+        compressed = gzip.compress(
+            map_html.encode("utf-8"), compresslevel=self.compresslevel
+        )
+        with self._lock:
+            if self.current_week is not None and week_order(last_week) < week_order(
+                self.current_week
+            ):
+                return
+            self.current_week = last_week
+
+            for key in [key for key in self._entries if key[0] != last_week]:
+                self._evict(key)
+            if (last_week, gas_type) in self._entries:
+                self._evict((last_week, gas_type), count=False)
+
+            self._entries[(last_week, gas_type)] = compressed
+            self._nbytes += len(compressed)
+            while self._nbytes > self.max_bytes and len(self._entries) > 1:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: tuple, count: bool = True) -> None:
+        """Removes an entry, the caller must hold the lock.
+
+        Args:
+            key (tuple): The (last_week, gas_type) of the entry.
+            count (bool, optional): Whether to count the removal as eviction. Defaults to True.
+        """
+        self._nbytes -= len(self._entries.pop(key))
+        if count:
+            self.evictions += 1
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def stats(self) -> dict:
+        """Returns the current size and the counters of the cache.
+
+        Returns:
+            dict: A dictionary with the keys entries, nbytes, max_bytes, current_week, hits, misses and evictions.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "nbytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+                "current_week": self.current_week,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,316 @@
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+from typing import Optional
+from typing import Union
+
+import pandas as pd
+import pyarrow.feather as feather
+from cloud_storage_wrapper.oci_access.files import FilesOCI
+from cloud_storage_wrapper.oci_access.pandas import PandasOCI
+
+
+class DiskCache:
+    """A size-capped cache of object storage files on the local disk, keyed by object path and object version.
+
+    Files are written atomically, so several app processes on one host can share the same directory.
+    When the cache exceeds `max_bytes`, the least recently used files are deleted.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int) -> None:
+        """Initializes the cache and creates its directory.
+
+        Args:
+            directory (Union[str, Path]): The directory of the cache.
+            max_bytes (int): The maximal size of all cached files in bytes.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._prune_lock = threading.Lock()
+
+    def path(self, object_name: str, version: str, suffix: str) -> Path:
+        """Returns the cache path of an object version.
+
+        Args:
+            object_name (str): The path of the object in the object storage.
+            version (str): The version of the object, e.g. its ETag.
+            suffix (str): The file suffix, e.g. ".ftr".
+
+        Returns:
+            Path: The path of the cached file, which might not exist.
+        """
+        key = hashlib.sha256(f"{object_name}\0{version}".encode("utf-8")).hexdigest()
+        return self.directory / f"{key[:32]}{suffix}"
+
+    def lookup(self, object_name: str, version: str, suffix: str) -> Optional[Path]:
+        """Returns the cache path of an object version if it is cached and marks it as recently used.
+
+        Args:
+            object_name (str): The path of the object in the object storage.
+            version (str): The version of the object, e.g. its ETag.
+            suffix (str): The file suffix, e.g. ".ftr".
+
+        Returns:
+            Optional[Path]: The path of the cached file or None if it isn't cached.
+        """
+        path = self.path(object_name, version, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        return path
+
+    def put(self, object_name: str, version: str, suffix: str, write: Any) -> Path:
+        """Writes an object version to the cache atomically and deletes the least recently used files if the cache is full.
+
+        Args:
+            object_name (str): The path of the object in the object storage.
+            version (str): The version of the object, e.g. its ETag.
+            suffix (str): The file suffix, e.g. ".ftr".
+            write (Any): A function writing the content to the temporary path it gets passed.
+
+        Returns:
+            Path: The path of the cached file.
+        """
+        path = self.path(object_name, version, suffix)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.prune()
+        return path
+
+    def nbytes(self) -> int:
+        """Returns the current size of all cached files in bytes.
+
+        Returns:
+            int: The size in bytes.
+        """
+        return sum(
+            entry.stat().st_size
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and not entry.name.startswith(".")
+        )
+
+    def prune(self) -> None:
+        """Deletes the least recently used files until the cache is within `max_bytes`."""
+        with self._prune_lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.startswith("."):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+class ObjectVersionProbe:
+    """Reads the version (ETag, or Last-Modified as fallback) of objects in the OCI bucket via HEAD requests."""
+
+    def __init__(self, oci_config: dict) -> None:
+        """Initializes the object storage client from the oci_config of the app configuration.
+
+        Args:
+            oci_config (dict): The oci_config section of the app configuration.
+        """
+        import oci
+
+        client_config = {
+            key: oci_config.get(key)
+            for key in ("user", "fingerprint", "tenancy", "region")
+        }
+        key_content = oci_config.get("direct_key") or (
+            os.getenv(oci_config["env_key"]) if oci_config.get("env_key") else None
+        )
+        if key_content:
+            client_config["key_content"] = key_content
+        else:
+            client_config["key_file"] = oci_config.get("key_file")
+
+        self.bucket_name = oci_config.get("bucket_name")
+        self._client = oci.object_storage.ObjectStorageClient(client_config)
+        self._namespace = self._client.get_namespace().data
+
+    def version(self, object_name: str) -> Optional[str]:
+        """Returns the version of an object.
+
+        Args:
+            object_name (str): The path of the object in the bucket.
+
+        Returns:
+            Optional[str]: The ETag or Last-Modified header of the object, or None if it couldn't be read.
+        """
+        try:
+            headers = self._client.head_object(
+                self._namespace, self.bucket_name, object_name
+            ).headers
+        except Exception as e:
+            print(f"Reading the version of {object_name} failed: {e}")
+            return None
+
+        return headers.get("etag") or headers.get("last-modified")
+
+
+def _put_uncached_on_error(
+    disk_cache: DiskCache, object_name: str, version: str, suffix: str, write: Any
+) -> None:
+    """Writes an object version to the disk cache, a failed write is printed and the object is just not cached.
+
+    Args:
+        disk_cache (DiskCache): The disk cache.
+        object_name (str): The path of the object in the object storage.
+        version (str): The version of the object, e.g. its ETag.
+        suffix (str): The file suffix, e.g. ".ftr".
+        write (Any): A function writing the content to the temporary path it gets passed.
+    """
+    try:
+        disk_cache.put(object_name, version, suffix, write)
+    except (ValueError, TypeError, OSError) as e:
+        print(f"Caching {object_name} on disk failed: {e}")
+
+
+class CachedPandasOCI:
+    """A PandasOCI in front of a DiskCache, cached dfs are stored as uncompressed feather files.
+
+    The files are memory-mapped instead of read into a buffer first, the conversion to pandas still copies the columns once.
+    """
+
+    def __init__(
+        self,
+        pandas_oci: PandasOCI,
+        disk_cache: DiskCache,
+        version_probe: ObjectVersionProbe,
+    ) -> None:
+        """Initializes the cached connection.
+
+        Args:
+            pandas_oci (PandasOCI): The connection used on a cache miss.
+            disk_cache (DiskCache): The disk cache shared with other connections and processes.
+            version_probe (ObjectVersionProbe): The probe reading the versions of the objects.
+        """
+        self._pandas_oci = pandas_oci
+        self.disk_cache = disk_cache
+        self.version_probe = version_probe
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pandas_oci, name)
+
+    def retrieve_df(self, path: str, df_format: str) -> pd.DataFrame:
+        """Retrieves a df from the disk cache or, on a miss, from the object storage and caches it.
+
+        Args:
+            path (str): The path of the df in the object storage.
+            df_format (str): The format of the df, e.g. 'ftr' or 'csv'.
+
+        Returns:
+            pd.DataFrame: The retrieved df.
+        """
+        version = self.version_probe.version(path)
+        if version is None:
+            return self._pandas_oci.retrieve_df(path=path, df_format=df_format)
+
+        cached_path = self.disk_cache.lookup(path, version, ".ftr")
+        if cached_path is not None:
+            try:
+                return feather.read_table(cached_path, memory_map=True).to_pandas()
+            except FileNotFoundError:
+                # Another process pruned the file meanwhile
+                pass
+
+        df = self._pandas_oci.retrieve_df(path=path, df_format=df_format)
+        # Uncompressed feather files are read without decompression
+        _put_uncached_on_error(
+            self.disk_cache,
+            path,
+            version,
+            ".ftr",
+            lambda tmp_path: df.to_feather(tmp_path, compression="uncompressed"),
+        )
+
+        return df
+
+
+class CachedFilesOCI:
+    """A FilesOCI in front of a DiskCache."""
+
+    def __init__(
+        self,
+        files_oci: FilesOCI,
+        disk_cache: DiskCache,
+        version_probe: ObjectVersionProbe,
+    ) -> None:
+        """Initializes the cached connection.
+
+        Args:
+            files_oci (FilesOCI): The connection used on a cache miss.
+            disk_cache (DiskCache): The disk cache shared with other connections and processes.
+            version_probe (ObjectVersionProbe): The probe reading the versions of the objects.
+        """
+        self._files_oci = files_oci
+        self.disk_cache = disk_cache
+        self.version_probe = version_probe
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._files_oci, name)
+
+    def retrieve_file_content(
+        self, file_name: str, decode: bool = False
+    ) -> Union[str, bytes]:
+        """Retrieves a file from the disk cache or, on a miss, from the object storage and caches it.
+
+        Args:
+            file_name (str): The path of the file in the object storage.
+            decode (bool, optional): Whether to return the content decoded as str. Defaults to False.
+
+        Returns:
+            Union[str, bytes]: The content of the file.
+        """
+        version = self.version_probe.version(file_name)
+        if version is None:
+            return self._files_oci.retrieve_file_content(
+                file_name=file_name, decode=decode
+            )
+
+        cached_path = self.disk_cache.lookup(file_name, version, ".bin")
+        if cached_path is not None:
+            try:
+                content = cached_path.read_bytes()
+                return content.decode("utf-8") if decode else content
+            except FileNotFoundError:
+                # Another process pruned the file meanwhile
+                pass
+
+        content = self._files_oci.retrieve_file_content(
+            file_name=file_name, decode=decode
+        )
+        raw_content = content.encode("utf-8") if isinstance(content, str) else content
+        _put_uncached_on_error(
+            self.disk_cache,
+            file_name,
+            version,
+            ".bin",
+            lambda tmp_path: Path(tmp_path).write_bytes(raw_content),
+        )
+
+        return content
@@ -1,5 +1,18 @@
-import time
+import os
+import threading
+from collections.abc import Mapping
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
 
 import numpy as np
 import pandas as pd
@@ -7,115 +20,1396 @@ import streamlit as st
 from cloud_storage_wrapper.oci_access.files import FilesOCI
 from cloud_storage_wrapper.oci_access.pandas import PandasOCI
 from tpa_analytics_engine.api import Forecast
+from tpa_frontend.config_handler.load_configs import create_chart_export_cache
+from tpa_frontend.config_handler.load_configs import create_chart_spec_cache
+from tpa_frontend.config_handler.load_configs import create_forecast_cache
+from tpa_frontend.config_handler.load_configs import create_ForecastRefresher
+from tpa_frontend.config_handler.load_configs import create_ForecastStore
+from tpa_frontend.config_handler.load_configs import create_map_cache
+from tpa_frontend.config_handler.load_configs import create_ObjectVersionProbe
+from tpa_frontend.data_loader.cache import CompressedMapCache
+from tpa_frontend.data_loader.cache import ExpiringLRUCache
+from tpa_frontend.data_loader.cache import week_order
+from tpa_frontend.data_loader.disk_cache import ObjectVersionProbe
+from tpa_frontend.data_loader.map_assets import MapAssetServer
+from tpa_frontend.data_loader.pool import ForecasterPool
+from tpa_frontend.data_loader.refresh import ForecastRefresher
+from tpa_frontend.data_loader.singleflight import SingleFlight
+from tpa_frontend.data_loader.stations import NearestStationIndex
+from tpa_frontend.data_loader.stations import StationIndex
+from tpa_frontend.data_loader.store import ForecastStore
+from tpa_frontend.data_loader.watcher import DataSnapshot
+from tpa_frontend.data_loader.watcher import DataVersionWatcher
+from tpa_frontend.monitoring.metrics import span
+
+# The columns of the loaded price history needed for the summaries
+SUMMARY_COLUMNS = ("week", "day_of_week", "hour_format", "price")
+# Whether the single-pass summaries matched `Forecast.create_summaries`, None until checked on the first forecast of the process
+_single_pass_summaries: Optional[bool] = None
+_single_pass_lock = threading.Lock()
+GAS_TYPES = ("e5", "e10", "diesel")
+
+# A single background thread prefetching maps, and the maps currently submitted to it
+_prefetch_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="prefetch_maps"
+)
+_prefetch_lock = threading.Lock()
+_prefetched_maps: Set[Tuple] = set()
+
+# The forecasts and map downloads currently running, concurrent identical requests wait for them
+_forecast_flight = SingleFlight()
+_map_flight = SingleFlight()
+
+
+def _group_df_config(df_config_dict: dict) -> Dict[Tuple[str, str], List[str]]:
+    """A helper function grouping the pre_load entries of the df_config by their source object.
+
+    Args:
+        df_config_dict (dict): The df_config section of the app configuration.
+
+    Returns:
+        Dict[Tuple[str, str], List[str]]: A dictionary mapping (df_path, df_format) to the names of all entries pointing to that object.
+    """
+    grouped_entries: Dict[Tuple[str, str], List[str]] = {}
+    for df_dict_key, df_dict in df_config_dict.items():
+        if "pre_load" in df_dict:
+            source = (df_dict.get("df_path"), df_dict.get("df_format"))
+            grouped_entries.setdefault(source, []).append(df_dict_key)
+
+    return grouped_entries
+
+
+def _retrieve_timed(
+    pandas_connection: PandasOCI, df_path: str, df_format: str
+) -> pd.DataFrame:
+    """A helper function retrieving a single df in a base_table_load span.
+
+    Args:
+        pandas_connection (PandasOCI): An instance of the PandasOCI connection.
+        df_path (str): The path of the df in the object storage.
+        df_format (str): The format of the df, e.g. 'ftr' or 'csv'.
+
+    Returns:
+        pd.DataFrame: The retrieved df.
+    """
+    with span("base_table_load"):
+        return pandas_connection.retrieve_df(path=df_path, df_format=df_format)
+
+
+class LazyDFDict(Mapping):
+    """A read-only mapping of the base DataFrames, which retrieves a df on first access and keeps it afterwards.
+
+    Entries sharing the same source object share one retrieval, concurrent first accesses to the same source are serialized per source.
+    """
+
+    def __init__(
+        self,
+        pandas_connection: PandasOCI,
+        grouped_entries: Dict[Tuple[str, str], List[str]],
+    ) -> None:
+        """Initializes the mapping without retrieving any df.
+
+        Args:
+            pandas_connection (PandasOCI): An instance of the PandasOCI connection used to retrieve the dfs.
+            grouped_entries (Dict[Tuple[str, str], List[str]]): A dictionary mapping (df_path, df_format) to the names of all entries pointing to that object.
+        """
+        self._pandas_connection = pandas_connection
+        self._sources = {
+            df_dict_key: source
+            for source, df_dict_keys in grouped_entries.items()
+            for df_dict_key in df_dict_keys
+        }
+        self._loaded: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._locks = {source: threading.Lock() for source in grouped_entries}
+
+    def __getitem__(self, df_dict_key: str) -> pd.DataFrame:
+        source = self._sources[df_dict_key]
+        if source not in self._loaded:
+            with self._locks[source]:
+                # Check again, another thread might have retrieved the df meanwhile
+                if source not in self._loaded:
+                    self._loaded[source] = _retrieve_timed(
+                        self._pandas_connection, *source
+                    )
+
+        return self._loaded[source]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sources)
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def is_loaded(self, df_dict_key: str) -> bool:
+        """Checks whether the df for an entry has already been retrieved.
+
+        Args:
+            df_dict_key (str): The name of the entry in the df_config.
+
+        Returns:
+            bool: True if the df has been retrieved, else False.
+        """
+        return self._sources[df_dict_key] in self._loaded
+
+    def preload(self, sources: List[Tuple[str, str]], max_workers: int) -> None:
+        """Retrieves the given source objects concurrently on a bounded thread pool.
+
+        Args:
+            sources (List[Tuple[str, str]]): The (df_path, df_format) of the objects to retrieve.
+            max_workers (int): The maximal number of concurrent retrievals.
+        """
+        if not sources:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(len(sources), max_workers)) as executor:
+            futures = {
+                executor.submit(
+                    _retrieve_timed, self._pandas_connection, *source
+                ): source
+                for source in sources
+            }
+            for future, source in futures.items():
+                df = future.result()
+                with self._locks[source]:
+                    self._loaded[source] = df
 
 
 @st.cache_resource  # This caches accross all sessions
-def loadBaseDFs(config_dict: dict, _pandas_connection: PandasOCI) -> dict:
+def loadBaseDFs(config_dict: dict, _pandas_connection: PandasOCI) -> LazyDFDict:
     """
     A function to load base DataFrames (data frames which are used by different components of the app) based on the provided config dictionary and PandasOCI connection object.
+    Entries with `pre_load: True` are retrieved eagerly on a bounded thread pool, entries with `pre_load: False` are retrieved on first access.
+    Entries pointing to the same object are retrieved only once.
 
     Parameters:
         config_dict (dict): A dictionary containing the app configuration. Streamlit caches this function based on the config dict. Since the date is in the config dict, this function is also cached on the date.
         _pandas_connection (PandasOCI): An instance of the PandasOCI connection. Streamlit doesn't evaluate this argument for caching.
 
     Returns:
-        dict: A dictionary containing the loaded DataFrames.
+        LazyDFDict: A read-only mapping containing the (lazily) loaded DataFrames.
+    """
+    return _createBaseDFs(config_dict=config_dict, pandas_connection=_pandas_connection)
+
+
+def _createBaseDFs(
+    config_dict: dict,
+    pandas_connection: PandasOCI,
+    preload_df_dict_keys: Iterable[str] = (),
+) -> LazyDFDict:
+    """A helper function implementing `loadBaseDFs` without caching.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        pandas_connection (PandasOCI): An instance of the PandasOCI connection.
+        preload_df_dict_keys (Iterable[str], optional): Entries to retrieve eagerly in addition to the `pre_load: True` entries. Defaults to ().
+
+    Returns:
+        LazyDFDict: A read-only mapping containing the (lazily) loaded DataFrames.
     """
-    # Initialize loaded_dfs dictionary
-    loaded_dfs = {}
-    # Get the df_config_dict, specifying which dfs to load
     df_config_dict = config_dict.get("df_config", {})
-    # Load the dfs if there is a pre_load key in the sub dict for that df
-    for df_dict_key in df_config_dict.keys():
-        if "pre_load" in df_config_dict.get(df_dict_key):
-            # Add the df to the loaded_dfs dict by retrieving  the df via _pandas_connection
-            loaded_dfs[df_dict_key] = _pandas_connection.retrieve_df(
-                path=df_config_dict.get(df_dict_key).get("df_path"),
-                df_format=df_config_dict.get(df_dict_key).get("df_format"),
-            )
+    # Group the dfs to load by their source object, so that each object is only retrieved once
+    grouped_entries = _group_df_config(df_config_dict)
+    loaded_dfs = LazyDFDict(
+        pandas_connection=pandas_connection, grouped_entries=grouped_entries
+    )
+
+    # Retrieve all objects with at least one eager entry right away
+    preload_df_dict_keys = set(preload_df_dict_keys)
+    eager_sources = [
+        source
+        for source, df_dict_keys in grouped_entries.items()
+        if any(
+            df_config_dict[key].get("pre_load") or key in preload_df_dict_keys
+            for key in df_dict_keys
+        )
+    ]
+    loaded_dfs.preload(
+        sources=eager_sources,
+        max_workers=config_dict.get("runtime_config", {}).get("load_max_workers", 4),
+    )
 
     return loaded_dfs
 
 
 @st.cache_resource  # This caches accross all sessions
+def getStationIndex(config_dict: dict, _base_df_dict: Mapping) -> StationIndex:
+    """
+    A function building the lookup index of the stations offered in the forecast sidebar once per data refresh.
+
+    Parameters:
+        config_dict (dict): A dictionary containing the app configuration. Streamlit caches this function based on the config dict. Since the date is in the config dict, the index is rebuilt with the base DataFrames.
+        _base_df_dict (Mapping): The base DataFrames as returned by `loadBaseDFs`. Streamlit doesn't evaluate this argument for caching.
+
+    Returns:
+        StationIndex: The index mapping the IDs of the stations in station_info_30 to their names and labels.
+    """
+    return _createStationIndex(config_dict=config_dict, base_df_dict=_base_df_dict)
+
+
+def _createStationIndex(config_dict: dict, base_df_dict: Mapping) -> StationIndex:
+    """A helper function implementing `getStationIndex` without caching.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration. The address columns are read from the station_geo_config.
+        base_df_dict (Mapping): The base DataFrames as returned by `loadBaseDFs`.
+
+    Returns:
+        StationIndex: The index mapping the IDs of the stations in station_info_30 to their names and labels.
+    """
+    return StationIndex(
+        station_df=base_df_dict.get(
+            "station_info_30", pd.DataFrame(columns=["Tankstellen_Name", "short_id"])
+        ),
+        address_cols=config_dict.get("station_geo_config", {}).get("address_cols")
+        or (),
+    )
+
+
+@st.cache_resource  # This caches accross all sessions
+def getNearestStationIndex(
+    config_dict: dict, _base_df_dict: Mapping
+) -> NearestStationIndex:
+    """
+    A function building the spatial index over the coordinates of all stations once per data refresh.
+
+    Parameters:
+        config_dict (dict): A dictionary containing the app configuration. The df and its columns are read from the station_geo_config. Streamlit caches this function based on the config dict. Since the date is in the config dict, the index is rebuilt with the base DataFrames.
+        _base_df_dict (Mapping): The base DataFrames as returned by `loadBaseDFs`. Streamlit doesn't evaluate this argument for caching.
+
+    Returns:
+        NearestStationIndex: The index answering which stations are nearest to a postcode or coordinates.
+    """
+    return _createNearestStationIndex(
+        config_dict=config_dict, base_df_dict=_base_df_dict
+    )
+
+
+def _createNearestStationIndex(
+    config_dict: dict, base_df_dict: Mapping
+) -> NearestStationIndex:
+    """A helper function implementing `getNearestStationIndex` without caching.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        base_df_dict (Mapping): The base DataFrames as returned by `loadBaseDFs`.
+
+    Returns:
+        NearestStationIndex: The index answering which stations are nearest to a postcode or coordinates.
+    """
+    geo_config = config_dict.get("station_geo_config", {})
+    lat_col = geo_config.get("lat_col", "latitude")
+    lon_col = geo_config.get("lon_col", "longitude")
+    return NearestStationIndex(
+        station_df=base_df_dict.get(
+            geo_config.get("df_name", "station_info"),
+            pd.DataFrame(columns=["Tankstellen_Name", "short_id", lat_col, lon_col]),
+        ),
+        lat_col=lat_col,
+        lon_col=lon_col,
+        post_code_col=geo_config.get("post_code_col"),
+    )
+
+
+def getDataSnapshot(
+    config_dict: dict, _pandas_connection: PandasOCI, _files_oci_connection: FilesOCI
+) -> DataSnapshot:
+    """
+    A function returning the current version of the app data, i.e. the base DataFrames, the station indexes, the map cache and the last week.
+    If a data_watch_interval is configured in the runtime_config, the snapshot is kept up to date by a `DataVersionWatcher`, else it is refreshed with the todays_date.
+    A rerun should read the snapshot once and use it throughout.
+
+    Parameters:
+        config_dict (dict): A dictionary containing the app configuration.
+        _pandas_connection (PandasOCI): An instance of the PandasOCI connection.
+        _files_oci_connection (FilesOCI): An instance of the FilesOCI connection.
+
+    Returns:
+        DataSnapshot: The current snapshot of the app data.
+    """
+    if config_dict.get("runtime_config", {}).get("data_watch_interval"):
+        return getDataWatcher(
+            config_path=os.getenv("CONFIG_PATH", "configs/config.yaml"),
+            _config_dict=config_dict,
+            _pandas_connection=_pandas_connection,
+            _files_oci_connection=_files_oci_connection,
+            _version_probe=create_ObjectVersionProbe(config_dict=config_dict),
+        ).snapshot
+
+    base_df_dict = loadBaseDFs(
+        config_dict=config_dict, _pandas_connection=_pandas_connection
+    )
+    return DataSnapshot(
+        versions={},
+        base_df_dict=base_df_dict,
+        station_index=getStationIndex(
+            config_dict=config_dict, _base_df_dict=base_df_dict
+        ),
+        nearest_station_index=partial(
+            getNearestStationIndex, config_dict=config_dict, _base_df_dict=base_df_dict
+        ),
+        map_cache=_get_map_cache(config_dict),
+        last_week=_get_last_week(base_df_dict),
+    )
+
+
+@st.cache_resource  # This caches accross all sessions
+def getDataWatcher(
+    config_path: str,
+    _config_dict: dict,
+    _pandas_connection: PandasOCI,
+    _files_oci_connection: FilesOCI,
+    _version_probe: ObjectVersionProbe,
+) -> DataVersionWatcher:
+    """
+    A function providing a started `DataVersionWatcher`, which polls the versions of the objects in the df_config, the data_config and the maps of the last week every data_watch_interval seconds.
+    Once an object changes, the new data is loaded in the background and swapped in as new `DataSnapshot`. A change of the data_config also clears the caches of the forecasts and charts and invalidates the forecast store.
+
+    Parameters:
+        config_path (str): The path to the config file. Streamlit caches this function based on the path only, so the watcher and its snapshot survive the change of the date at midnight.
+        _config_dict (dict): A dictionary containing the app configuration. Streamlit doesn't evaluate this argument for caching.
+        _pandas_connection (PandasOCI): An instance of the PandasOCI connection. Streamlit doesn't evaluate this argument for caching.
+        _files_oci_connection (FilesOCI): An instance of the FilesOCI connection. Streamlit doesn't evaluate this argument for caching.
+        _version_probe (ObjectVersionProbe): The probe reading the versions of the objects. Streamlit doesn't evaluate this argument for caching.
+
+    Returns:
+        DataVersionWatcher: The watcher whose background thread is running.
+    """
+    watcher = _createDataWatcher(
+        config_dict=_config_dict,
+        pandas_connection=_pandas_connection,
+        files_oci_connection=_files_oci_connection,
+        version_probe=_version_probe,
+        # Resolve the caches in the script thread, the watcher thread has no streamlit context
+        data_caches=_get_data_caches(_config_dict),
+        forecast_store=_get_forecast_caches(_config_dict)[1],
+    )
+    watcher.start()
+    return watcher
+
+
+def _createDataWatcher(
+    config_dict: dict,
+    pandas_connection: PandasOCI,
+    files_oci_connection: FilesOCI,
+    version_probe: ObjectVersionProbe,
+    data_caches: Iterable[ExpiringLRUCache] = (),
+    forecast_store: Optional[ForecastStore] = None,
+) -> DataVersionWatcher:
+    """A helper function implementing `getDataWatcher` without caching and without starting the watcher.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        pandas_connection (PandasOCI): An instance of the PandasOCI connection.
+        files_oci_connection (FilesOCI): An instance of the FilesOCI connection.
+        version_probe (ObjectVersionProbe): The probe reading the versions of the objects.
+        data_caches (Iterable[ExpiringLRUCache], optional): The caches to clear once the data_config changes. Defaults to ().
+        forecast_store (Optional[ForecastStore], optional): The forecast store to invalidate once the data_config changes. Defaults to None.
+
+    Returns:
+        DataVersionWatcher: The watcher holding the first snapshot.
+    """
+    return DataVersionWatcher(
+        read_versions=lambda snapshot: {
+            object_name: version_probe.version(object_name)
+            for object_name in _watched_objects(
+                config_dict, snapshot.last_week if snapshot is not None else None
+            )
+        },
+        build_snapshot=partial(
+            _buildDataSnapshot,
+            config_dict,
+            pandas_connection,
+            files_oci_connection,
+            data_caches=tuple(data_caches),
+            forecast_store=forecast_store,
+        ),
+        interval=config_dict.get("runtime_config", {}).get("data_watch_interval", 60),
+    )
+
+
+def _get_data_caches(config_dict: dict) -> List[ExpiringLRUCache]:
+    """A helper function providing the caches derived from the price data, i.e. the forecast cache and the chart caches.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+
+    Returns:
+        List[ExpiringLRUCache]: The caches shared accross all sessions.
+    """
+    runtime_config = config_dict.get("runtime_config", {})
+    forecast_cache, _ = _get_forecast_caches(config_dict)
+    return [
+        forecast_cache,
+        create_chart_spec_cache(
+            max_entries=runtime_config.get("chart_spec_cache_max_entries", 2000)
+        ),
+        create_chart_export_cache(
+            max_entries=runtime_config.get("chart_export_cache_max_entries", 200)
+        ),
+    ]
+
+
+def _watched_objects(config_dict: dict, last_week: Optional[str]) -> List[str]:
+    """A helper function returning the names of the objects watched for changes.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        last_week (Optional[str]): The week of the maps to watch, None to watch no maps.
+
+    Returns:
+        List[str]: The object names of the df_config, the data_config and the maps of the last_week.
+    """
+    object_names = [
+        df_dict.get("df_path")
+        for df_dict in (
+            *config_dict.get("df_config", {}).values(),
+            config_dict.get("data_config", {}),
+        )
+        if df_dict.get("df_path")
+    ]
+    if last_week is not None:
+        object_names += [
+            _map_file_name(config_dict, last_week, gas_type) for gas_type in GAS_TYPES
+        ]
+
+    return list(dict.fromkeys(object_names))
+
+
+def _get_last_week(base_df_dict: Mapping) -> str:
+    """A helper function returning the latest week of the week_mapper.
+
+    Args:
+        base_df_dict (Mapping): The base DataFrames as returned by `loadBaseDFs`.
+
+    Returns:
+        str: The latest week, e.g. '2024_41'.
+    """
+    return max(
+        base_df_dict.get("week_mapper", pd.DataFrame())["week_total"].dropna(),
+        key=week_order,
+        default=None,
+    )
+
+
+def _buildDataSnapshot(
+    config_dict: dict,
+    pandas_connection: PandasOCI,
+    files_oci_connection: FilesOCI,
+    versions: Dict[str, Optional[str]],
+    previous: Optional[DataSnapshot],
+    data_caches: Iterable[ExpiringLRUCache] = (),
+    forecast_store: Optional[ForecastStore] = None,
+) -> DataSnapshot:
+    """A helper function building a snapshot of the app data for the given versions.
+
+    Parts whose objects didn't change are taken over from the previous snapshot. Everything the previous snapshot had loaded, i.e. lazy base DataFrames, the spatial index and maps, is loaded again right away, so that the new snapshot is as warm as the old one.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        pandas_connection (PandasOCI): An instance of the PandasOCI connection.
+        files_oci_connection (FilesOCI): An instance of the FilesOCI connection.
+        versions (Dict[str, Optional[str]]): The versions of the watched objects.
+        previous (Optional[DataSnapshot]): The current snapshot, or None for the first one.
+        data_caches (Iterable[ExpiringLRUCache], optional): The caches to clear if the data_config changed. Defaults to ().
+        forecast_store (Optional[ForecastStore], optional): The forecast store to invalidate if the data_config changed. Defaults to None.
+
+    Returns:
+        DataSnapshot: The new snapshot.
+    """
+
+    def changed(object_names: Iterable[str]) -> bool:
+        return previous is None or any(
+            previous.versions.get(object_name) not in (None, versions.get(object_name))
+            for object_name in object_names
+        )
+
+    table_names = [
+        df_dict.get("df_path")
+        for df_dict in config_dict.get("df_config", {}).values()
+        if df_dict.get("df_path")
+    ]
+    if previous is not None and not changed(table_names):
+        base_df_dict = previous.base_df_dict
+        station_index = previous.station_index
+    else:
+        base_df_dict = _createBaseDFs(
+            config_dict=config_dict,
+            pandas_connection=pandas_connection,
+            preload_df_dict_keys=[
+                df_dict_key
+                for df_dict_key in (previous.base_df_dict if previous else ())
+                if previous.base_df_dict.is_loaded(df_dict_key)  # type: ignore
+            ],
+        )
+        station_index = _createStationIndex(
+            config_dict=config_dict, base_df_dict=base_df_dict
+        )
+
+    if previous is not None and previous.has_nearest_station_index:
+        # The previous snapshot had built the spatial index, so the new one gets it right away
+        built_nearest_station_index = (
+            previous.nearest_station_index
+            if base_df_dict is previous.base_df_dict
+            else _createNearestStationIndex(
+                config_dict=config_dict, base_df_dict=base_df_dict
+            )
+        )
+
+        def nearest_station_index() -> NearestStationIndex:
+            return built_nearest_station_index
+
+    else:
+        nearest_station_index = partial(
+            _createNearestStationIndex,
+            config_dict=config_dict,
+            base_df_dict=base_df_dict,
+        )
+
+    last_week = _get_last_week(base_df_dict)
+    map_names = [
+        _map_file_name(config_dict, last_week, gas_type) for gas_type in GAS_TYPES
+    ]
+    if (
+        previous is not None
+        and last_week == previous.last_week
+        and not changed(map_names)
+    ):
+        map_cache = previous.map_cache
+    else:
+        map_cache = CompressedMapCache(
+            max_bytes=config_dict.get("runtime_config", {}).get(
+                "map_cache_max_bytes", 50_000_000
+            )
+        )
+        for gas_type in GAS_TYPES:
+            if previous is not None and (previous.last_week, gas_type) in (
+                previous.map_cache
+            ):
+                _retrieveMap(
+                    config_dict=config_dict,
+                    last_week=last_week,
+                    gas_type=gas_type,
+                    files_oci_connection=files_oci_connection,
+                    map_cache=map_cache,
+                )
+
+    data_path = config_dict.get("data_config", {}).get("df_path")
+    if previous is not None and data_path and changed([data_path]):
+        # The forecasts and charts of the old prices are outdated, also the precomputed ones
+        for data_cache in data_caches:
+            data_cache.clear()
+        if forecast_store is not None:
+            forecast_store.invalidate()
+
+    return DataSnapshot(
+        versions=versions,
+        base_df_dict=base_df_dict,
+        station_index=station_index,
+        nearest_station_index=nearest_station_index,
+        map_cache=map_cache,
+        last_week=last_week,
+    )
+
+
 def makeForecast(
-    config_dict: dict, station: str, gas_type: str, _forecaster: Forecast
+    config_dict: dict, station: str, gas_type: str, _forecaster: ForecasterPool
 ) -> Dict[str, pd.DataFrame]:
     """
-    A function that makes a forecast based on the provided station and sorte utilizing a _forecaster object.
+    A function that makes a forecast based on the provided station and sorte utilizing a `Forecast` object borrowed from the _forecaster pool.
     It returns a dictionary containing the forecast DataFrame, summary DataFrames for weekday, hour, and trend.
+    Results are kept in a size-bounded LRU cache shared accross all sessions, whose entries expire at midnight.
+    On a cache miss the forecast is read from the forecast store filled by the nightly precompute job and only computed if it is missing there.
 
     Parameters:
-        config_dict (dict): A dictionary containing the app configuration. Streamlit caches this function based on the config dict. Since the date is in the config dict, this function is also cached on the date.
+        config_dict (dict): A dictionary containing the app configuration. The cache size is read from the runtime_config and the todays_date is part of the cache key.
         station (str): The station for which the forecast is made.
         gas_type (str): The gas_type for which to make the price forecast.
-        _forecaster (Forecast): An instance of the Forecast class used for forecasting. Streamlit doesn't evaluate this argument for caching.
+        _forecaster (ForecasterPool): A pool of `Forecast` objects, each forecast exclusively uses one of them so that parallel sessions don't share state.
 
     Returns:
         Dict[str, pd.DataFrame]: A dictionary mapping names to the different DataFrames resulting from the forecast.
     """
-    start = time.time()
-    # Use the _forecaster to load the relevant df for station and gas_type
-    _forecaster.load_df(station=station, sorte=gas_type)
-    print("Loading the df took: ", time.time() - start)
-    start = time.time()
-    # Create the forecast
-    forecast_df = _forecaster.create_forecast()
-    # Filter the df on the last and previous date
-    max_date_pre = forecast_df.query("is_last==0")["Day"].max()
-    forecast_df = forecast_df[
-        (forecast_df["is_last"] == 1) | (forecast_df["Day"] == max_date_pre)
-    ].copy()
-    # Fill the pred price with the actual price (for the previous date)
-    forecast_df["pred"] = forecast_df["pred"].fillna(forecast_df["price"])
-    # Filter relevant columns
-    forecast_df = forecast_df[["Day_Hours", "pred", "is_last", "hour_format"]]
-    # Add a space in front of the time_string to keep sortation by previous date and last date
-    forecast_df["hour_format"] = np.where(
-        forecast_df.is_last == 1,
-        forecast_df["hour_format"],
-        " " + forecast_df["hour_format"],
-    )
-
-    print("Finishing forecasting: ", time.time() - start)
-    # Return DataFrames as a dict
+    forecast_cache, forecast_store = _get_forecast_caches(config_dict)
+    return _retrieveForecast(
+        config_dict=config_dict,
+        station=station,
+        gas_type=gas_type,
+        forecaster=_forecaster,
+        forecast_cache=forecast_cache,
+        forecast_store=forecast_store,
+        refresher=_get_forecast_refresher(config_dict),
+    )
+
+
+def makeForecasts(
+    config_dict: dict,
+    stations: Iterable[str],
+    gas_type: str,
+    _forecaster: ForecasterPool,
+) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    A function that makes the forecasts of several stations for one gas_type as parallel jobs, e.g. to compare them.
+    Every station is looked up in the forecast cache and the forecast store first, the missing forecasts are computed in parallel, bounded by the size of the _forecaster pool.
+    The total time is therefore close to the time of the slowest station instead of the sum over all stations.
+
+    Parameters:
+        config_dict (dict): A dictionary containing the app configuration.
+        stations (Iterable[str]): The stations for which the forecasts are made.
+        gas_type (str): The gas_type for which to make the price forecasts.
+        _forecaster (ForecasterPool): A pool of `Forecast` objects, each job exclusively uses one of them.
+
+    Returns:
+        Dict[str, Dict[str, pd.DataFrame]]: A dictionary mapping the stations to the results of `makeForecast`, in the order of the stations.
+    """
+    stations = list(dict.fromkeys(stations))
+    if not stations:
+        return {}
+
+    # Resolve the caches in the script thread, the worker threads have no streamlit context
+    forecast_cache, forecast_store = _get_forecast_caches(config_dict)
+    refresher = _get_forecast_refresher(config_dict)
+    with ThreadPoolExecutor(
+        max_workers=min(len(stations), _forecaster.size),
+        thread_name_prefix="make_forecasts",
+    ) as executor:
+        futures = {
+            station: executor.submit(
+                _retrieveForecast,
+                config_dict=config_dict,
+                station=station,
+                gas_type=gas_type,
+                forecaster=_forecaster,
+                forecast_cache=forecast_cache,
+                forecast_store=forecast_store,
+                refresher=refresher,
+            )
+            for station in stations
+        }
+
+        return {station: future.result() for station, future in futures.items()}
+
+
+def peekForecast(
+    config_dict: dict, station: str, gas_type: str
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    A function returning a forecast only if it is available without computing it, i.e. from the forecast cache or the forecast store.
+
+    Parameters:
+        config_dict (dict): A dictionary containing the app configuration.
+        station (str): The station of the forecast.
+        gas_type (str): The gas_type of the forecast.
+
+    Returns:
+        Optional[Dict[str, pd.DataFrame]]: The result of `makeForecast` or None if it would have to be computed.
+    """
+    forecast_cache, forecast_store = _get_forecast_caches(config_dict)
+    forecast_summary_dict = forecast_cache.get(
+        (config_dict.get("todays_date"), station, gas_type)
+    )
+    if forecast_summary_dict is None and forecast_store is not None:
+        forecast_summary_dict = forecast_store.read(
+            config_dict.get("todays_date"), station, gas_type
+        )
+        if forecast_summary_dict is not None:
+            _keepForecast(
+                config_dict=config_dict,
+                station=station,
+                gas_type=gas_type,
+                forecast_summary_dict=forecast_summary_dict,
+                forecast_cache=forecast_cache,
+                refresher=_get_forecast_refresher(config_dict),
+            )
+
+    return forecast_summary_dict
+
+
+def countForecastView(config_dict: dict, station: str, gas_type: str) -> None:
+    """
+    A function counting a view of a forecast towards the popularity of the station and gas_type, which orders the recomputations after midnight.
+    It is called once per rendered forecast view, no matter whether the charts, the forecast or nothing was cached.
+    Only active if the forecast_refresh_workers are configured in the runtime_config.
+
+    Parameters:
+        config_dict (dict): A dictionary containing the app configuration.
+        station (str): The station of the forecast.
+        gas_type (str): The gas_type of the forecast.
+    """
+    refresher = _get_forecast_refresher(config_dict)
+    if refresher is not None:
+        refresher.count_view(station, gas_type)
+
+
+def peekStaleForecast(
+    config_dict: dict, station: str, gas_type: str, _forecaster: ForecasterPool
+) -> Optional[Tuple[date, Dict[str, pd.DataFrame]]]:
+    """
+    A function returning the forecast of a previous day while todays forecast is recomputed in the background (stale-while-revalidate).
+    The first stale request of a day also queues the recomputation of all other forecasts of the previous day, the most requested first, so that they are ready before they are requested.
+    Only active if the forecast_refresh_workers are configured in the runtime_config.
+
+    Parameters:
+        config_dict (dict): A dictionary containing the app configuration.
+        station (str): The station of the forecast.
+        gas_type (str): The gas_type of the forecast.
+        _forecaster (ForecasterPool): A pool of `Forecast` objects, the recomputations borrow at most forecast_refresh_workers of them.
+
+    Returns:
+        Optional[Tuple[date, Dict[str, pd.DataFrame]]]: The date and the result of `makeForecast` of the previous forecast, or None if there is none and todays forecast has to be awaited.
+    """
+    refresher = _get_forecast_refresher(config_dict)
+    if refresher is None:
+        return None
+
+    todays_date = config_dict.get("todays_date")
+    stale_forecast = refresher.stale(todays_date, station, gas_type)
+    if stale_forecast is None:
+        return None
+
+    # Resolve the caches in the script thread, the refresh workers have no streamlit context
+    forecast_cache, forecast_store = _get_forecast_caches(config_dict)
+
+    def make_refresh(station: str, gas_type: str) -> partial:
+        return partial(
+            _retrieveForecast,
+            config_dict=config_dict,
+            station=station,
+            gas_type=gas_type,
+            forecaster=_forecaster,
+            forecast_cache=forecast_cache,
+            forecast_store=forecast_store,
+            refresher=refresher,
+        )
+
+    with span("forecast", gas_type=gas_type, cache="stale"):
+        refresher.schedule(station, gas_type, make_refresh(station, gas_type))
+        refresher.schedule_outdated(todays_date, make_refresh)
+
+    return stale_forecast
+
+
+def submitForecast(
+    config_dict: dict,
+    station: str,
+    gas_type: str,
+    _forecaster: ForecasterPool,
+    _executor: Executor,
+) -> "Future[Dict[str, pd.DataFrame]]":
+    """
+    A function submitting `makeForecast` as a job to the _executor, so that the caller can render while the forecast is computed.
+
+    Parameters:
+        config_dict (dict): A dictionary containing the app configuration.
+        station (str): The station for which the forecast is made.
+        gas_type (str): The gas_type for which to make the price forecast.
+        _forecaster (ForecasterPool): A pool of `Forecast` objects.
+        _executor (Executor): The executor running the job.
+
+    Returns:
+        Future[Dict[str, pd.DataFrame]]: The future of the forecast. Cancelling it removes the job if it hasn't started yet.
+    """
+    # Resolve the caches in the script thread, the executor threads have no streamlit context
+    forecast_cache, forecast_store = _get_forecast_caches(config_dict)
+    return _executor.submit(
+        _retrieveForecast,
+        config_dict=config_dict,
+        station=station,
+        gas_type=gas_type,
+        forecaster=_forecaster,
+        forecast_cache=forecast_cache,
+        forecast_store=forecast_store,
+        refresher=_get_forecast_refresher(config_dict),
+    )
+
+
+def _get_forecast_caches(
+    config_dict: dict,
+) -> Tuple[ExpiringLRUCache, Optional[ForecastStore]]:
+    """A helper function providing the forecast cache and the forecast store configured in the runtime_config.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+
+    Returns:
+        Tuple[ExpiringLRUCache, Optional[ForecastStore]]: The forecast cache shared accross all sessions and the forecast store, which is None if no forecast_store_path is configured.
+    """
+    runtime_config = config_dict.get("runtime_config", {})
+    forecast_cache = create_forecast_cache(
+        max_entries=runtime_config.get("forecast_cache_max_entries", 1000),
+        ttl=runtime_config.get("forecast_cache_ttl"),
+    )
+    forecast_store = (
+        create_ForecastStore(store_path=runtime_config["forecast_store_path"])
+        if runtime_config.get("forecast_store_path")
+        else None
+    )
+
+    return forecast_cache, forecast_store
+
+
+def _get_forecast_refresher(config_dict: dict) -> Optional[ForecastRefresher]:
+    """A helper function providing the forecast refresher configured in the runtime_config.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+
+    Returns:
+        Optional[ForecastRefresher]: The refresher shared accross all sessions, or None if no forecast_refresh_workers are configured.
+    """
+    runtime_config = config_dict.get("runtime_config", {})
+    if not runtime_config.get("forecast_refresh_workers"):
+        return None
+
+    return create_ForecastRefresher(
+        max_workers=runtime_config["forecast_refresh_workers"],
+        max_entries=runtime_config.get("forecast_cache_max_entries", 1000),
+    )
+
+
+def _retrieveForecast(
+    config_dict: dict,
+    station: str,
+    gas_type: str,
+    forecaster: ForecasterPool,
+    forecast_cache: ExpiringLRUCache,
+    forecast_store: Optional[ForecastStore],
+    refresher: Optional[ForecastRefresher] = None,
+) -> Dict[str, pd.DataFrame]:
+    """A helper function returning a forecast from the forecast_cache or the forecast_store, or computing and caching it on a miss.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        station (str): The station for which the forecast is made.
+        gas_type (str): The gas_type for which to make the price forecast.
+        forecaster (ForecasterPool): A pool of `Forecast` objects.
+        forecast_cache (ExpiringLRUCache): The cache of the forecasts.
+        forecast_store (Optional[ForecastStore]): The store filled by the precompute job, or None.
+        refresher (Optional[ForecastRefresher], optional): The refresher keeping the forecast beyond midnight. Defaults to None.
+
+    Returns:
+        Dict[str, pd.DataFrame]: A dictionary mapping names to the different DataFrames resulting from the forecast.
+    """
+    cache_key = (config_dict.get("todays_date"), station, gas_type)
+    with span("forecast", gas_type=gas_type) as forecast_span:
+        forecast_summary_dict = forecast_cache.get(cache_key)
+        forecast_span.cache = "hit"
+        if forecast_summary_dict is None:
+            # Concurrent requests of the same forecast wait for a single store read or computation
+            (forecast_summary_dict, source), coalesced = _forecast_flight.do(
+                cache_key,
+                partial(
+                    _loadForecast,
+                    config_dict=config_dict,
+                    station=station,
+                    gas_type=gas_type,
+                    forecaster=forecaster,
+                    forecast_cache=forecast_cache,
+                    forecast_store=forecast_store,
+                    refresher=refresher,
+                ),
+            )
+            forecast_span.cache = "coalesced" if coalesced else source
+
+    return forecast_summary_dict
+
+
+def _loadForecast(
+    config_dict: dict,
+    station: str,
+    gas_type: str,
+    forecaster: ForecasterPool,
+    forecast_cache: ExpiringLRUCache,
+    forecast_store: Optional[ForecastStore],
+    refresher: Optional[ForecastRefresher] = None,
+) -> Tuple[Dict[str, pd.DataFrame], str]:
+    """A helper function reading a forecast from the forecast_store or computing it, and caching it.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        station (str): The station for which the forecast is made.
+        gas_type (str): The gas_type for which to make the price forecast.
+        forecaster (ForecasterPool): A pool of `Forecast` objects.
+        forecast_cache (ExpiringLRUCache): The cache of the forecasts.
+        forecast_store (Optional[ForecastStore]): The store filled by the precompute job, or None.
+        refresher (Optional[ForecastRefresher], optional): The refresher keeping the forecast beyond midnight. Defaults to None.
+
+    Returns:
+        Tuple[Dict[str, pd.DataFrame], str]: The forecast and its source, 'store' or 'miss' if it was computed.
+    """
+    source = "store"
+    forecast_summary_dict = (
+        forecast_store.read(config_dict.get("todays_date"), station, gas_type)
+        if forecast_store is not None
+        else None
+    )
+    if forecast_summary_dict is None:
+        source = "miss"
+        with forecaster.acquire() as borrowed_forecaster:
+            forecast_summary_dict = _computeForecast(
+                station=station, gas_type=gas_type, forecaster=borrowed_forecaster
+            )
+
+    _keepForecast(
+        config_dict=config_dict,
+        station=station,
+        gas_type=gas_type,
+        forecast_summary_dict=forecast_summary_dict,
+        forecast_cache=forecast_cache,
+        refresher=refresher,
+    )
+
+    return forecast_summary_dict, source
+
+
+def _keepForecast(
+    config_dict: dict,
+    station: str,
+    gas_type: str,
+    forecast_summary_dict: Dict[str, pd.DataFrame],
+    forecast_cache: ExpiringLRUCache,
+    refresher: Optional[ForecastRefresher],
+) -> None:
+    """A helper function caching a forecast read from the store or computed, and keeping it in the refresher beyond midnight.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        station (str): The station of the forecast.
+        gas_type (str): The gas_type of the forecast.
+        forecast_summary_dict (Dict[str, pd.DataFrame]): The result of `makeForecast`.
+        forecast_cache (ExpiringLRUCache): The cache of the forecasts.
+        refresher (Optional[ForecastRefresher]): The refresher keeping the forecast beyond midnight, or None.
+    """
+    todays_date = config_dict.get("todays_date")
+    forecast_cache.set((todays_date, station, gas_type), forecast_summary_dict)
+    if refresher is not None:
+        refresher.remember(todays_date, station, gas_type, forecast_summary_dict)
+
+
+def _computeForecast(
+    station: str, gas_type: str, forecaster: Forecast
+) -> Dict[str, pd.DataFrame]:
+    """A helper function computing the forecast and the summaries for a station and gas_type.
+
+    Args:
+        station (str): The station for which the forecast is made.
+        gas_type (str): The gas_type for which to make the price forecast.
+        forecaster (Forecast): An instance of the Forecast class used for forecasting.
+
+    Returns:
+        Dict[str, pd.DataFrame]: A dictionary mapping names to the different DataFrames resulting from the forecast.
+    """
+    # Use the forecaster to load the relevant df for station and gas_type
+    with span("forecast_load", gas_type=gas_type):
+        forecaster.load_df(station=station, sorte=gas_type)
+
+    with span("forecast_fit", gas_type=gas_type):
+        # Create the forecast
+        forecast_df = forecaster.create_forecast()
+        # Filter the df on the last and previous date
+        max_date_pre = forecast_df.query("is_last==0")["Day"].max()
+        forecast_df = forecast_df[
+            (forecast_df["is_last"] == 1) | (forecast_df["Day"] == max_date_pre)
+        ].copy()
+        # Fill the pred price with the actual price (for the previous date)
+        forecast_df["pred"] = forecast_df["pred"].fillna(forecast_df["price"])
+        # Filter relevant columns
+        forecast_df = forecast_df[["Day_Hours", "pred", "is_last", "hour_format"]]
+        # Add a space in front of the time_string to keep sortation by previous date and last date
+        forecast_df["hour_format"] = np.where(
+            forecast_df.is_last == 1,
+            forecast_df["hour_format"],
+            " " + forecast_df["hour_format"],
+        )
+
+    with span("forecast_summarize", gas_type=gas_type):
+        return {"forecast_df": forecast_df, **_summarize(forecaster)}
+
+
+def _summarize(forecaster: Forecast) -> Dict[str, pd.DataFrame]:
+    """A helper function computing the weekday, hour and trend summaries of the price history loaded by the forecaster.
+
+    If the forecaster exposes its loaded price history, the summaries are computed in a single pass by `_create_summaries`.
+    Since `Forecast.df` isn't a documented interface, the first single-pass summaries of a process are compared with `Forecast.create_summaries`, on a mismatch `Forecast.create_summaries` is used from then on.
+    The result of the check is recorded as summaries_parity_check span with the cache label 'match' or 'mismatch'.
+
+    Args:
+        forecaster (Forecast): An instance of the Forecast class after `load_df` was called.
+
+    Returns:
+        Dict[str, pd.DataFrame]: A dictionary with the summary_weekday_df, summary_hour_df and summary_trend_df.
+    """
+    global _single_pass_summaries
+    history_df = (
+        _get_history_df(forecaster) if _single_pass_summaries is not False else None
+    )
+    if history_df is None:
+        return _create_summaries_per_group(forecaster)
+
+    if _single_pass_summaries is None:
+        # Only the first forecast runs the check, concurrent forecasts wait for its result
+        with _single_pass_lock:
+            if _single_pass_summaries is None:
+                with span("summaries_parity_check") as check_span:
+                    summaries = _create_summaries(history_df)
+                    summaries_per_group = _create_summaries_per_group(forecaster)
+                    matched = _summaries_match(summaries, summaries_per_group)
+                    check_span.cache = "match" if matched else "mismatch"
+                _single_pass_summaries = matched
+                return summaries if matched else summaries_per_group
+
+        if not _single_pass_summaries:
+            return _create_summaries_per_group(forecaster)
+
+    return _create_summaries(history_df)
+
+
+def _create_summaries_per_group(forecaster: Forecast) -> Dict[str, pd.DataFrame]:
+    """A helper function computing the summaries with one `Forecast.create_summaries` call per summary.
+
+    Args:
+        forecaster (Forecast): An instance of the Forecast class after `load_df` was called.
+
+    Returns:
+        Dict[str, pd.DataFrame]: A dictionary with the summary_weekday_df, summary_hour_df and summary_trend_df.
+    """
     return {
-        "forecast_df": forecast_df,
-        "summary_weekday_df": _forecaster.create_summaries(
+        "summary_weekday_df": forecaster.create_summaries(
             groupCol="day_of_week", centralize_mean=True
         )
         .reset_index()
         .rename(columns={"price": "diff"}),
-        "summary_hour_df": _forecaster.create_summaries(
+        "summary_hour_df": forecaster.create_summaries(
             groupCol="hour_format", centralize_mean=True
         )
         .reset_index()
         .rename(columns={"price": "diff"}),
-        "summary_trend_df": _forecaster.create_summaries(
+        "summary_trend_df": forecaster.create_summaries(
             groupCol="week", centralize_mean=False
         ).reset_index(),
     }
 
 
+def _summaries_match(
+    summaries: Dict[str, pd.DataFrame], expected_summaries: Dict[str, pd.DataFrame]
+) -> bool:
+    """A helper function checking whether two sets of summaries have the same columns, groups and values.
+
+    Args:
+        summaries (Dict[str, pd.DataFrame]): The summaries to check, e.g. of `_create_summaries`.
+        expected_summaries (Dict[str, pd.DataFrame]): The expected summaries, e.g. of `_create_summaries_per_group`.
+
+    Returns:
+        bool: True if the group columns are equal and the values are close.
+    """
+    for name, expected_df in expected_summaries.items():
+        summary_df = summaries.get(name)
+        if (
+            summary_df is None
+            or list(summary_df.columns) != list(expected_df.columns)
+            or summary_df.iloc[:, 0].tolist() != expected_df.iloc[:, 0].tolist()
+            or not np.allclose(
+                summary_df.iloc[:, 1].to_numpy(dtype=float),
+                expected_df.iloc[:, 1].to_numpy(dtype=float),
+            )
+        ):
+            return False
+
+    return True
+
+
+def _get_history_df(forecaster: Forecast) -> Optional[pd.DataFrame]:
+    """A helper function returning the price history loaded by the forecaster, if it provides the columns needed for the summaries.
+
+    Args:
+        forecaster (Forecast): An instance of the Forecast class after `load_df` was called.
+
+    Returns:
+        Optional[pd.DataFrame]: The loaded df or None if the forecaster doesn't expose it.
+    """
+    history_df = getattr(forecaster, "df", None)
+    if isinstance(history_df, pd.DataFrame) and set(SUMMARY_COLUMNS).issubset(
+        history_df.columns
+    ):
+        return history_df
+
+    return None
+
+
+def _create_summaries(history_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """A helper function computing the weekday, hour and trend summaries in a single pass over the price history.
+
+    The prices are summed and counted once per (week, day_of_week, hour_format) cell, the three summaries are the marginal means of these cells.
+    The weekday and hour summaries are centralized on the mean of their group means, like `Forecast.create_summaries(centralize_mean=True)`.
+
+    Args:
+        history_df (pd.DataFrame): A df with the columns week, day_of_week, hour_format and price. Rows without a price are ignored.
+
+    Returns:
+        Dict[str, pd.DataFrame]: A dictionary with the summary_weekday_df, summary_hour_df and summary_trend_df in the shapes returned by `makeForecast`.
+    """
+    price = history_df["price"].to_numpy(dtype=float)
+    valid = ~np.isnan(price)
+    group_cols = ("week", "day_of_week", "hour_format")
+    # Map every group column to dense integer codes, sorted like a groupby
+    codes_uniques = [
+        pd.factorize(history_df[col].to_numpy()[valid], sort=True) for col in group_cols
+    ]
+    shape = tuple(len(uniques) for _, uniques in codes_uniques)
+    cells = np.ravel_multi_index(tuple(codes for codes, _ in codes_uniques), shape)
+    # The single pass: sum and count the prices per cell
+    sums = np.bincount(cells, weights=price[valid], minlength=int(np.prod(shape)))
+    counts = np.bincount(cells, minlength=int(np.prod(shape)))
+    sums, counts = sums.reshape(shape), counts.reshape(shape)
+
+    summaries = {}
+    for axis, (col, name, value_col, centralize_mean) in enumerate(
+        (
+            ("week", "summary_trend_df", "price", False),
+            ("day_of_week", "summary_weekday_df", "diff", True),
+            ("hour_format", "summary_hour_df", "diff", True),
+        )
+    ):
+        other_axes = tuple(a for a in range(len(group_cols)) if a != axis)
+        means = sums.sum(axis=other_axes) / counts.sum(axis=other_axes)
+        if centralize_mean:
+            means = means - means.mean()
+        summaries[name] = pd.DataFrame({col: codes_uniques[axis][1], value_col: means})
+
+    return summaries
+
+
+def getMap(
+    config_dict: dict,
+    last_week: str,
+    gas_type: str,
+    _files_oci_connection: FilesOCI,
+    _map_cache: Optional[CompressedMapCache] = None,
+) -> str:
+    """
+    A function retrieving the HTML map of a gas_type for the last_week.
+    Every map is cached on its own and gzip-compressed in a cache shared accross all sessions, which only keeps the maps of the current week.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration. The size limit of the map cache is read from the runtime_config.
+        last_week (str): The week for which to retrieve the map.
+        gas_type (str): The gas_type of the map, i.e. 'e5', 'e10' or 'diesel'.
+        _files_oci_connection (FilesOCI): An instance of the FilesOCI connection.
+        _map_cache (Optional[CompressedMapCache], optional): The map cache of the current `DataSnapshot`. Defaults to None, i.e. the map cache configured in the runtime_config.
+
+    Returns:
+        str: The decoded HTML of the map.
+    """
+    return _retrieveMap(
+        config_dict=config_dict,
+        last_week=last_week,
+        gas_type=gas_type,
+        files_oci_connection=_files_oci_connection,
+        map_cache=_get_map_cache(config_dict, map_cache=_map_cache),
+    )
+
+
+def _get_map_cache(
+    config_dict: dict, map_cache: Optional[CompressedMapCache] = None
+) -> CompressedMapCache:
+    """A helper function providing the map cache configured in the runtime_config.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        map_cache (Optional[CompressedMapCache], optional): A map cache which is returned if given, e.g. the one of a `DataSnapshot`. Defaults to None.
+
+    Returns:
+        CompressedMapCache: The map cache shared accross all sessions.
+    """
+    if map_cache is not None:
+        return map_cache
+
+    return create_map_cache(
+        max_bytes=config_dict.get("runtime_config", {}).get(
+            "map_cache_max_bytes", 50_000_000
+        )
+    )
+
+
+def _map_file_name(config_dict: dict, last_week: str, gas_type: str) -> str:
+    """A helper function returning the object name of a map.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        last_week (str): The week of the map.
+        gas_type (str): The gas_type of the map.
+
+    Returns:
+        str: The path of the map in the object storage.
+    """
+    return f"{config_dict.get('map_config', {}).get('map_path', '')}/Map_{gas_type}_{last_week}.html"
+
+
+def _retrieveMap(
+    config_dict: dict,
+    last_week: str,
+    gas_type: str,
+    files_oci_connection: FilesOCI,
+    map_cache: CompressedMapCache,
+) -> str:
+    """A helper function returning a map from the map_cache or retrieving and caching it on a miss.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        last_week (str): The week for which to retrieve the map.
+        gas_type (str): The gas_type of the map, i.e. 'e5', 'e10' or 'diesel'.
+        files_oci_connection (FilesOCI): An instance of the FilesOCI connection.
+        map_cache (CompressedMapCache): The cache of the maps.
+
+    Returns:
+        str: The decoded HTML of the map.
+    """
+    with span("map_fetch", gas_type=gas_type, cache="hit") as map_span:
+        map_html = map_cache.get(last_week, gas_type)
+        if map_html is None:
+            file_name = _map_file_name(config_dict, last_week, gas_type)
+            # Concurrent requests of the same map, e.g. by getMapDict and the prefetch thread, wait for a single download
+            map_html, coalesced = _map_flight.do(
+                file_name,
+                partial(
+                    files_oci_connection.retrieve_file_content,
+                    file_name=file_name,
+                    decode=True,
+                ),
+            )
+            map_span.cache = "coalesced" if coalesced else "miss"
+            map_cache.set(last_week, gas_type, map_html)
+
+    return map_html
+
+
 @st.cache_resource  # This caches accross all sessions
+def getMapURL(
+    config_dict: dict,
+    last_week: str,
+    gas_type: str,
+    _files_oci_connection: FilesOCI,
+    _map_asset_server: MapAssetServer,
+    map_version: str = "",
+    _map_cache: Optional[CompressedMapCache] = None,
+) -> str:
+    """
+    A function publishing the HTML map of a gas_type for the last_week as a static file and returning its URL.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration. Streamlit caches this function based on the config dict. Since the date is in the config dict, this function is also cached on the date.
+        last_week (str): The week for which to retrieve the map.
+        gas_type (str): The gas_type of the map, i.e. 'e5', 'e10' or 'diesel'.
+        _files_oci_connection (FilesOCI): An instance of the FilesOCI connection. Streamlit doesn't evaluate this argument for caching.
+        _map_asset_server (MapAssetServer): The server serving the static maps. Streamlit doesn't evaluate this argument for caching.
+        map_version (str, optional): The `DataSnapshot.map_version`, so that a changed map is published again. Defaults to "".
+        _map_cache (Optional[CompressedMapCache], optional): The map cache of the current `DataSnapshot`. Defaults to None, i.e. the map cache configured in the runtime_config.
+
+    Returns:
+        str: The URL under which browsers can retrieve the map.
+    """
+    return _map_asset_server.publish(
+        name=f"Map_{gas_type}_{last_week}",
+        supersedes_prefix=f"Map_{gas_type}_",
+        map_html=getMap(
+            config_dict=config_dict,
+            last_week=last_week,
+            gas_type=gas_type,
+            _files_oci_connection=_files_oci_connection,
+            _map_cache=_map_cache,
+        ),
+    )
+
+
 def getMapDict(
-    config_dict: dict, last_week: str, _files_oci_connection: FilesOCI
+    config_dict: dict,
+    last_week: str,
+    _files_oci_connection: FilesOCI,
+    _map_cache: Optional[CompressedMapCache] = None,
 ) -> dict:
-    """_summary_
+    """
+    A function retrieving the HTML maps of all gas_types for the last_week.
 
     Args:
-        config_dict (dict): _description_
-        last_week (str): _description_
-        _files_oci_connection (FilesOCI): _description_
+        config_dict (dict): A dictionary containing the app configuration.
+        last_week (str): The week for which to retrieve the maps.
+        _files_oci_connection (FilesOCI): An instance of the FilesOCI connection.
+        _map_cache (Optional[CompressedMapCache], optional): The map cache of the current `DataSnapshot`. Defaults to None, i.e. the map cache configured in the runtime_config.
 
     Returns:
-        dict: _description_
+        dict: A dictionary mapping the gas_types to the decoded HTML of their maps.
+    """
+    return {
+        gas_type: getMap(
+            config_dict=config_dict,
+            last_week=last_week,
+            gas_type=gas_type,
+            _files_oci_connection=_files_oci_connection,
+            _map_cache=_map_cache,
+        )
+        for gas_type in GAS_TYPES
+    }
+
+
+def prefetchMaps(
+    config_dict: dict,
+    last_week: str,
+    gas_types: Iterable[str],
+    _files_oci_connection: FilesOCI,
+    _map_cache: Optional[CompressedMapCache] = None,
+) -> None:
+    """
+    A function retrieving the HTML maps of the given gas_types in a background thread, so that they are cached when they are selected.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        last_week (str): The week for which to retrieve the maps.
+        gas_types (Iterable[str]): The gas_types of the maps to retrieve.
+        _files_oci_connection (FilesOCI): An instance of the FilesOCI connection.
+        _map_cache (Optional[CompressedMapCache], optional): The map cache of the current `DataSnapshot`. Defaults to None, i.e. the map cache configured in the runtime_config.
     """
-    mapDict = {}
-    for gas_type in ("e5", "e10", "diesel"):
-        mapDict[gas_type] = _files_oci_connection.retrieve_file_content(
-            file_name=f"{config_dict.get('map_config', {}).get('map_path', '')}/Map_{gas_type}_{last_week}.html",
-            decode=True,
+    # Resolve the cache in the script thread, the prefetch thread has no streamlit context
+    map_cache = _get_map_cache(config_dict, map_cache=_map_cache)
+    for gas_type in gas_types:
+        prefetch_key = (last_week, gas_type)
+        with _prefetch_lock:
+            if prefetch_key in _prefetched_maps or prefetch_key in map_cache:
+                continue
+            _prefetched_maps.add(prefetch_key)
+
+        _prefetch_executor.submit(
+            _prefetchMap,
+            config_dict=config_dict,
+            last_week=last_week,
+            gas_type=gas_type,
+            files_oci_connection=_files_oci_connection,
+            map_cache=map_cache,
         )
 
-    return mapDict
+
+def _prefetchMap(
+    config_dict: dict,
+    last_week: str,
+    gas_type: str,
+    files_oci_connection: FilesOCI,
+    map_cache: CompressedMapCache,
+) -> None:
+    """A helper function retrieving a map into the map_cache in the prefetch thread.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        last_week (str): The week for which to retrieve the map.
+        gas_type (str): The gas_type of the map, i.e. 'e5', 'e10' or 'diesel'.
+        files_oci_connection (FilesOCI): An instance of the FilesOCI connection.
+        map_cache (CompressedMapCache): The cache of the maps.
+    """
+    try:
+        _retrieveMap(
+            config_dict=config_dict,
+            last_week=last_week,
+            gas_type=gas_type,
+            files_oci_connection=files_oci_connection,
+            map_cache=map_cache,
+        )
+    finally:
+        with _prefetch_lock:
+            _prefetched_maps.discard((last_week, gas_type))
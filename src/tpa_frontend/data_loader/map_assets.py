@@ -0,0 +1,142 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from typing import Union
+
+
+# The file names written by `MapAssetServer.publish`, e.g. "Map_e5_2024_41.0123456789abcdef.html"
+HASHED_FILE_NAME = re.compile(r"^(?P<name>[^/]+)\.[0-9a-f]{16}\.html$")
+
+
+class _CachingRequestHandler(SimpleHTTPRequestHandler):
+    """A request handler serving files from a directory, which allows browsers to cache the content-hashed files forever.
+
+    This is safe because the file names contain the hash of their content. Errors and other files aren't cached and directories aren't listed.
+    """
+
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        self._status_code = code
+        super().send_response(code, message)
+
+    def end_headers(self) -> None:
+        if getattr(self, "_status_code", None) == 200 and HASHED_FILE_NAME.match(
+            self.path.split("?")[0].lstrip("/")
+        ):
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            self.send_header("Access-Control-Allow-Origin", "*")
+        super().end_headers()
+
+    def list_directory(self, path: str) -> None:
+        self.send_error(404)
+        return None
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class MapAssetServer:
+    """Writes the HTML maps as static files with content-hash names and serves them via a small local HTTP server.
+
+    The maps page embeds the maps by URL, so each browser retrieves a map once and caches it, instead of receiving the full HTML on every rerun.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        host: str = "127.0.0.1",
+        port: int = 8502,
+        public_url: Optional[str] = None,
+    ) -> None:
+        """Initializes the server without starting it.
+
+        Args:
+            directory (Union[str, Path]): The directory to which the maps are written and from which they are served.
+            host (str, optional): The host the HTTP server binds to. Defaults to "127.0.0.1".
+            port (int, optional): The port the HTTP server binds to. Defaults to 8502.
+            public_url (Optional[str], optional): The base URL under which browsers reach the served directory, e.g. behind a proxy. Defaults to None, i.e. http://<host>:<port>.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.host = host
+        self.port = port
+        self._public_url = public_url
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> None:
+        """Starts the HTTP server in a daemon thread.
+
+        If the port is already in use, another app process on this host is assumed to serve the same directory.
+        """
+        try:
+            self._httpd = ThreadingHTTPServer(
+                (self.host, self.port),
+                partial(_CachingRequestHandler, directory=str(self.directory)),
+            )
+        except OSError as e:
+            print(f"Not starting the map asset server on port {self.port}: {e}")
+            return
+
+        # Port 0 lets the OS choose a free port
+        self.port = self._httpd.server_address[1]
+        threading.Thread(
+            target=self._httpd.serve_forever, name="map_asset_server", daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        """Stops the HTTP server if it was started by this instance."""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    @property
+    def public_url(self) -> str:
+        """The base URL under which browsers reach the served directory."""
+        return (self._public_url or f"http://{self.host}:{self.port}").rstrip("/")
+
+    def publish(
+        self, name: str, map_html: str, supersedes_prefix: Optional[str] = None
+    ) -> str:
+        """Writes a map to the served directory under a content-hash file name and returns its URL.
+
+        Args:
+            name (str): The name of the map, e.g. "Map_e5_2024_41".
+            map_html (str): The decoded HTML of the map.
+            supersedes_prefix (Optional[str], optional): The prefix of the maps replaced by this one, e.g. "Map_e5_" for the maps of the previous weeks. Their files, including older versions of this map, are removed. Defaults to None, i.e. no files are removed.
+
+        Returns:
+            str: The URL under which browsers can retrieve the map.
+        """
+        content = map_html.encode("utf-8")
+        file_name = f"{name}.{hashlib.sha256(content).hexdigest()[:16]}.html"
+        file_path = self.directory / file_name
+        if not file_path.exists():
+            # Write to a temporary file first, so that the server never serves a partial map
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{name}-")
+            with os.fdopen(fd, "wb") as file:
+                file.write(content)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, file_path)
+            if supersedes_prefix is not None:
+                self._prune(supersedes_prefix, keep=file_name)
+
+        return f"{self.public_url}/{file_name}"
+
+    def _prune(self, prefix: str, keep: str) -> None:
+        """Removes the published maps whose names start with the prefix, except one file.
+
+        Args:
+            prefix (str): The prefix of the names of the superseded maps.
+            keep (str): The file name to keep, i.e. the current map.
+        """
+        for file_path in self.directory.glob(f"{prefix}*.html"):
+            if file_path.name != keep and HASHED_FILE_NAME.match(file_path.name):
+                # Another app process may have removed it already
+                file_path.unlink(missing_ok=True)
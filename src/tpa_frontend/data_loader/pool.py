@@ -0,0 +1,83 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable
+from typing import Iterator
+from typing import List
+
+from tpa_analytics_engine.api import Forecast
+
+
+class ForecasterPool:
+    """A bounded pool of `Forecast` instances.
+
+    A `Forecast` keeps the loaded station in its internal state, so an instance must only be used by one thread at a time.
+    The pool hands out one instance per call and creates new instances lazily until `size` is reached, afterwards callers wait for a free instance.
+    """
+
+    def __init__(self, factory: Callable[[], Forecast], size: int) -> None:
+        """Initializes an empty pool.
+
+        Args:
+            factory (Callable[[], Forecast]): A function creating a new `Forecast` instance.
+            size (int): The maximal number of `Forecast` instances, i.e. the maximal number of parallel forecasts.
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+
+        self.size = size
+        self._factory = factory
+        self._idle: List[Forecast] = []
+        self._created = 0
+        # Guards the idle instances and the number of created instances, waiters are woken on every release and failed creation
+        self._condition = threading.Condition()
+
+    def _get(self) -> Forecast:
+        """Returns an idle instance, creates a new one if the pool is not full yet or waits for an instance to be released.
+
+        If the creation of an instance fails, a waiting caller is woken to create it instead.
+
+        Returns:
+            Forecast: An instance which is exclusively used by the caller.
+        """
+        with self._condition:
+            while not self._idle and self._created >= self.size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+
+        try:
+            return self._factory()
+        except BaseException:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, forecaster: Forecast) -> None:
+        """Returns an instance to the pool and wakes a waiting caller.
+
+        Args:
+            forecaster (Forecast): The instance returned by `_get`.
+        """
+        with self._condition:
+            self._idle.append(forecaster)
+            self._condition.notify()
+
+    @contextmanager
+    def acquire(self) -> Iterator[Forecast]:
+        """A context manager lending a `Forecast` instance exclusively to the caller.
+
+        Yields:
+            Iterator[Forecast]: An instance which is returned to the pool when the context is left.
+        """
+        forecaster = self._get()
+        try:
+            yield forecaster
+        finally:
+            self._release(forecaster)
+
+    @property
+    def created(self) -> int:
+        """The number of `Forecast` instances created so far."""
+        return self._created
@@ -0,0 +1,163 @@
+import argparse
+import os
+import time
+from concurrent.futures import as_completed
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from datetime import timedelta
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from cloud_storage_wrapper.oci_access.pandas import create_PandasOCI_from_dict
+from tpa_analytics_engine.api import Forecast
+from tpa_frontend.config_handler.load_configs import _read_config_dict
+from tpa_frontend.data_loader.load import _computeForecast
+from tpa_frontend.data_loader.load import GAS_TYPES
+from tpa_frontend.data_loader.load import _createBaseDFs
+from tpa_frontend.data_loader.store import ForecastStore
+
+# The Forecast object of a worker process, it is created once per process by _init_worker
+_worker_forecaster: Optional[Forecast] = None
+_worker_store: Optional[ForecastStore] = None
+
+
+def _init_worker(config_path: str, store_path: str) -> None:
+    """Initializes a worker process with its own `Forecast` object and store.
+
+    Args:
+        config_path (str): The path to the config file.
+        store_path (str): The root directory of the forecast store.
+    """
+    global _worker_forecaster, _worker_store
+    _worker_forecaster = Forecast(config_path=config_path)
+    _worker_store = ForecastStore(root=store_path)
+
+
+def _precompute_one(
+    todays_date: date, station: str, gas_type: str
+) -> Tuple[str, str, Optional[str]]:
+    """Computes the forecast for one station and gas_type in a worker process and writes it to the store.
+
+    Args:
+        todays_date (date): The date for which the forecast is made.
+        station (str): The station for which the forecast is made.
+        gas_type (str): The gas_type for which to make the price forecast.
+
+    Returns:
+        Tuple[str, str, Optional[str]]: The station, the gas_type and an error message or None if the forecast was stored.
+    """
+    try:
+        forecast_summary_dict = _computeForecast(
+            station=station, gas_type=gas_type, forecaster=_worker_forecaster  # type: ignore
+        )
+        _worker_store.write(todays_date, station, gas_type, forecast_summary_dict)  # type: ignore
+    except Exception as e:
+        return station, gas_type, f"{type(e).__name__}: {e}"
+
+    return station, gas_type, None
+
+
+def precompute_forecasts(
+    config_dict: dict,
+    config_path: str,
+    stations: Iterable[str],
+    gas_types: Iterable[str] = GAS_TYPES,
+    max_workers: Optional[int] = None,
+) -> List[Tuple[str, str, str]]:
+    """Computes the forecasts for all combinations of stations and gas_types on a process pool and writes them to the forecast store.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration, the forecasts are stored under its todays_date.
+        config_path (str): The path to the config file, used to create the `Forecast` object of each worker process.
+        stations (Iterable[str]): The short_ids of the stations.
+        gas_types (Iterable[str], optional): The gas_types. Defaults to ("e5", "e10", "diesel").
+        max_workers (Optional[int], optional): The number of worker processes. Defaults to None, i.e. the number of CPUs.
+
+    Returns:
+        List[Tuple[str, str, str]]: The station, gas_type and error message of every failed forecast.
+    """
+    todays_date = config_dict["todays_date"]
+    store_path = config_dict.get("runtime_config", {}).get(
+        "forecast_store_path", "forecast_store"
+    )
+    jobs = [(station, gas_type) for station in stations for gas_type in gas_types]
+    failed = []
+
+    start = time.time()
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(config_path, store_path),
+    ) as executor:
+        futures = [
+            executor.submit(_precompute_one, todays_date, station, gas_type)
+            for station, gas_type in jobs
+        ]
+        for i, future in enumerate(as_completed(futures), start=1):
+            station, gas_type, error = future.result()
+            if error is not None:
+                failed.append((station, gas_type, error))
+            if i % 500 == 0 or i == len(jobs):
+                print(f"Precomputed {i}/{len(jobs)} forecasts in ", time.time() - start)
+
+    return failed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """The command line entry point of the nightly precompute job.
+
+    Args:
+        argv (Optional[List[str]], optional): The command line arguments. Defaults to None, i.e. sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        description="Precompute the forecasts of all stations in station_info_30 and write them to the forecast store."
+    )
+    parser.add_argument(
+        "--config-path", default=os.getenv("CONFIG_PATH", "configs/config.yaml")
+    )
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--gas-types", nargs="+", default=list(GAS_TYPES))
+    parser.add_argument(
+        "--keep-days",
+        type=int,
+        default=1,
+        help="The number of days whose forecasts are kept in the store, including today.",
+    )
+    args = parser.parse_args(argv)
+
+    # The job runs outside of streamlit, so the uncached builders are used
+    # The forecasts are always computed on the current data, so they are stored under todays date only
+    todays_date = date.today()
+    config_dict = _read_config_dict(
+        todays_date=todays_date, config_path=args.config_path
+    )
+    base_df_dict = _createBaseDFs(
+        config_dict=config_dict,
+        pandas_connection=create_PandasOCI_from_dict(configDict=config_dict),
+    )
+    stations = base_df_dict["station_info_30"]["short_id"].astype(str).tolist()
+
+    failed = precompute_forecasts(
+        config_dict=config_dict,
+        config_path=args.config_path,
+        stations=stations,
+        gas_types=args.gas_types,
+        max_workers=args.max_workers,
+    )
+    print(f"Failed forecasts: {len(failed)}")
+    for station, gas_type, error in failed:
+        print(f"{station} {gas_type}: {error}")
+
+    store = ForecastStore(
+        root=config_dict.get("runtime_config", {}).get(
+            "forecast_store_path", "forecast_store"
+        )
+    )
+    deleted = store.prune(keep_after=todays_date - timedelta(days=args.keep_days))
+    print(f"Deleted the forecasts of {deleted} old dates")
+
+
+if __name__ == "__main__":
+    main()
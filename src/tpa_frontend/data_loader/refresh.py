@@ -0,0 +1,238 @@
+import heapq
+import itertools
+import threading
+from collections import Counter
+from collections import OrderedDict
+from datetime import date
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import pandas as pd
+from tpa_frontend.monitoring.metrics import span
+
+ForecastKey = Tuple[str, str]
+
+
+class ForecastRefresher:
+    """Keeps the latest forecast of every station and gas_type beyond midnight and recomputes outdated forecasts in the background, the most requested first.
+
+    At the day rollover all forecasts in the forecast cache expire at once. Instead of letting the first users wait for new forecasts, they are served the forecast of the previous day while a few workers recompute them, so that the forecaster pool isn't flooded.
+    """
+
+    def __init__(self, max_workers: int = 1, max_entries: int = 1000) -> None:
+        """Initializes the refresher without starting its workers.
+
+        Args:
+            max_workers (int, optional): The number of forecasts recomputed in parallel, each borrows one forecaster of the pool. Defaults to 1.
+            max_entries (int, optional): The maximal number of forecasts kept, the least recently kept is dropped first. Defaults to 1000.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self._latest: OrderedDict = OrderedDict()
+        # The views since the last date change, see `schedule_outdated`
+        self._popularity: Counter = Counter()
+        # A heap of (-popularity, sequence, key), a key scheduled again is pushed again with its new popularity
+        self._queue: List[Tuple[int, int, ForecastKey]] = []
+        self._jobs: Dict[ForecastKey, Callable[[], object]] = {}
+        self._sequence = itertools.count()
+        self._running: Set[ForecastKey] = set()
+        self._refreshed_date: Optional[date] = None
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def remember(
+        self,
+        todays_date: date,
+        station: str,
+        gas_type: str,
+        forecast_summary_dict: Dict[str, pd.DataFrame],
+    ) -> None:
+        """Keeps a forecast, so that it can be served stale after midnight. A newer forecast of the same key is kept instead of an older one.
+
+        Args:
+            todays_date (date): The date of the forecast.
+            station (str): The station of the forecast.
+            gas_type (str): The gas_type of the forecast.
+            forecast_summary_dict (Dict[str, pd.DataFrame]): The result of `makeForecast`.
+        """
+        key = (station, gas_type)
+        with self._condition:
+            latest = self._latest.get(key)
+            if latest is None or latest[0] <= todays_date:
+                self._latest[key] = (todays_date, forecast_summary_dict)
+            self._latest.move_to_end(key)
+            while len(self._latest) > self.max_entries:
+                self._latest.popitem(last=False)
+
+    def count_view(self, station: str, gas_type: str) -> None:
+        """Counts a view of a forecast towards the popularity of the station and gas_type, which orders the recomputations.
+
+        Args:
+            station (str): The station of the forecast.
+            gas_type (str): The gas_type of the forecast.
+        """
+        with self._condition:
+            self._popularity[(station, gas_type)] += 1
+
+    def stale(
+        self, todays_date: date, station: str, gas_type: str
+    ) -> Optional[Tuple[date, Dict[str, pd.DataFrame]]]:
+        """Returns the latest forecast of a station and gas_type if it is from a previous day.
+
+        Args:
+            todays_date (date): The current date.
+            station (str): The station of the forecast.
+            gas_type (str): The gas_type of the forecast.
+
+        Returns:
+            Optional[Tuple[date, Dict[str, pd.DataFrame]]]: The date and the result of `makeForecast`, or None if no previous forecast is kept.
+        """
+        with self._condition:
+            latest = self._latest.get((station, gas_type))
+            if latest is None or latest[0] >= todays_date:
+                return None
+
+            self.stale_hits += 1
+            return latest
+
+    def schedule(
+        self,
+        station: str,
+        gas_type: str,
+        refresh: Callable[[], object],
+        popularity: Optional[int] = None,
+    ) -> None:
+        """Queues the recomputation of a forecast, the queue is ordered by the popularity of the station and gas_type.
+
+        Args:
+            station (str): The station of the forecast.
+            gas_type (str): The gas_type of the forecast.
+            refresh (Callable[[], object]): The function recomputing the forecast, it replaces a queued function of the same key.
+            popularity (Optional[int], optional): The popularity to queue the recomputation with. Defaults to None, i.e. the views counted since the last date change.
+        """
+        key = (station, gas_type)
+        with self._condition:
+            if popularity is None:
+                popularity = self._popularity[key]
+            self._jobs[key] = refresh
+            heapq.heappush(self._queue, (-popularity, next(self._sequence), key))
+            self._start_workers()
+            self._condition.notify_all()
+
+    def schedule_outdated(
+        self,
+        todays_date: date,
+        make_refresh: Callable[[str, str], Callable[[], object]],
+    ) -> int:
+        """Queues the recomputation of all kept forecasts of previous days, once per date. Forecasts already queued or recomputed are skipped.
+
+        The recomputations are ordered by the views counted until now, afterwards the views of the new date are counted from zero, so that the popularity only reflects recent views and doesn't grow without bound.
+
+        Args:
+            todays_date (date): The current date.
+            make_refresh (Callable[[str, str], Callable[[], object]]): A function returning the refresh function of a station and gas_type.
+
+        Returns:
+            int: The number of queued forecasts, 0 if they were already queued for this date.
+        """
+        with self._condition:
+            if self._refreshed_date == todays_date:
+                return 0
+            self._refreshed_date = todays_date
+            popularity, self._popularity = self._popularity, Counter()
+            outdated_keys = [
+                key
+                for key, (forecast_date, _) in self._latest.items()
+                if forecast_date < todays_date
+                and key not in self._jobs
+                and key not in self._running
+            ]
+
+        for station, gas_type in outdated_keys:
+            self.schedule(
+                station,
+                gas_type,
+                make_refresh(station, gas_type),
+                popularity=popularity[(station, gas_type)],
+            )
+
+        return len(outdated_keys)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits until all queued forecasts are recomputed.
+
+        Args:
+            timeout (Optional[float], optional): The maximal time to wait in seconds. Defaults to None, i.e. no limit.
+
+        Returns:
+            bool: True if the queue is empty and no recomputation is running, False on timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._jobs and not self._running, timeout=timeout
+            )
+
+    def _start_workers(self) -> None:
+        """Starts the worker threads on first use, the caller holds the condition."""
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._run,
+                name=f"forecast_refresher_{len(self._threads)}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _run(self) -> None:
+        """Recomputes the queued forecasts, the most popular first."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: bool(self._queue))
+                _, _, key = heapq.heappop(self._queue)
+                # A key scheduled several times is in the heap several times, but only has one job
+                refresh = self._jobs.pop(key, None)
+                if refresh is None:
+                    continue
+                self._running.add(key)
+
+            succeeded = False
+            with span("forecast_refresh", gas_type=key[1]) as refresh_span:
+                try:
+                    refresh()
+                    succeeded = True
+                except Exception:
+                    # The stale forecast is kept and served until a later refresh succeeds
+                    refresh_span.cache = "failed"
+                finally:
+                    with self._condition:
+                        if succeeded:
+                            self.refreshes += 1
+                        else:
+                            self.failed_refreshes += 1
+                        self._running.discard(key)
+                        self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """Returns the number of kept and queued forecasts and the counters of the refresher.
+
+        Returns:
+            dict: The entries, queued, stale_hits, refreshes and failed_refreshes.
+        """
+        with self._condition:
+            return {
+                "entries": len(self._latest),
+                "queued": len(self._jobs),
+                "stale_hits": self.stale_hits,
+                "refreshes": self.refreshes,
+                "failed_refreshes": self.failed_refreshes,
+            }
@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import Future
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Tuple
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one call, e.g. many sessions requesting the same forecast right after the cache expired.
+
+    The first caller of a key runs the function, callers arriving while it runs wait for its result instead of running the function again.
+    The flight counts the calls which ran and the calls which were coalesced, i.e. the duplicate computations avoided.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a flight without running calls."""
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._running: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Runs the function unless a call with the same key is running, whose result is returned instead.
+
+        Args:
+            key (Hashable): The key identifying identical calls.
+            function (Callable[[], Any]): The function to run, an exception is raised to all waiting callers.
+
+        Returns:
+            Tuple[Any, bool]: The result of the function and whether it was shared with a running call.
+        """
+        with self._lock:
+            future = self._running.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._running[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            return future.result(), True
+
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._running[key]
+
+    def stats(self) -> dict:
+        """Returns the counters of the flight.
+
+        Returns:
+            dict: The number of calls which ran, which were coalesced and which are running.
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "running": len(self._running),
+            }
@@ -0,0 +1,295 @@
+import difflib
+import re
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+# The mean earth radius in km
+EARTH_RADIUS_KM = 6371.0088
+# A German postcode, or a "lat, lon" pair
+_POST_CODE_PATTERN = re.compile(r"^\d{5}$")
+_COORDINATES_PATTERN = re.compile(
+    r"^\s*([-+]?\d{1,2}(?:\.\d+)?)\s*[,;\s]\s*([-+]?\d{1,3}(?:\.\d+)?)\s*$"
+)
+
+
+class StationIndex:
+    """A lookup index over the station names, built once per data refresh and shared accross all sessions.
+
+    It maps the station IDs to their names and labels and keeps the lower-cased names sorted, so that the station selector can be filtered on the server instead of sending all names to the browser on every rerun.
+    Stations are identified by their IDs, since several stations can have the same name.
+    """
+
+    def __init__(
+        self, station_df: pd.DataFrame, address_cols: Sequence[str] = ()
+    ) -> None:
+        """Builds the index from a station_info df.
+
+        Args:
+            station_df (pd.DataFrame): A df with the columns Tankstellen_Name and short_id.
+            address_cols (Sequence[str], optional): The columns of the address shown next to the station names, missing columns are skipped. Defaults to ().
+        """
+        station_df = station_df.drop_duplicates(subset="short_id", keep="last")
+        self.id_to_name: Dict[str, str] = dict(
+            zip(station_df["short_id"], station_df["Tankstellen_Name"])
+        )
+        self.name_to_ids: Dict[str, Tuple[str, ...]] = {}
+        for short_id, name in self.id_to_name.items():
+            self.name_to_ids[name] = self.name_to_ids.get(name, ()) + (short_id,)
+        # The labels shown in the station selector, the address tells stations of the same name apart
+        address_cols = [col for col in address_cols if col in station_df.columns]
+        addresses = (
+            [
+                " ".join(str(part) for part in row if pd.notna(part))
+                for row in station_df[address_cols].itertuples(index=False, name=None)
+            ]
+            if address_cols
+            else [""] * len(station_df)
+        )
+        self.id_to_label: Dict[str, str] = {
+            short_id: f"{name}, {address}" if address else name
+            for short_id, name, address in zip(
+                station_df["short_id"], station_df["Tankstellen_Name"], addresses
+            )
+        }
+        # The labels also name the compared stations in the comparison chart, so they have to be unique
+        label_counts = Counter(self.id_to_label.values())
+        for short_id, label in self.id_to_label.items():
+            if label_counts[label] > 1:
+                self.id_to_label[short_id] = f"{label} ({short_id})"
+        # The names in the order of the df, which is the order shown without a query
+        self.names: Tuple[str, ...] = tuple(self.name_to_ids)
+        # The lower-cased names and the names sorted by them, for the prefix search
+        sorted_pairs = sorted((name.lower(), name) for name in self.names)
+        self.sorted_keys: Tuple[str, ...] = tuple(key for key, _ in sorted_pairs)
+        self.sorted_names: Tuple[str, ...] = tuple(name for _, name in sorted_pairs)
+        # Reruns repeat the same queries, so the results are cached per index
+        self._search = lru_cache(maxsize=1024)(self._search_uncached)
+
+    def __len__(self) -> int:
+        return len(self.id_to_name)
+
+    def __contains__(self, short_id: object) -> bool:
+        return short_id in self.id_to_name
+
+    def get_id(self, name: Optional[str]) -> Optional[str]:
+        """Returns the ID of a station by name.
+
+        Args:
+            name (Optional[str]): The name of the station.
+
+        Returns:
+            Optional[str]: The short_id of the station or None if the name is unknown. If several stations have the name, the last one in the df.
+        """
+        return self.name_to_ids.get(name, (None,))[-1] if name is not None else None
+
+    def get_ids(self, names: Iterable[str]) -> List[str]:
+        """Returns the IDs of all stations with the given names.
+
+        Args:
+            names (Iterable[str]): The names of the stations, e.g. the result of `search`.
+
+        Returns:
+            List[str]: The short_ids in the order of the names, stations of the same name in the order of the df.
+        """
+        return [
+            short_id for name in names for short_id in self.name_to_ids.get(name, ())
+        ]
+
+    def label(self, short_id: Optional[str]) -> str:
+        """Returns the label of a station shown in the station selector.
+
+        Args:
+            short_id (Optional[str]): The ID of the station.
+
+        Returns:
+            str: The name and address of the station, unique within the index, or the ID if it is unknown.
+        """
+        return self.id_to_label.get(short_id, str(short_id))  # type: ignore
+
+    def search(self, query: Optional[str], limit: int = 50) -> List[str]:
+        """Returns the station names matching a query.
+
+        Names starting with the query come first, followed by names containing it. If that yields fewer than `limit` names, similar names are added to tolerate typos.
+
+        Args:
+            query (Optional[str]): The (partial) station name, location or postal code. Case is ignored.
+            limit (int, optional): The maximal number of names to return. Defaults to 50.
+
+        Returns:
+            List[str]: The matching station names, without a query the first `limit` stations.
+        """
+        return list(self._search((query or "").strip().lower(), limit))
+
+    def _search_uncached(self, query: str, limit: int) -> Tuple[str, ...]:
+        """A helper function implementing `search` for a normalized query.
+
+        Args:
+            query (str): The stripped and lower-cased query.
+            limit (int): The maximal number of names to return.
+
+        Returns:
+            Tuple[str, ...]: The matching station names.
+        """
+        if not query:
+            return self.names[:limit]
+
+        # Prefix matches are a contiguous range of the sorted keys
+        start = bisect_left(self.sorted_keys, query)
+        end = start
+        while (
+            end < len(self.sorted_keys)
+            and end - start < limit
+            and self.sorted_keys[end].startswith(query)
+        ):
+            end += 1
+        matches = list(self.sorted_names[start:end])
+
+        if len(matches) < limit:
+            found = set(matches)
+            for key, name in zip(self.sorted_keys, self.sorted_names):
+                if query in key and name not in found:
+                    matches.append(name)
+                    found.add(name)
+                    if len(matches) == limit:
+                        break
+
+        if len(matches) < limit:
+            found = set(matches)
+            close_keys = difflib.get_close_matches(
+                query, self.sorted_keys, n=limit - len(matches), cutoff=0.6
+            )
+            for key in close_keys:
+                name = self.sorted_names[bisect_left(self.sorted_keys, key)]
+                if name not in found:
+                    matches.append(name)
+                    found.add(name)
+
+        return tuple(matches)
+
+
+def _to_unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """A helper function converting coordinates in degrees to 3D unit vectors.
+
+    The euclidean distance between unit vectors grows monotonically with the great-circle distance, so a KD-tree over them finds the nearest stations on the sphere.
+
+    Args:
+        lat (np.ndarray): The latitudes in degrees.
+        lon (np.ndarray): The longitudes in degrees.
+
+    Returns:
+        np.ndarray: An array of shape (n, 3).
+    """
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack(
+        (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat))
+    )
+
+
+class NearestStationIndex:
+    """A spatial index over the coordinates of all stations, answering which stations are nearest to a location.
+
+    The index is a KD-tree over the stations' positions on the unit sphere, built once per data refresh.
+    """
+
+    def __init__(
+        self,
+        station_df: pd.DataFrame,
+        lat_col: str = "latitude",
+        lon_col: str = "longitude",
+        post_code_col: Optional[str] = "post_code",
+    ) -> None:
+        """Builds the index from a station_info df, stations without coordinates are skipped.
+
+        Args:
+            station_df (pd.DataFrame): A df with the columns Tankstellen_Name, short_id and the coordinates.
+            lat_col (str, optional): The column of the latitudes. Defaults to "latitude".
+            lon_col (str, optional): The column of the longitudes. Defaults to "longitude".
+            post_code_col (Optional[str], optional): The column of the postcodes, used to resolve postcode queries. Defaults to "post_code".
+        """
+        station_df = station_df.dropna(subset=[lat_col, lon_col])
+        self.names: Tuple[str, ...] = tuple(station_df["Tankstellen_Name"])
+        self.ids: Tuple[str, ...] = tuple(station_df["short_id"])
+        vectors = _to_unit_vectors(
+            station_df[lat_col].to_numpy(dtype=float),
+            station_df[lon_col].to_numpy(dtype=float),
+        )
+        self._tree = cKDTree(vectors) if len(vectors) else None
+
+        # The center of every postcode area is the normalized mean of its stations' unit vectors
+        self._post_code_centers: Dict[str, np.ndarray] = {}
+        if post_code_col and post_code_col in station_df.columns and len(vectors):
+            codes, post_codes = pd.factorize(
+                station_df[post_code_col].astype(str).str.zfill(5)
+            )
+            centers = np.column_stack(
+                [
+                    np.bincount(
+                        codes, weights=vectors[:, axis], minlength=len(post_codes)
+                    )
+                    for axis in range(3)
+                ]
+            )
+            centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+            self._post_code_centers = dict(zip(post_codes, centers))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def locate(self, query: Optional[str]) -> Optional[np.ndarray]:
+        """Resolves a query to a location, if it is a known postcode or a "lat, lon" pair.
+
+        Args:
+            query (Optional[str]): A postcode like "12057" or coordinates like "52.48, 13.43".
+
+        Returns:
+            Optional[np.ndarray]: The location as unit vector or None if the query isn't a location.
+        """
+        query = (query or "").strip()
+        if _POST_CODE_PATTERN.match(query):
+            return self._post_code_centers.get(query)
+
+        coordinates = _COORDINATES_PATTERN.match(query)
+        if coordinates:
+            lat, lon = float(coordinates.group(1)), float(coordinates.group(2))
+            if -90 <= lat <= 90 and -180 <= lon <= 180:
+                return _to_unit_vectors(np.array([lat]), np.array([lon]))[0]
+
+        return None
+
+    def nearest(self, location: np.ndarray, k: int = 10) -> pd.DataFrame:
+        """Returns the k stations nearest to a location.
+
+        Args:
+            location (np.ndarray): The location as unit vector, see `locate`.
+            k (int, optional): The number of stations to return. Defaults to 10.
+
+        Returns:
+            pd.DataFrame: A df with the columns Tankstellen_Name, short_id and distance_km, sorted by distance.
+        """
+        k = min(k, len(self))
+        if self._tree is None or k == 0:
+            return pd.DataFrame(columns=["Tankstellen_Name", "short_id", "distance_km"])
+
+        chords, positions = self._tree.query(location, k=k)
+        chords, positions = np.atleast_1d(chords), np.atleast_1d(positions)
+        return pd.DataFrame(
+            {
+                "Tankstellen_Name": [self.names[i] for i in positions],
+                "short_id": [self.ids[i] for i in positions],
+                # Convert the chord lengths on the unit sphere to great-circle distances
+                "distance_km": 2
+                * EARTH_RADIUS_KM
+                * np.arcsin(np.clip(chords / 2, 0, 1)),
+            }
+        )
@@ -0,0 +1,175 @@
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+import pandas as pd
+
+FORECAST_FRAMES = (
+    "forecast_df",
+    "summary_weekday_df",
+    "summary_hour_df",
+    "summary_trend_df",
+)
+# The generation of the store in its root and the generation a forecast was written in, next to its feather files
+GENERATION_FILE = ".generation"
+FORECAST_GENERATION_FILE = "generation"
+
+
+def _read_generation(path: Path) -> int:
+    """A helper function reading a generation marker, a missing or unreadable marker counts as generation 0.
+
+    Args:
+        path (Path): The path of the marker file.
+
+    Returns:
+        int: The generation stored in the marker file.
+    """
+    try:
+        return int(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+class ForecastStore:
+    """A local columnar store for precomputed forecasts, keyed by date, station and gas_type.
+
+    Every forecast is stored as one feather file per DataFrame in the directory `<root>/<date>/<gas_type>/<station>/`.
+    A directory is written completely before it is moved into place, so readers never see partial forecasts.
+    Once the price data changes, the forecasts written before are ignored, since they were computed from the old prices.
+    To this end every forecast records the generation of the store it was written in, which `invalidate` increments in a marker file in the root, so that the precompute job and the app agree on it.
+    """
+
+    def __init__(self, root: Union[str, Path]) -> None:
+        """Initializes the store.
+
+        Args:
+            root (Union[str, Path]): The root directory of the store.
+        """
+        self.root = Path(root)
+        self._generation_lock = threading.Lock()
+
+    def _forecast_dir(
+        self, todays_date: Union[date, str], station: str, gas_type: str
+    ) -> Path:
+        """Returns the directory of a forecast.
+
+        Args:
+            todays_date (Union[date, str]): The date for which the forecast was made.
+            station (str): The station of the forecast.
+            gas_type (str): The gas_type of the forecast.
+
+        Returns:
+            Path: The directory containing the feather files of the forecast.
+        """
+        date_key = (
+            todays_date.isoformat()
+            if isinstance(todays_date, date)
+            else str(todays_date)
+        )
+        return self.root / date_key / str(gas_type) / str(station)
+
+    @property
+    def generation(self) -> int:
+        """The current generation of the store, only forecasts written in it are read."""
+        return _read_generation(self.root / GENERATION_FILE)
+
+    def invalidate(self) -> None:
+        """Ignores all forecasts written until now, e.g. once the price data changed. Forecasts written later are read again."""
+        with self._generation_lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            generation = self.generation + 1
+            # Replace the marker atomically, so that a concurrent read never sees a partial generation
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=f"{GENERATION_FILE}-")
+            with os.fdopen(fd, "w") as marker:
+                marker.write(str(generation))
+            os.replace(tmp_path, self.root / GENERATION_FILE)
+
+    def write(
+        self,
+        todays_date: Union[date, str],
+        station: str,
+        gas_type: str,
+        forecast_summary_dict: Dict[str, pd.DataFrame],
+    ) -> None:
+        """Writes a forecast to the store, replacing an existing forecast for the same key.
+
+        Args:
+            todays_date (Union[date, str]): The date for which the forecast was made.
+            station (str): The station of the forecast.
+            gas_type (str): The gas_type of the forecast.
+            forecast_summary_dict (Dict[str, pd.DataFrame]): The DataFrames as returned by `makeForecast`.
+        """
+        forecast_dir = self._forecast_dir(todays_date, station, gas_type)
+        forecast_dir.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_dir = Path(tempfile.mkdtemp(dir=forecast_dir.parent, prefix=f".{station}-"))
+        try:
+            for name in FORECAST_FRAMES:
+                # Feather only supports a default index
+                forecast_summary_dict[name].reset_index(drop=True).to_feather(
+                    tmp_dir / f"{name}.ftr"
+                )
+            (tmp_dir / FORECAST_GENERATION_FILE).write_text(str(self.generation))
+            if forecast_dir.exists():
+                shutil.rmtree(forecast_dir)
+            os.replace(tmp_dir, forecast_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def prune(self, keep_after: date) -> int:
+        """Deletes the forecasts of all dates up to and including keep_after, so that the store doesn't grow with every nightly run.
+
+        Args:
+            keep_after (date): The last date to delete, later dates are kept.
+
+        Returns:
+            int: The number of deleted date directories.
+        """
+        deleted = 0
+        if not self.root.is_dir():
+            return deleted
+
+        for date_dir in self.root.iterdir():
+            try:
+                dir_date = date.fromisoformat(date_dir.name)
+            except ValueError:
+                # Not a date directory of the store
+                continue
+            if date_dir.is_dir() and dir_date <= keep_after:
+                shutil.rmtree(date_dir, ignore_errors=True)
+                deleted += 1
+
+        return deleted
+
+    def read(
+        self, todays_date: Union[date, str], station: str, gas_type: str
+    ) -> Optional[Dict[str, pd.DataFrame]]:
+        """Reads a forecast from the store.
+
+        Args:
+            todays_date (Union[date, str]): The date for which the forecast was made.
+            station (str): The station of the forecast.
+            gas_type (str): The gas_type of the forecast.
+
+        Returns:
+            Optional[Dict[str, pd.DataFrame]]: The DataFrames as returned by `makeForecast` or None if the forecast is not in the store or was written before the last `invalidate`.
+        """
+        forecast_dir = self._forecast_dir(todays_date, station, gas_type)
+        try:
+            if (
+                _read_generation(forecast_dir / FORECAST_GENERATION_FILE)
+                != self.generation
+            ):
+                return None
+            return {
+                name: pd.read_feather(forecast_dir / f"{name}.ftr")
+                for name in FORECAST_FRAMES
+            }
+        except FileNotFoundError:
+            return None
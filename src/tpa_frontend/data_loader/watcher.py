@@ -0,0 +1,161 @@
+import threading
+from collections.abc import Mapping
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+from tpa_frontend.data_loader.cache import CompressedMapCache
+from tpa_frontend.data_loader.stations import NearestStationIndex
+from tpa_frontend.data_loader.stations import StationIndex
+from tpa_frontend.monitoring.metrics import span
+
+
+class DataSnapshot:
+    """A view on one version of the app data: the base DataFrames, the station indexes, the map cache and the last week.
+
+    A rerun reads the snapshot once and uses it throughout, so that a swap by the `DataVersionWatcher` never mixes two versions of the data within one rerun.
+    """
+
+    def __init__(
+        self,
+        versions: Dict[str, Optional[str]],
+        base_df_dict: Mapping,
+        station_index: StationIndex,
+        nearest_station_index: Callable[[], NearestStationIndex],
+        map_cache: CompressedMapCache,
+        last_week: str,
+    ) -> None:
+        """Initializes the snapshot.
+
+        Args:
+            versions (Dict[str, Optional[str]]): The versions of the watched objects this snapshot was built from, by object name.
+            base_df_dict (Mapping): The base DataFrames as returned by `loadBaseDFs`.
+            station_index (StationIndex): The lookup index of the stations.
+            nearest_station_index (Callable[[], NearestStationIndex]): A function building the spatial index of the stations, it is only called on first access.
+            map_cache (CompressedMapCache): The cache of the maps of this version.
+            last_week (str): The latest week of the week_mapper.
+        """
+        self.versions = versions
+        self.base_df_dict = base_df_dict
+        self.station_index = station_index
+        self.map_cache = map_cache
+        self.last_week = last_week
+        self._nearest_station_index_factory = nearest_station_index
+        self._nearest_station_index: Optional[NearestStationIndex] = None
+        self._nearest_station_index_lock = threading.Lock()
+
+    @property
+    def nearest_station_index(self) -> NearestStationIndex:
+        """The spatial index of the stations, built on first access."""
+        if self._nearest_station_index is None:
+            with self._nearest_station_index_lock:
+                if self._nearest_station_index is None:
+                    self._nearest_station_index = self._nearest_station_index_factory()
+
+        return self._nearest_station_index
+
+    @property
+    def has_nearest_station_index(self) -> bool:
+        """Whether the spatial index of the stations has been built."""
+        return self._nearest_station_index is not None
+
+    @property
+    def map_version(self) -> str:
+        """A key changing with the versions of the watched maps, e.g. to key the published map URLs."""
+        return "|".join(
+            str(version)
+            for object_name, version in sorted(self.versions.items())
+            if object_name.endswith(".html")
+        )
+
+
+class DataVersionWatcher:
+    """Polls the versions of the watched objects in a background thread and swaps in a new `DataSnapshot` once they change.
+
+    The new snapshot is built in the background thread, off the request path. Readers keep the snapshot they read until their rerun finishes.
+    """
+
+    def __init__(
+        self,
+        read_versions: Callable[[Optional[DataSnapshot]], Dict[str, Optional[str]]],
+        build_snapshot: Callable[
+            [Dict[str, Optional[str]], Optional[DataSnapshot]], DataSnapshot
+        ],
+        interval: float,
+    ) -> None:
+        """Builds the first snapshot without starting the background thread.
+
+        Args:
+            read_versions (Callable[[Optional[DataSnapshot]], Dict[str, Optional[str]]]): A function returning the versions of the watched objects by object name, None if a version couldn't be read. It gets passed the current snapshot, e.g. to watch the maps of its last week.
+            build_snapshot (Callable[[Dict[str, Optional[str]], Optional[DataSnapshot]], DataSnapshot]): A function building a snapshot from the given versions. It gets passed the current snapshot, e.g. to reuse unchanged parts.
+            interval (float): The time between two polls in seconds.
+        """
+        self.interval = interval
+        self.swaps = 0
+        self.failed_polls = 0
+        self._read_versions = read_versions
+        self._build_snapshot = build_snapshot
+        self._poll_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        snapshot = build_snapshot(read_versions(None), None)
+        # The watched objects can depend on the snapshot, e.g. the maps of its last week, so their versions are recorded with it.
+        # The versions the snapshot was built from take precedence, a change in between is swapped in by the next poll
+        snapshot.versions = {**read_versions(snapshot), **snapshot.versions}
+        self._snapshot = snapshot
+
+    @property
+    def snapshot(self) -> DataSnapshot:
+        """The current snapshot."""
+        return self._snapshot
+
+    def poll(self) -> bool:
+        """Reads the versions of the watched objects and swaps in a new snapshot if any of them changed.
+
+        A version which couldn't be read is assumed unchanged.
+
+        Returns:
+            bool: True if a new snapshot was swapped in, else False.
+        """
+        with self._poll_lock:
+            current = self._snapshot
+            versions = {
+                object_name: version
+                if version is not None
+                else current.versions.get(object_name)
+                for object_name, version in self._read_versions(current).items()
+            }
+            if versions == current.versions:
+                return False
+
+            # Replacing the reference is atomic, readers either see the complete old or the complete new snapshot
+            self._snapshot = self._build_snapshot(versions, current)
+            self.swaps += 1
+            return True
+
+    def _run(self) -> None:
+        """Polls until the watcher is stopped, a failed poll keeps the current snapshot and is recorded as failed data_poll."""
+        while not self._stopped.wait(self.interval):
+            with span("data_poll") as poll_span:
+                try:
+                    swapped = self.poll()
+                except Exception:
+                    self.failed_polls += 1
+                    poll_span.cache = "failed"
+                else:
+                    poll_span.cache = "swap" if swapped else "unchanged"
+
+    def start(self) -> None:
+        """Starts polling in a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="data_version_watcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stops polling, a running poll is finished first."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,12 +1,13 @@
 from datetime import date
 
-import pandas as pd
 import streamlit as st
 from tpa_frontend.config_handler.load_configs import create_config_from_env
 from tpa_frontend.config_handler.load_configs import create_filesOCI
-from tpa_frontend.config_handler.load_configs import create_Forecast
+from tpa_frontend.config_handler.load_configs import create_ForecasterPool
+from tpa_frontend.config_handler.load_configs import create_MetricsServer
 from tpa_frontend.config_handler.load_configs import create_pandasOCI
-from tpa_frontend.data_loader.load import loadBaseDFs
+from tpa_frontend.data_loader.load import getDataSnapshot
+from tpa_frontend.monitoring.metrics import span
 from tpa_frontend.streamlit_elements.mainframe import fill_main_frame
 from tpa_frontend.streamlit_elements.sidebar import createLanguageSelection
 from tpa_frontend.streamlit_elements.sidebar import createSidebar
@@ -20,48 +21,71 @@ def run_app() -> None:
     ##############################################################################
     today = date.today()
     # Loads the config file
-    config_dict, language_dict = create_config_from_env()
+    config_dict, language_config = create_config_from_env()
+    metrics_config = config_dict.get("metrics_config", {})
+    if metrics_config.get("enabled", False):
+        create_MetricsServer(
+            host=metrics_config.get("host", "127.0.0.1"),
+            port=metrics_config.get("port", 9464),
+        )
     pandasOCI = create_pandasOCI(config_dict=config_dict)
     filesOCI = create_filesOCI(config_dict=config_dict)
-    base_df_dict = loadBaseDFs(config_dict=config_dict, _pandas_connection=pandasOCI)
-    forecaster = create_Forecast(todays_date=today)
+    # Read the data once, so that a swap by the data watcher doesn't mix two versions within this rerun
+    data_snapshot = getDataSnapshot(
+        config_dict=config_dict,
+        _pandas_connection=pandasOCI,
+        _files_oci_connection=filesOCI,
+    )
+    forecaster = create_ForecasterPool(
+        todays_date=today,
+        size=config_dict.get("runtime_config", {}).get("forecaster_pool_size", 4),
+    )
 
     ##############################################################################
     ####### Configure the app sidebar ############################################
     ##############################################################################
     with st.sidebar:
-        selected_language = createLanguageSelection(language_dict=language_dict)
+        selected_language = createLanguageSelection(language_config=language_config)
         selectedSideBar = createSidebar(
-            language_dict=language_dict, language_selection=selected_language
+            language_config=language_config, language_selection=selected_language
         )
 
         sidebar_lower_selection = sidebar_lower_content(
-            language_dict=language_dict,
+            language_config=language_config,
             language_selection=selected_language,
             selectedSideBar=selectedSideBar,
-            station_dict=base_df_dict.get("station_info_30", pd.DataFrame())
-            .set_index("Tankstellen_Name")["short_id"]
-            .to_dict(),
+            station_index=data_snapshot.station_index,
+            nearest_station_index=data_snapshot.nearest_station_index
+            if selectedSideBar == "forecast"
+            else None,
         )  # type: ignore
 
-        selected_station, selected_gas_type = "", ""
+        selected_station, selected_gas_type, compared_stations = "", "", {}
         if selectedSideBar == "forecast":
-            selected_station, selected_gas_type = sidebar_lower_selection  # type: ignore
+            (
+                selected_station,
+                selected_gas_type,
+                compared_stations,
+            ) = sidebar_lower_selection  # type: ignore
         elif selectedSideBar == "maps":
             selected_gas_type = sidebar_lower_selection
 
     fill_main_frame(
         config_dict=config_dict,
-        language_dict=language_dict,
+        language_config=language_config,
         selectedSideBar=selectedSideBar,
         language_selection=selected_language,
         selected_station=selected_station,
         selected_gas_type=selected_gas_type,
+        compared_stations=compared_stations,
         forecaster=forecaster,
-        last_week=base_df_dict.get("week_mapper", pd.DataFrame())["week_total"].max(),
+        last_week=data_snapshot.last_week,
+        map_cache=data_snapshot.map_cache,
+        map_version=data_snapshot.map_version,
         filesOCI=filesOCI,
     )
 
 
 if __name__ == "__main__":
-    run_app()
+    with span("rerun"):
+        run_app()
@@ -0,0 +1,280 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import partial
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+# The upper bounds of the histogram buckets in seconds, the defaults of the Prometheus clients
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# The labels of the histograms and counters. There is no station label, it would multiply the series by the number of stations
+LABELS = ("stage", "gas_type", "cache")
+
+
+class Span:
+    """A timed stage of the app, e.g. a forecast or a map fetch.
+
+    The labels can be set while the span is open, e.g. the cache label once it is known whether the cache was hit.
+    """
+
+    def __init__(self, stage: str, gas_type: str = "", cache: str = "") -> None:
+        """Initializes an open span.
+
+        Args:
+            stage (str): The name of the stage, e.g. 'forecast_fit'.
+            gas_type (str, optional): The gas_type the stage works on. Defaults to "".
+            cache (str, optional): Whether the stage was served from a cache, e.g. 'hit' or 'miss'. Defaults to "".
+        """
+        self.stage = stage
+        self.gas_type = gas_type
+        self.cache = cache
+        self.duration: Optional[float] = None
+
+    def label_values(self, label_names: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Returns the values of the given labels.
+
+        Args:
+            label_names (Tuple[str, ...]): The names of the labels.
+
+        Returns:
+            Tuple[str, ...]: The values of the labels, as strings.
+        """
+        return tuple(str(getattr(self, label_name)) for label_name in label_names)
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...]) -> str:
+    """A helper function formatting labels in the Prometheus text format.
+
+    Args:
+        label_names (Tuple[str, ...]): The names of the labels.
+        label_values (Tuple[str, ...]): The values of the labels.
+
+    Returns:
+        str: The labels in curly braces, e.g. '{stage="forecast",cache="hit"}'.
+    """
+    escaped_values = (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in label_values
+    )
+    return (
+        "{"
+        + ",".join(
+            f'{name}="{value}"' for name, value in zip(label_names, escaped_values)
+        )
+        + "}"
+    )
+
+
+class MetricsRegistry:
+    """Collects the durations of the spans as histograms and counts the spans, shared by all sessions and threads of an app process.
+
+    The metrics are rendered in the Prometheus text format, e.g. for the `MetricsServer`.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Initializes an empty registry.
+
+        Args:
+            buckets (Tuple[float, ...], optional): The sorted upper bounds of the histogram buckets in seconds. Defaults to DEFAULT_BUCKETS.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # Per label values: the count per bucket (the last one is +Inf), the sum and the count
+        self._histograms: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._counters: Dict[Tuple[str, ...], int] = {}
+
+    def record(self, span: Span) -> None:
+        """Records a closed span.
+
+        Args:
+            span (Span): The span, its duration must be set.
+        """
+        key = span.label_values(LABELS)
+        bucket = bisect_left(self.buckets, span.duration)
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            bucket_counts, duration_sum = self._histograms[key]
+            bucket_counts[bucket] += 1
+            duration_sum[0] += span.duration  # type: ignore
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def count(self, **labels: str) -> int:
+        """Returns the number of recorded spans matching the given labels.
+
+        Args:
+            **labels (str): The labels to match, e.g. stage='forecast', cache='hit'.
+
+        Returns:
+            int: The number of matching spans.
+        """
+        with self._lock:
+            return sum(
+                count
+                for label_values, count in self._counters.items()
+                if all(
+                    label_values[LABELS.index(name)] == value
+                    for name, value in labels.items()
+                )
+            )
+
+    def clear(self) -> None:
+        """Removes all recorded metrics."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        """Renders the metrics in the Prometheus text format.
+
+        Returns:
+            str: The histogram tpa_span_duration_seconds and the counter tpa_spans_total.
+        """
+        lines = [
+            "# HELP tpa_span_duration_seconds The duration of the instrumented stages of the app.",
+            "# TYPE tpa_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for label_values, (bucket_counts, duration_sum) in sorted(
+                self._histograms.items()
+            ):
+                cumulative_count = 0
+                for upper_bound, bucket_count in zip(
+                    (*map(repr, self.buckets), "+Inf"), bucket_counts
+                ):
+                    cumulative_count += bucket_count
+                    labels = _format_labels(
+                        (*LABELS, "le"), (*label_values, upper_bound)
+                    )
+                    lines.append(
+                        f"tpa_span_duration_seconds_bucket{labels} {cumulative_count}"
+                    )
+                labels = _format_labels(LABELS, label_values)
+                lines.append(f"tpa_span_duration_seconds_sum{labels} {duration_sum[0]}")
+                lines.append(
+                    f"tpa_span_duration_seconds_count{labels} {cumulative_count}"
+                )
+
+            lines += [
+                "# HELP tpa_spans_total The number of instrumented stages.",
+                "# TYPE tpa_spans_total counter",
+            ]
+            for label_values, count in sorted(self._counters.items()):
+                labels = _format_labels(LABELS, label_values)
+                lines.append(f"tpa_spans_total{labels} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+# The registry of the app process
+REGISTRY = MetricsRegistry()
+
+
+@contextmanager
+def span(
+    stage: str,
+    gas_type: str = "",
+    cache: str = "",
+    registry: Optional[MetricsRegistry] = None,
+) -> Iterator[Span]:
+    """Measures a stage of the app and records it in the registry, also if the stage raises.
+
+    Args:
+        stage (str): The name of the stage, e.g. 'forecast_fit'.
+        gas_type (str, optional): The gas_type the stage works on. Defaults to "".
+        cache (str, optional): Whether the stage was served from a cache, can also be set on the yielded span. Defaults to "".
+        registry (Optional[MetricsRegistry], optional): The registry to record the span in. Defaults to None, i.e. REGISTRY.
+
+    Yields:
+        Span: The open span.
+    """
+    current_span = Span(stage=stage, gas_type=gas_type, cache=cache)
+    start = time.perf_counter()
+    try:
+        yield current_span
+    finally:
+        current_span.duration = time.perf_counter() - start
+        (registry or REGISTRY).record(current_span)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """A request handler serving the metrics of a registry under /metrics."""
+
+    def __init__(self, *args, registry: MetricsRegistry, **kwargs) -> None:
+        self.registry = registry
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class MetricsServer:
+    """Serves the metrics of a registry in the Prometheus text format via a small local HTTP server, so that they can be scraped."""
+
+    def __init__(
+        self,
+        registry: Optional[MetricsRegistry] = None,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+    ) -> None:
+        """Initializes the server without starting it.
+
+        Args:
+            registry (Optional[MetricsRegistry], optional): The registry to serve. Defaults to None, i.e. REGISTRY.
+            host (str, optional): The host the HTTP server binds to. Defaults to "127.0.0.1".
+            port (int, optional): The port the HTTP server binds to. Defaults to 9464.
+        """
+        self.registry = registry or REGISTRY
+        self.host = host
+        self.port = port
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> None:
+        """Starts the HTTP server in a daemon thread.
+
+        If the port is already in use, another app process on this host is assumed to serve its metrics there.
+        """
+        try:
+            self._httpd = ThreadingHTTPServer(
+                (self.host, self.port),
+                partial(_MetricsRequestHandler, registry=self.registry),
+            )
+        except OSError as e:
+            print(f"Not starting the metrics server on port {self.port}: {e}")
+            return
+
+        # Port 0 lets the OS choose a free port
+        self.port = self._httpd.server_address[1]
+        threading.Thread(
+            target=self._httpd.serve_forever, name="metrics_server", daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        """Stops the HTTP server if it was started by this instance."""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    @property
+    def url(self) -> str:
+        """The URL of the metrics."""
+        return f"http://{self.host}:{self.port}/metrics"
@@ -1,16 +1,45 @@
+import json
+from concurrent.futures import Future
+from datetime import date
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
 import pandas as pd
 import streamlit as st
 import streamlit.components.v1 as components
-from tpa_frontend.charts.create import create_bar_chart
-from tpa_frontend.charts.create import create_forecast_chart
-from tpa_frontend.charts.create import create_trend_chart
-from tpa_frontend.data_loader.load import getMapDict
-from tpa_frontend.data_loader.load import makeForecast
+from cloud_storage_wrapper.oci_access.files import FilesOCI
+from tpa_frontend.charts.create import create_chart_specs
+from tpa_frontend.charts.create import create_comparison_chart
+from tpa_frontend.charts.export import export_chart_specs
+from tpa_frontend.charts.export import EXPORT_FORMATS
+from tpa_frontend.config_handler.language import LanguageConfig
+from tpa_frontend.config_handler.load_configs import create_chart_export_cache
+from tpa_frontend.config_handler.load_configs import create_chart_spec_cache
+from tpa_frontend.config_handler.load_configs import create_forecast_executor
+from tpa_frontend.config_handler.load_configs import create_MapAssetServer
+from tpa_frontend.data_loader.cache import CompressedMapCache
+from tpa_frontend.data_loader.load import countForecastView
+from tpa_frontend.data_loader.load import GAS_TYPES
+from tpa_frontend.data_loader.load import getMap
+from tpa_frontend.data_loader.load import getMapURL
+from tpa_frontend.data_loader.load import makeForecasts
+from tpa_frontend.data_loader.load import peekForecast
+from tpa_frontend.data_loader.load import peekStaleForecast
+from tpa_frontend.data_loader.load import prefetchMaps
+from tpa_frontend.data_loader.load import submitForecast
+from tpa_frontend.data_loader.pool import ForecasterPool
+from tpa_frontend.monitoring.metrics import span
+
+# The forecast job of a session, stored in st.session_state["forecast_job"] as ((date, station, gas_type), future)
+ForecastJobKey = Tuple[Optional[date], str, str]
+ForecastJob = Tuple[ForecastJobKey, "Future[Dict[str, pd.DataFrame]]"]
 
 
 def fill_main_frame(
     config_dict: dict,
-    language_dict: dict,
+    language_config: LanguageConfig,
     selectedSideBar: str,
     language_selection: str,
     **kwargs,
@@ -19,85 +48,276 @@ def fill_main_frame(
 
     Args:
         config_dict (dict): A dictionary containing the app configuration.
-        language_dict (dict): A dictionary containing the language configuration.
+        language_config (LanguageConfig): The precompiled language configuration.
         selectedSideBar (str): The selected sidebar element, controlling which page is shown in the mainframe.
         language_selection (str): The selected language in which to display the page.
         **kwargs: Optional keyword arguments.
     """
     kwargs_dict = kwargs
+    language_bundle = language_config[language_selection]
 
     if selectedSideBar == "welcome":
-        st.markdown(body=language_dict.get("welcome_text", {}).get(language_selection))
+        st.markdown(body=language_bundle.welcome_text)
 
     if selectedSideBar == "forecast":
+        forecast_texts = language_bundle.forecast
         if kwargs_dict.get("selected_station") is None:
-            st.text(
-                language_dict.get(selectedSideBar, {})
-                .get(language_selection)
-                .get("please_choose")
-            )
+            st.text(forecast_texts.please_choose)
 
         else:
-            # Initialize the tabs
-            tab1, tab2 = st.tabs(
-                [
-                    language_dict.get(selectedSideBar, {})
-                    .get(language_selection)
-                    .get("tab_title1"),
-                    language_dict.get(selectedSideBar, {})
-                    .get(language_selection)
-                    .get("tab_title2"),
-                ]
+            selected_station: str = kwargs_dict["selected_station"]
+            gas_type: str = kwargs_dict.get("selected_gas_type", "").lower()
+            compared_stations: Dict[str, str] = (
+                kwargs_dict.get("compared_stations") or {}
             )
+            forecaster: ForecasterPool = kwargs_dict["forecaster"]
 
-            # Create the forecasts:
-            forecast_summary_dict = makeForecast(config_dict=config_dict, station=kwargs_dict.get("selected_station"), gas_type=kwargs_dict.get("selected_gas_type").lower(), _forecaster=kwargs_dict.get("forecaster"))  # type: ignore
-
+            # Initialize the tabs and placeholders right away, the charts are filled in once the forecast is available
+            tab1, tab2 = st.tabs([forecast_texts.tab_title1, forecast_texts.tab_title2])
             with tab1:
-                st.markdown(
-                    language_dict.get(selectedSideBar, {})
-                    .get(language_selection)
-                    .get("page_title_forecast")
-                )
-                chart = create_forecast_chart(
-                    df=forecast_summary_dict.get("forecast_df", pd.DataFrame()),
-                    language_selection=language_selection,
-                )
-                # chart["usermeta"] = {
-                #     "embedOptions": { "format_locale": "de-DE" , "actions": False,}}
-                # chart.configure(locale="de-DE")
-                st.altair_chart(chart, theme=None)  # type: ignore
+                st.markdown(forecast_texts.page_title_forecast)
+                refreshing_placeholder = st.empty()
+                forecast_placeholder = st.empty()
+                export_placeholder = st.empty()
+                comparison_placeholder = st.empty()
 
             with tab2:
-                st.markdown(
-                    language_dict.get(selectedSideBar, {})
-                    .get(language_selection)
-                    .get("page_title_impact")
-                )
-                st.write(
-                    language_dict.get(selectedSideBar, {})
-                    .get(language_selection)
-                    .get("chart_title_hour")
-                )
-                st.altair_chart(create_bar_chart(df=forecast_summary_dict.get("summary_hour_df"), language_selection=language_selection), use_container_width=True, theme=None)  # type: ignore
-                st.write(
-                    language_dict.get(selectedSideBar, {})
-                    .get(language_selection)
-                    .get("chart_title_weekday")
+                st.markdown(forecast_texts.page_title_impact)
+                st.write(forecast_texts.chart_title_hour)
+                hour_placeholder = st.empty()
+                st.write(forecast_texts.chart_title_weekday)
+                weekday_placeholder = st.empty()
+                st.write(forecast_texts.chart_title_trend)
+                trend_placeholder = st.empty()
+
+            # The charts are determined by (date, station, gas_type, language), cached specs need no forecast, pandas or altair work
+            runtime_config = config_dict.get("runtime_config", {})
+            chart_spec_cache = create_chart_spec_cache(
+                max_entries=runtime_config.get("chart_spec_cache_max_entries", 2000)
+            )
+            chart_spec_key = (
+                config_dict.get("todays_date"),
+                selected_station,
+                gas_type,
+                language_selection,
+            )
+            # Every rendered view counts once towards the order of the recomputations after midnight, also if the charts are cached
+            countForecastView(
+                config_dict=config_dict,
+                station=selected_station,
+                gas_type=gas_type,
+            )
+            chart_specs: Optional[Dict[str, str]] = chart_spec_cache.get(chart_spec_key)
+            stale_date: Optional[date] = None
+            if chart_specs is None:
+                # Create the forecast in the background
+                forecast_summary_dict, stale_date = _wait_for_forecast(
+                    config_dict=config_dict,
+                    station=selected_station,
+                    gas_type=gas_type,
+                    forecaster=forecaster,
+                    placeholder=forecast_placeholder,
+                    loading_text=forecast_texts.loading_forecast,
                 )
-                st.altair_chart(create_bar_chart(df=forecast_summary_dict.get("summary_weekday_df"), language_selection=language_selection), use_container_width=True)  # type: ignore
-                st.write(
-                    language_dict.get(selectedSideBar, {})
-                    .get(language_selection)
-                    .get("chart_title_trend")
+            with span(
+                "chart_build",
+                gas_type=gas_type,
+                cache="miss" if chart_specs is None else "hit",
+            ):
+                if chart_specs is None:
+                    chart_specs = create_chart_specs(
+                        forecast_summary_dict=forecast_summary_dict,
+                        language_bundle=language_bundle,
+                    )
+                    # The charts of a stale forecast are replaced on a later rerun, once todays forecast is computed
+                    if stale_date is None:
+                        chart_spec_cache.set(chart_spec_key, chart_specs)
+
+            if stale_date is not None:
+                refreshing_placeholder.info(
+                    forecast_texts.refreshing_forecast.format(forecast_date=stale_date)
                 )
-                st.altair_chart(create_trend_chart(df=forecast_summary_dict.get("summary_trend_df"), language_selection=language_selection), use_container_width=True)  # type: ignore
+
+            # chart["usermeta"] = {
+            #     "embedOptions": { "format_locale": "de-DE" , "actions": False,}}
+            # chart.configure(locale="de-DE")
+            # Streamlit modifies the spec it receives, so every render gets its own copy of the cached JSON
+            forecast_placeholder.vega_lite_chart(
+                json.loads(chart_specs["forecast"]), theme=None
+            )
+            hour_placeholder.vega_lite_chart(
+                json.loads(chart_specs["hour"]), use_container_width=True, theme=None
+            )
+            weekday_placeholder.vega_lite_chart(
+                json.loads(chart_specs["weekday"]), use_container_width=True
+            )
+            trend_placeholder.vega_lite_chart(
+                json.loads(chart_specs["trend"]), use_container_width=True
+            )
+
+            # Render the charts to images only on request, the download buttons need the bytes upfront
+            with export_placeholder.container():
+                if st.toggle(forecast_texts.export_charts, key="SELECT_export"):
+                    chart_export_cache = create_chart_export_cache(
+                        max_entries=runtime_config.get(
+                            "chart_export_cache_max_entries", 200
+                        )
+                    )
+                    for export_format in EXPORT_FORMATS:
+                        export_key = (*chart_spec_key, export_format)
+                        chart_export = chart_export_cache.get(export_key)
+                        if chart_export is None:
+                            chart_export = export_chart_specs(
+                                chart_specs=chart_specs, export_format=export_format
+                            )
+                            if stale_date is None:
+                                chart_export_cache.set(export_key, chart_export)
+
+                        st.download_button(
+                            label=forecast_texts.download_charts.format(
+                                export_format=export_format.upper()
+                            ),
+                            data=chart_export,
+                            file_name="_".join(map(str, export_key[:-1])) + ".zip",
+                            mime="application/zip",
+                        )
+
+            # The compared stations are forecasted in parallel, the selected station is cached by now
+            if compared_stations:
+                with comparison_placeholder.container():
+                    st.markdown(forecast_texts.page_title_comparison)
+                    with st.spinner(forecast_texts.loading_forecast):
+                        compared_forecasts = makeForecasts(
+                            config_dict=config_dict,
+                            stations=compared_stations.keys(),
+                            gas_type=gas_type,
+                            _forecaster=forecaster,
+                        )
+                    # The legend shows the labels of the stations, the forecasts are keyed by their short_ids
+                    compared_forecast_dfs = {
+                        label: compared_forecasts[station]["forecast_df"]
+                        for station, label in compared_stations.items()
+                    }
+                    comparison_chart = create_comparison_chart(
+                        forecast_dfs=compared_forecast_dfs,
+                        language_bundle=language_bundle,
+                    )
+                    st.altair_chart(comparison_chart, theme=None)
 
     if selectedSideBar == "maps":
-        # Create the maps:
-        mapDict = getMapDict(config_dict=config_dict, last_week=kwargs_dict.get("last_week"), _files_oci_connection=kwargs_dict.get("filesOCI"))  # type: ignore
+        # Retrieve only the map of the selected_gas_type
+        selected_gas_type: str = kwargs_dict.get("selected_gas_type", "").lower()
+        last_week: str = kwargs_dict["last_week"]
+        files_oci_connection: FilesOCI = kwargs_dict["filesOCI"]
+        map_cache: Optional[CompressedMapCache] = kwargs_dict.get("map_cache")
+        map_config = config_dict.get("map_config", {})
 
         # Display the page according to the selected_gas_type
-        components.html(
-            mapDict[kwargs_dict.get("selected_gas_type", "").lower()], height=700
+        if map_config.get("serving_mode", "inline") == "static":
+            # Embed the map by URL, so that browsers cache it and it isn't sent on every rerun
+            map_asset_server = create_MapAssetServer(
+                directory=map_config.get("static_dir", "map_assets"),
+                host=map_config.get("static_host", "127.0.0.1"),
+                port=map_config.get("static_port", 8502),
+                public_url=map_config.get("static_url"),
+            )
+            map_url = getMapURL(
+                config_dict=config_dict,
+                last_week=last_week,
+                gas_type=selected_gas_type,
+                _files_oci_connection=files_oci_connection,
+                _map_asset_server=map_asset_server,
+                map_version=kwargs_dict.get("map_version", ""),
+                _map_cache=map_cache,
+            )
+            components.iframe(map_url, height=700)
+        else:
+            map_html = getMap(
+                config_dict=config_dict,
+                last_week=last_week,
+                gas_type=selected_gas_type,
+                _files_oci_connection=files_oci_connection,
+                _map_cache=map_cache,
+            )
+            components.html(map_html, height=700)
+
+        # Retrieve the other maps in the background, once the selected map is shown
+        if config_dict.get("runtime_config", {}).get("prefetch_maps", False):
+            other_gas_types = [
+                gas_type for gas_type in GAS_TYPES if gas_type != selected_gas_type
+            ]
+            prefetchMaps(
+                config_dict=config_dict,
+                last_week=last_week,
+                gas_types=other_gas_types,
+                _files_oci_connection=files_oci_connection,
+                _map_cache=map_cache,
+            )
+
+
+def _wait_for_forecast(
+    config_dict: dict,
+    station: str,
+    gas_type: str,
+    forecaster: ForecasterPool,
+    placeholder: Any,
+    loading_text: str,
+) -> Tuple[Dict[str, pd.DataFrame], Optional[date]]:
+    """A helper function returning a cached forecast right away or computing it in the background while a spinner is shown in the placeholder.
+
+    After midnight the forecast of the previous day is returned right away if todays forecast is recomputed in the background (stale-while-revalidate).
+    Every session runs at most one forecast job: when the selection changes, the job of the previous selection is cancelled if it hasn't started yet.
+
+    Args:
+        config_dict (dict): A dictionary containing the app configuration.
+        station (str): The station for which the forecast is made.
+        gas_type (str): The gas_type for which to make the price forecast.
+        forecaster (ForecasterPool): A pool of `Forecast` objects.
+        placeholder (Any): The `st.empty` placeholder showing the spinner until the forecast is available.
+        loading_text (str): The text of the spinner.
+
+    Returns:
+        Tuple[Dict[str, pd.DataFrame], Optional[date]]: A dictionary mapping names to the different DataFrames resulting from the forecast, and the date of the forecast if it is a stale one, else None.
+    """
+    forecast_summary_dict = peekForecast(
+        config_dict=config_dict, station=station, gas_type=gas_type
+    )
+    if forecast_summary_dict is not None:
+        return forecast_summary_dict, None
+
+    stale_forecast = peekStaleForecast(
+        config_dict=config_dict,
+        station=station,
+        gas_type=gas_type,
+        _forecaster=forecaster,
+    )
+    if stale_forecast is not None:
+        stale_date, forecast_summary_dict = stale_forecast
+        return forecast_summary_dict, stale_date
+
+    job_key: ForecastJobKey = (config_dict.get("todays_date"), station, gas_type)
+    previous_job: Optional[ForecastJob] = st.session_state.get("forecast_job")
+    if previous_job is not None and previous_job[0] == job_key:
+        future = previous_job[1]
+    else:
+        # A stale job only blocks a forecaster if it is already running
+        if previous_job is not None:
+            previous_job[1].cancel()
+        future = submitForecast(
+            config_dict=config_dict,
+            station=station,
+            gas_type=gas_type,
+            _forecaster=forecaster,
+            _executor=create_forecast_executor(max_workers=forecaster.size),
         )
+        st.session_state["forecast_job"] = (job_key, future)
+
+    try:
+        with placeholder.container(), st.spinner(loading_text):
+            forecast_summary_dict = future.result()
+    finally:
+        # A rerun interrupting the wait keeps the job, so that the same selection picks it up again
+        if future.done():
+            st.session_state.pop("forecast_job", None)
+
+    return forecast_summary_dict, None
@@ -1,57 +1,47 @@
 from typing import Optional
 from typing import Union
 
+import pandas as pd
 import streamlit as st
 from streamlit_option_menu import option_menu
-from tpa_frontend.config_handler.load_configs import create_config_from_env
+from tpa_frontend.config_handler.language import LanguageConfig
+from tpa_frontend.data_loader.stations import NearestStationIndex
+from tpa_frontend.data_loader.stations import StationIndex
 
-language_dict = create_config_from_env()[1]
 
-
-def createSidebar(language_dict: dict, language_selection: str) -> str:
+def createSidebar(language_config: LanguageConfig, language_selection: str) -> str:
     """A to build and evaluate the sidebar.
 
     Args:
-        language_dict (dict): A dictionary containing the language configuration.
+        language_config (LanguageConfig): The precompiled language configuration.
         language_selection (str): The selected language in which to display the page.
 
     Returns:
         str: The selected element from the sidebar
     """
+    sidebar_texts = language_config[language_selection].sidebar
     selection = option_menu(
-        menu_title=list(
-            language_dict.get("sidebar_upper", {}).get(language_selection).keys()
-        )[0],
-        options=list(
-            language_dict.get("sidebar_upper", {}).get(language_selection).keys()
-        )[1:],
-        icons=language_dict.get("sidebar_upper", {}).get("symbols"),
+        menu_title=sidebar_texts.menu_title,
+        options=list(sidebar_texts.menu_options),
+        icons=list(language_config.menu_icons),
     )
 
-    return (
-        language_dict.get("sidebar_upper", {})
-        .get(language_selection, {})
-        .get(selection)
-    )
+    return sidebar_texts.page_of(selection)
 
 
-def createLanguageSelection(language_dict: dict) -> str:
+def createLanguageSelection(language_config: LanguageConfig) -> str:
     """A function creating the language selection in the upper left side bar.
 
     Args:
-        language_dict (dict): A dictionary containing the language configuration.
+        language_config (LanguageConfig): The precompiled language configuration.
 
     Returns:
         str: The values of the language selection (either 'Ger' or 'Eng').
     """
 
     # Set markdowns for flags
-    st.markdown(
-        language_dict.get("markdown", {}).get("english_flag"), unsafe_allow_html=True
-    )
-    st.markdown(
-        language_dict.get("markdown", {}).get("german_flag"), unsafe_allow_html=True
-    )
+    st.markdown(language_config.english_flag, unsafe_allow_html=True)
+    st.markdown(language_config.german_flag, unsafe_allow_html=True)
 
     # Language selection via the previously specified flags
     language_selection = st.radio(
@@ -67,52 +57,105 @@ def createLanguageSelection(language_dict: dict) -> str:
 
 
 def sidebar_lower_content(
-    language_dict: dict,
+    language_config: LanguageConfig,
     language_selection: str,
     selectedSideBar: str,
-    station_dict: dict = {},
+    station_index: Optional[StationIndex] = None,
+    nearest_station_index: Optional[NearestStationIndex] = None,
+    max_station_options: int = 50,
+    max_compared_stations: int = 10,
 ) -> Optional[Union[tuple, str]]:
     """A function to dynamically create the  lower part of the sidebar depending on the selected sidebar element.
 
     Args:
-        language_dict (dict): A dictionary containing the language configuration.
+        language_config (LanguageConfig): The precompiled language configuration.
         language_selection (str): The selected language in which to display the elements.
         selectedSideBar (str): The selected sidebar element, controlling which page is shown in the mainframe.
-        station_dict (dict, optional): A dictionary mapping station names to their corresponding IDs. This is required for the "forecast" lower sidebar. Defaults to {}.
+        station_index (Optional[StationIndex], optional): The lookup index of the stations. This is required for the "forecast" lower sidebar. Defaults to None.
+        nearest_station_index (Optional[NearestStationIndex], optional): The spatial index of the stations. If given, postcode and "lat, lon" queries offer the nearest stations. Defaults to None.
+        max_station_options (int, optional): The maximal number of stations sent to the station selector. Defaults to 50.
+        max_compared_stations (int, optional): The maximal number of stations to compare with the selected station. Defaults to 10.
 
     Returns:
-        Optional[tuple]: A tuple of selected station and gas_type
+        Optional[tuple]: A tuple of selected station ID, gas_type and a dictionary mapping the IDs of the compared stations to their labels, starting with the selected station. The dictionary is empty if no stations are compared.
     """
+    sidebar_texts = language_config[language_selection].sidebar
     if selectedSideBar == "forecast":
-        selected_station = station_dict.get(
-            st.selectbox(
-                label=language_dict.get("sidebar_lower", {})
-                .get(selectedSideBar)
-                .get(language_selection)[0],
-                help=language_dict.get("sidebar_lower", {})
-                .get(selectedSideBar)
-                .get(language_selection)[1],
-                options=station_dict.keys(),
-                index=None,
-                key="SELECT_station",
-            )
+        station_index = station_index or StationIndex(
+            station_df=pd.DataFrame(columns=["Tankstellen_Name", "short_id"])
+        )
+        # Filter the stations on the server, so that only the matches are sent to the browser
+        station_query = st.text_input(
+            label=sidebar_texts.station_search_label,
+            key="SELECT_station_search",
         )
+        location = (
+            nearest_station_index.locate(station_query)
+            if nearest_station_index is not None
+            else None
+        )
+        if location is not None:
+            # Offer the nearest stations, which have a forecast, sorted by distance
+            station_options = [
+                short_id
+                for short_id in nearest_station_index.nearest(  # type: ignore
+                    location=location, k=4 * max_station_options
+                )["short_id"]
+                if short_id in station_index
+            ][:max_station_options]
+        else:
+            station_options = station_index.get_ids(
+                station_index.search(query=station_query, limit=max_station_options)
+            )[:max_station_options]
+        # Keep the current selection selectable while the query changes
+        current_station = st.session_state.get("SELECT_station")
+        if current_station in station_index and current_station not in station_options:
+            station_options.insert(0, current_station)
+
+        # The options are the station IDs, labelled with name and address
+        selected_station = st.selectbox(
+            label=sidebar_texts.station_label,
+            help=sidebar_texts.station_help,
+            options=station_options,
+            format_func=station_index.label,
+            index=None,
+            key="SELECT_station",
+        )
+
+        compared_stations = {}
+        if selected_station is not None:
+            # The compared stations are chosen from the search results, so they stay selectable while the query changes
+            compare_options = station_options + [
+                short_id
+                for short_id in st.session_state.get("SELECT_compare_stations", [])
+                if short_id in station_index and short_id not in station_options
+            ]
+            compared_ids = st.multiselect(
+                label=sidebar_texts.compare_label,
+                help=sidebar_texts.compare_help,
+                options=compare_options,
+                format_func=station_index.label,
+                max_selections=max_compared_stations,
+                key="SELECT_compare_stations",
+            )
+            if compared_ids:
+                compared_stations = {
+                    short_id: station_index.label(short_id)
+                    for short_id in [selected_station, *compared_ids]
+                }
+
         selected_gas_type = st.radio(
-            label=language_dict.get("sidebar_lower", {})
-            .get(selectedSideBar)
-            .get(language_selection)[2],
+            label=sidebar_texts.gas_type_label_forecast,
             options=["E5", "E10", "Diesel"],
             horizontal=True,
             key="SELECT_gas_type_forecast",
         )
 
-        return (selected_station, selected_gas_type)
+        return (selected_station, selected_gas_type, compared_stations)
 
     elif selectedSideBar == "maps":
         selected_gas_type = st.radio(
-            label=language_dict.get("sidebar_lower", {})
-            .get(selectedSideBar)
-            .get(language_selection),
+            label=sidebar_texts.gas_type_label_maps,
             options=["E5", "E10", "Diesel"],
             horizontal=True,
             key="SELECT_gas_type_map",
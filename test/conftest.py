@@ -6,6 +6,7 @@ import pytest
 from streamlit.testing.v1 import AppTest
 from tpa_frontend.config_handler.load_configs import create_config_from_env
 from tpa_frontend.config_handler.load_configs import create_Forecast
+from tpa_frontend.config_handler.load_configs import create_ForecasterPool
 from tpa_frontend.config_handler.load_configs import create_PandasOCI_from_dict
 from tpa_frontend.data_loader.load import loadBaseDFs
 
@@ -32,6 +33,13 @@ def provide_Forecast(provide_config_from_env):
     return create_Forecast(todays_date=provide_config_from_env[0]["todays_date"])
 
 
+@pytest.fixture(scope="session")
+def provide_ForecasterPool(provide_config_from_env):
+    return create_ForecasterPool(
+        todays_date=provide_config_from_env[0]["todays_date"], size=2
+    )
+
+
 @pytest.fixture(scope="session")
 def provide_App(provide_config_from_env):
     test_app = AppTest.from_file("../src/tpa_frontend/main.py")
@@ -68,4 +76,4 @@ def provide_station_list_forecast(provide_config_from_env, provide_pandasOCI):
     base_df_dict = loadBaseDFs(
         config_dict=provide_config_from_env[0], _pandas_connection=provide_pandasOCI
     )
-    return list(base_df_dict.get("station_info_30", pd.DataFrame())["Tankstellen_Name"])
+    return list(base_df_dict.get("station_info_30", pd.DataFrame())["short_id"])
@@ -0,0 +1,207 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import zipfile
+from datetime import date
+
+import altair as alt
+import numpy as np
+import pandas as pd
+import pytest
+from tpa_frontend.charts.create import create_bar_chart
+from tpa_frontend.charts.create import create_chart_specs
+from tpa_frontend.charts.create import create_comparison_chart
+from tpa_frontend.charts.create import create_forecast_chart
+from tpa_frontend.charts.create import create_trend_chart
+from tpa_frontend.charts.export import batch_export_charts
+from tpa_frontend.charts.export import export_chart
+from tpa_frontend.charts.export import export_chart_specs
+from tpa_frontend.data_loader.store import ForecastStore
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "tpa_frontend.charts.create",
+        "tpa_frontend.streamlit_elements.sidebar",
+        "tpa_frontend.main",
+    ],
+)
+def test_no_config_loaded_at_import(module):
+    # The import fails if the module tries to load the (missing) config
+    subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        env={**os.environ, "CONFIG_PATH": "does/not/exist.yaml"},
+        check=True,
+    )
+
+
+def _forecast_summary_dict() -> dict:
+    return {
+        "forecast_df": pd.DataFrame(
+            {
+                "hour_format": [" 23:00", "00:00"],
+                "pred": [1.75, 1.79],
+                "is_last": [0, 1],
+            }
+        ),
+        "summary_hour_df": pd.DataFrame(
+            {"hour_format": ["00:00", "01:00"], "diff": [0.1, -0.1]}
+        ),
+        "summary_weekday_df": pd.DataFrame(
+            {"day_of_week": [0, 1], "diff": [0.01, -0.01]}
+        ),
+        "summary_trend_df": pd.DataFrame({"week": [40, 41], "price": [1.75, 1.77]}),
+    }
+
+
+class Test_create:
+    def test_create_charts(self, provide_config_from_env):
+        language_config = provide_config_from_env[1]
+        forecast_df = pd.DataFrame(
+            {
+                "hour_format": [" 23:00", "00:00"],
+                "pred": [1.75, 1.79],
+                "is_last": [0, 1],
+            }
+        )
+        hour_df = pd.DataFrame({"hour_format": ["00:00", "01:00"], "diff": [0.1, -0.1]})
+        weekday_df = pd.DataFrame({"day_of_week": [0, 1], "diff": [0.01, -0.01]})
+        trend_df = pd.DataFrame({"week": [40, 41], "price": [1.75, 1.77]})
+
+        for chart in (
+            create_forecast_chart(
+                df=forecast_df, language_bundle=language_config["Eng"]
+            ),
+            create_bar_chart(df=hour_df, language_bundle=language_config["Eng"]),
+            create_bar_chart(df=weekday_df, language_bundle=language_config["Ger"]),
+            create_trend_chart(df=trend_df, language_bundle=language_config["Ger"]),
+            create_comparison_chart(
+                forecast_dfs={"A Station": forecast_df, "B Station": forecast_df},
+                language_bundle=language_config["Eng"],
+            ),
+        ):
+            assert isinstance(chart, alt.LayerChart)
+            assert chart.to_dict()
+
+    def test_create_chart_specs(self, provide_config_from_env):
+        chart_specs = create_chart_specs(
+            forecast_summary_dict=_forecast_summary_dict(),
+            language_bundle=provide_config_from_env[1]["Ger"],
+        )
+
+        assert set(chart_specs) == {"forecast", "hour", "weekday", "trend"}
+        for chart_spec in chart_specs.values():
+            # The specs are serialized, so that a cached spec can't be modified by a render
+            assert isinstance(chart_spec, str)
+            assert "layer" in json.loads(chart_spec)
+        assert "Montag" in chart_specs["weekday"]
+
+    def test_create_chart_specs_keeps_input(self, provide_config_from_env):
+        # The DataFrames are shared with the cache of makeForecast, rendering must not change them
+        forecast_summary_dict = _forecast_summary_dict()
+        expected = {
+            name: df.copy(deep=True) for name, df in forecast_summary_dict.items()
+        }
+
+        for language in ("Ger", "Eng"):
+            chart_specs = create_chart_specs(
+                forecast_summary_dict=forecast_summary_dict,
+                language_bundle=provide_config_from_env[1][language],
+            )
+            weekday_list = provide_config_from_env[1][language].forecast.weekday_list
+            assert json.dumps(weekday_list[1])[1:-1] in chart_specs["weekday"]
+
+        for name, df in forecast_summary_dict.items():
+            pd.testing.assert_frame_equal(df, expected[name])
+
+    def test_chart_spec_payload(self, provide_config_from_env):
+        hours = [f"{hour:02d}:00" for hour in range(24)]
+        # A 48-hour forecast as returned by makeForecast and a year of summaries
+        forecast_summary_dict = {
+            "forecast_df": pd.DataFrame(
+                {
+                    "Day_Hours": pd.date_range("2024-10-13", periods=48, freq="h"),
+                    "pred": np.linspace(1.7, 1.8, 48),
+                    "is_last": [0] * 24 + [1] * 24,
+                    "hour_format": [" " + hour for hour in hours] + hours,
+                }
+            ),
+            "summary_hour_df": pd.DataFrame(
+                {"hour_format": hours, "diff": np.linspace(-0.1, 0.1, 24)}
+            ),
+            "summary_weekday_df": pd.DataFrame(
+                {"day_of_week": range(7), "diff": np.linspace(-0.01, 0.01, 7)}
+            ),
+            "summary_trend_df": pd.DataFrame(
+                {"week": range(1, 53), "price": np.linspace(1.6, 1.9, 52)}
+            ),
+        }
+
+        chart_specs = create_chart_specs(
+            forecast_summary_dict=forecast_summary_dict,
+            language_bundle=provide_config_from_env[1]["Eng"],
+        )
+
+        for chart_spec in chart_specs.values():
+            spec = json.loads(chart_spec)
+            # The data is defined once at the top-level layer and only holds the plotted columns
+            assert len(spec["datasets"]) == 1
+            assert "name" in spec["data"]
+            assert all("data" not in layer for layer in spec["layer"])
+            assert "Day_Hours" not in chart_spec and "is_last" not in chart_spec
+        # Before sharing the data and dropping the unused columns, the specs took 16411 bytes as compact JSON
+        assert sum(len(chart_spec) for chart_spec in chart_specs.values()) < 15_000
+
+
+class Test_export:
+    def test_export_chart_specs(self, provide_config_from_env):
+        chart_specs = create_chart_specs(
+            forecast_summary_dict=_forecast_summary_dict(),
+            language_bundle=provide_config_from_env[1]["Eng"],
+        )
+
+        assert export_chart(chart_specs["forecast"], "png").startswith(b"\x89PNG")
+        assert b"<svg" in export_chart(chart_specs["forecast"], "svg")
+        with pytest.raises(ValueError):
+            export_chart(chart_specs["forecast"], "pdf")
+
+        with zipfile.ZipFile(
+            io.BytesIO(export_chart_specs(chart_specs, "svg"))
+        ) as archive:
+            assert sorted(archive.namelist()) == [
+                "forecast.svg",
+                "hour.svg",
+                "trend.svg",
+                "weekday.svg",
+            ]
+
+    def test_batch_export_charts(
+        self, provide_config_path, provide_config_from_env, tmp_path
+    ):
+        config_dict = {
+            **provide_config_from_env[0],
+            "todays_date": date(2024, 10, 14),
+            "runtime_config": {"forecast_store_path": str(tmp_path / "store")},
+        }
+        ForecastStore(root=tmp_path / "store").write(
+            date(2024, 10, 14), "7", "e5", _forecast_summary_dict()
+        )
+
+        failed = batch_export_charts(
+            config_dict=config_dict,
+            config_path=provide_config_path,
+            stations=["7"],
+            output_dir=str(tmp_path / "exports"),
+            gas_types=["e5"],
+            languages=["Ger", "Eng"],
+            export_format="svg",
+            max_workers=1,
+        )
+
+        assert failed == []
+        assert sorted(
+            path.name for path in (tmp_path / "exports" / "2024-10-14" / "e5").iterdir()
+        ) == ["7_Eng.zip", "7_Ger.zip"]
@@ -1,8 +1,13 @@
 from datetime import date
 from unittest.mock import patch
 
+import pytest
+import yaml
 from cloud_storage_wrapper.oci_access.pandas import PandasOCI
 from tpa_analytics_engine.api import Forecast
+from tpa_frontend.config_handler.language import compile_language_config
+from tpa_frontend.config_handler.language import LanguageConfig
+from tpa_frontend.config_handler.language import LanguageConfigError
 from tpa_frontend.config_handler.load_configs import create_config_from_env
 from tpa_frontend.config_handler.load_configs import load_config_dict
 from tpa_frontend.config_handler.load_configs import load_language_config_dict
@@ -23,14 +28,37 @@ class Test_load_configs:
     def test_provide_Forecast(self, provide_Forecast):
         assert isinstance(provide_Forecast, Forecast)
 
+    def test_provide_ForecasterPool(self, provide_ForecasterPool):
+        with provide_ForecasterPool.acquire() as forecaster:
+            assert isinstance(forecaster, Forecast)
+
     def test_load_language_config_dict(self, provide_config_from_env):
-        test_language_dict = load_language_config_dict(provide_config_from_env[0])
+        test_language_config = load_language_config_dict(provide_config_from_env[0])
+
+        assert isinstance(test_language_config, LanguageConfig)
+        assert set(test_language_config.languages) == {"Ger", "Eng"}
+        assert (
+            test_language_config["Ger"].welcome_text
+            == provide_config_from_env[1]["Ger"].welcome_text
+        )
+
+        for language in test_language_config.languages:
+            bundle = test_language_config[language]
+            assert len(bundle.forecast.weekday_list) == 7
+            assert len(bundle.sidebar.menu_options) == len(
+                test_language_config.menu_icons
+            )
+            assert bundle.sidebar.page_of(bundle.sidebar.menu_options[0]) == "welcome"
+
+    def test_compile_language_config_missing_key(self, provide_config_from_env):
+        with open(
+            provide_config_from_env[0].get("language_config"), encoding="utf-8"
+        ) as file:
+            raw = yaml.safe_load(file)
+        del raw["forecast"]["Eng"]["legend_name"]
 
-        assert isinstance(test_language_dict, dict)
-        assert "welcome_text" in test_language_dict
-        assert test_language_dict.get("welcome_text", {}).get(
-            "Ger"
-        ) == provide_config_from_env[1].get("welcome_text", {}).get("Ger")
+        with pytest.raises(LanguageConfigError, match="forecast.Eng.legend_name"):
+            compile_language_config(raw)
 
     def test_create_config_from_env(self, provide_config_path, provide_config_from_env):
         with patch(
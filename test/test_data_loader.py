@@ -1,6 +1,97 @@
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import numpy as np
 import pandas as pd
+import pytest
+from tpa_frontend.data_loader.cache import CompressedMapCache
+from tpa_frontend.data_loader.cache import ExpiringLRUCache
+from tpa_frontend.data_loader.disk_cache import CachedFilesOCI
+from tpa_frontend.data_loader.disk_cache import CachedPandasOCI
+from tpa_frontend.data_loader.disk_cache import DiskCache
+from tpa_frontend.data_loader.load import _computeForecast
+from tpa_frontend.data_loader.load import _create_summaries
+from tpa_frontend.data_loader.load import _create_summaries_per_group
+from tpa_frontend.data_loader.load import _createDataWatcher
+from tpa_frontend.data_loader.load import _forecast_flight
+from tpa_frontend.data_loader.load import _get_history_df
+from tpa_frontend.data_loader.load import _get_last_week
+from tpa_frontend.data_loader.load import _map_file_name
+from tpa_frontend.data_loader.load import _prefetch_executor
+from tpa_frontend.data_loader.load import _summaries_match
+from tpa_frontend.data_loader.load import _summarize
+from tpa_frontend.data_loader.load import countForecastView
+from tpa_frontend.data_loader.load import GAS_TYPES
+from tpa_frontend.data_loader.load import getMap
+from tpa_frontend.data_loader.load import getMapDict
+from tpa_frontend.data_loader.load import getNearestStationIndex
+from tpa_frontend.data_loader.load import getStationIndex
 from tpa_frontend.data_loader.load import loadBaseDFs
 from tpa_frontend.data_loader.load import makeForecast
+from tpa_frontend.data_loader.load import makeForecasts
+from tpa_frontend.data_loader.load import peekForecast
+from tpa_frontend.data_loader.load import peekStaleForecast
+from tpa_frontend.data_loader.load import prefetchMaps
+from tpa_frontend.data_loader.load import submitForecast
+from tpa_frontend.data_loader.map_assets import MapAssetServer
+from tpa_frontend.data_loader.pool import ForecasterPool
+from tpa_frontend.data_loader.refresh import ForecastRefresher
+from tpa_frontend.data_loader.singleflight import SingleFlight
+from tpa_frontend.data_loader.stations import NearestStationIndex
+from tpa_frontend.data_loader.stations import StationIndex
+from tpa_frontend.data_loader.store import FORECAST_FRAMES
+from tpa_frontend.data_loader.store import ForecastStore
+from tpa_frontend.data_loader.watcher import DataSnapshot
+from tpa_frontend.data_loader.watcher import DataVersionWatcher
+from tpa_frontend.monitoring.metrics import REGISTRY
+
+
+class FakeForecast:
+    """A stand-in for `Forecast` whose results depend on the loaded station and which detects shared use."""
+
+    lock = threading.Lock()
+    running = 0
+    max_parallel = 0
+
+    def load_df(self, station: str, sorte: str) -> None:
+        with FakeForecast.lock:
+            FakeForecast.running += 1
+            FakeForecast.max_parallel = max(
+                FakeForecast.max_parallel, FakeForecast.running
+            )
+        self.station = station
+        time.sleep(0.01)
+
+    def create_forecast(self) -> pd.DataFrame:
+        time.sleep(0.01)
+        with FakeForecast.lock:
+            FakeForecast.running -= 1
+        return pd.DataFrame(
+            {
+                "Day": ["2024-10-13"] * 2 + ["2024-10-14"] * 2,
+                "Day_Hours": range(4),
+                "pred": [None, None, float(self.station), float(self.station)],
+                "price": [float(self.station)] * 2 + [None, None],
+                "is_last": [0, 0, 1, 1],
+                "hour_format": ["00:00", "01:00"] * 2,
+            }
+        )
+
+    def create_summaries(self, groupCol: str, centralize_mean: bool) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"price": [float(self.station)] * 2}, index=pd.Index([0, 1], name=groupCol)
+        )
 
 
 class Test_load:
@@ -9,17 +100,1118 @@ class Test_load:
             config_dict=provide_config_from_env[0], _pandas_connection=provide_pandasOCI
         )
 
-        assert isinstance(loaded_dfs, dict)
+        assert isinstance(loaded_dfs, Mapping)
         for val in loaded_dfs.values():
             assert isinstance(val, pd.DataFrame)
 
-    def test_makeForecast(self, provide_config_from_env, provide_Forecast):
+    def test_getStationIndex(
+        self, provide_config_from_env, provide_pandasOCI, provide_station_list_forecast
+    ):
+        loaded_dfs = loadBaseDFs(
+            config_dict=provide_config_from_env[0], _pandas_connection=provide_pandasOCI
+        )
+        station_index = getStationIndex(
+            config_dict=provide_config_from_env[0], _base_df_dict=loaded_dfs
+        )
+
+        assert isinstance(station_index, StationIndex)
+        assert set(station_index.id_to_name) == set(provide_station_list_forecast)
+
+    def test_loadBaseDFs_deduplicates(self, provide_config_from_env):
+        pandas_connection = MagicMock()
+        pandas_connection.retrieve_df.side_effect = (
+            lambda path, df_format: pd.DataFrame({"path": [path]})
+        )
+        config_dict = {**provide_config_from_env[0], "todays_date": "dedup"}
+
+        loaded_dfs = loadBaseDFs(
+            config_dict=config_dict, _pandas_connection=pandas_connection
+        )
+
+        assert loaded_dfs["week_mapper"] is loaded_dfs["columns_for_wide_df"]
+        for key in loaded_dfs:
+            loaded_dfs[key]
+        requested_paths = [
+            c.kwargs["path"] for c in pandas_connection.retrieve_df.call_args_list
+        ]
+        assert len(requested_paths) == len(set(requested_paths))
+
+    def test_loadBaseDFs_lazy(self, provide_config_from_env):
+        pandas_connection = MagicMock()
+        pandas_connection.retrieve_df.side_effect = (
+            lambda path, df_format: pd.DataFrame({"path": [path]})
+        )
+        config_dict = {**provide_config_from_env[0], "todays_date": "lazy"}
+
+        loaded_dfs = loadBaseDFs(
+            config_dict=config_dict, _pandas_connection=pandas_connection
+        )
+
+        assert loaded_dfs.is_loaded("station_info_30")
+        assert not loaded_dfs.is_loaded("station_info")
+        assert loaded_dfs["station_info"]["path"][0] == "LU_STATIONS_df.ftr"
+        assert loaded_dfs.is_loaded("station_info")
+
+    def test_makeForecast(self, provide_config_from_env, provide_ForecasterPool):
         loaded_forecasts = makeForecast(
             config_dict=provide_config_from_env[0],
             station="13",
             gas_type="e10",
-            _forecaster=provide_Forecast,
+            _forecaster=provide_ForecasterPool,
         )
 
         for val in loaded_forecasts.values():
             assert isinstance(val, pd.DataFrame)
+
+    def test_makeForecast_concurrent(self, provide_config_from_env):
+        pool = ForecasterPool(factory=FakeForecast, size=4)
+        config_dict = {**provide_config_from_env[0], "todays_date": "concurrent"}
+        requests = [(str(i % 8), ("e5", "e10", "diesel")[i % 3]) for i in range(48)]
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(
+                executor.map(
+                    lambda request: makeForecast(
+                        config_dict=config_dict,
+                        station=request[0],
+                        gas_type=request[1],
+                        _forecaster=pool,
+                    ),
+                    requests,
+                )
+            )
+
+        for (station, gas_type), result in zip(requests, results):
+            assert (result["forecast_df"]["pred"] == float(station)).all()
+            assert (result["summary_trend_df"]["price"] == float(station)).all()
+        assert pool.created == 4
+        assert FakeForecast.max_parallel > 1
+
+    def test_pool_failed_creation(self):
+        creating, fail = threading.Event(), threading.Event()
+        factory_calls = []
+
+        def factory():
+            factory_calls.append(1)
+            if len(factory_calls) == 1:
+                creating.set()
+                fail.wait()
+                raise RuntimeError("no forecaster")
+            return FakeForecast()
+
+        pool = ForecasterPool(factory=factory, size=1)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            failing = executor.submit(pool._get)
+            creating.wait()
+            # The pool is full while the first instance is created, so the second caller waits
+            waiting = executor.submit(pool._get)
+            time.sleep(0.02)
+            assert not waiting.done()
+            fail.set()
+
+            # The failed creation wakes the waiting caller, which creates the instance instead
+            with pytest.raises(RuntimeError):
+                failing.result(timeout=5)
+            assert isinstance(waiting.result(timeout=5), FakeForecast)
+        assert pool.created == 1
+
+    def test_makeForecasts(self, provide_config_from_env):
+        pool = ForecasterPool(factory=FakeForecast, size=8)
+        config_dict = {**provide_config_from_env[0], "todays_date": "batch"}
+        stations = [str(i) for i in range(8)]
+
+        with patch(
+            "tpa_frontend.data_loader.load.create_forecast_cache",
+            return_value=ExpiringLRUCache(max_entries=100),
+        ):
+            # One station is cached already and isn't forecasted again
+            cached_result = makeForecast(
+                config_dict=config_dict, station="0", gas_type="e5", _forecaster=pool
+            )
+            start = time.time()
+            results = makeForecasts(
+                config_dict=config_dict,
+                stations=stations,
+                gas_type="e5",
+                _forecaster=pool,
+            )
+            duration = time.time() - start
+
+        assert list(results) == stations
+        for station, result in results.items():
+            assert (result["forecast_df"]["pred"] == float(station)).all()
+        assert results["0"] is cached_result
+        # The 7 missing forecasts take 20ms each and run in parallel
+        assert duration < 7 * 0.02
+        assert makeForecasts(config_dict, [], "e5", pool) == {}
+
+    def test_makeForecast_spans(self, provide_config_from_env):
+        pool = ForecasterPool(factory=FakeForecast, size=1)
+        config_dict = {**provide_config_from_env[0], "todays_date": "spans"}
+        counts_before = {
+            (stage, cache): REGISTRY.count(stage=stage, gas_type="spans", cache=cache)
+            for stage, cache in (
+                ("forecast", "miss"),
+                ("forecast", "hit"),
+                ("forecast_load", ""),
+                ("forecast_fit", ""),
+                ("forecast_summarize", ""),
+            )
+        }
+
+        with patch(
+            "tpa_frontend.data_loader.load.create_forecast_cache",
+            return_value=ExpiringLRUCache(max_entries=100),
+        ):
+            for _ in range(2):
+                makeForecast(
+                    config_dict=config_dict,
+                    station="7",
+                    gas_type="spans",
+                    _forecaster=pool,
+                )
+
+        # The first forecast is computed in three stages, the second one is a cache hit
+        for (stage, cache), count_before in counts_before.items():
+            assert (
+                REGISTRY.count(stage=stage, gas_type="spans", cache=cache)
+                == count_before + 1
+            )
+
+    def test_submitForecast_and_peekForecast(self, provide_config_from_env):
+        pool = ForecasterPool(factory=FakeForecast, size=1)
+        config_dict = {**provide_config_from_env[0], "todays_date": "async"}
+        forecast_cache = ExpiringLRUCache(max_entries=100)
+
+        with patch(
+            "tpa_frontend.data_loader.load.create_forecast_cache",
+            return_value=forecast_cache,
+        ), ThreadPoolExecutor(max_workers=1) as executor:
+            assert (
+                peekForecast(config_dict=config_dict, station="1", gas_type="e5")
+                is None
+            )
+            # Block the executor, so that the next jobs are queued
+            blocker = threading.Event()
+            executor.submit(blocker.wait)
+            stale_job = submitForecast(
+                config_dict=config_dict,
+                station="1",
+                gas_type="e5",
+                _forecaster=pool,
+                _executor=executor,
+            )
+            current_job = submitForecast(
+                config_dict=config_dict,
+                station="2",
+                gas_type="e5",
+                _forecaster=pool,
+                _executor=executor,
+            )
+            # Switching the station cancels the queued stale job
+            assert stale_job.cancel()
+            blocker.set()
+
+            assert (current_job.result()["forecast_df"]["pred"] == 2.0).all()
+            assert (
+                peekForecast(config_dict=config_dict, station="2", gas_type="e5")
+                is current_job.result()
+            )
+            assert (
+                peekForecast(config_dict=config_dict, station="1", gas_type="e5")
+                is None
+            )
+
+    def test_peekStaleForecast(self, provide_config_from_env):
+        pool = ForecasterPool(factory=FakeForecast, size=2)
+        yesterday = {**provide_config_from_env[0], "todays_date": date(2024, 10, 13)}
+        today = {**yesterday, "todays_date": date(2024, 10, 14)}
+        refresher = ForecastRefresher(max_workers=1)
+
+        with patch(
+            "tpa_frontend.data_loader.load.create_forecast_cache",
+            return_value=ExpiringLRUCache(max_entries=100),
+        ), patch(
+            "tpa_frontend.data_loader.load.create_ForecastRefresher",
+            return_value=refresher,
+        ):
+            assert peekStaleForecast(yesterday, "1", "e5", pool) is None
+            yesterdays_forecasts = {
+                station: makeForecast(yesterday, station, "e5", pool)
+                for station in ("1", "2")
+            }
+
+            # After midnight the first request gets yesterdays forecast right away and queues all forecasts of yesterday
+            assert peekForecast(today, "1", "e5") is None
+            stale_date, stale_forecast = peekStaleForecast(today, "1", "e5", pool)
+            assert stale_date == date(2024, 10, 13)
+            assert stale_forecast is yesterdays_forecasts["1"]
+            assert refresher.wait(timeout=5)
+
+            assert refresher.stats()["refreshes"] == 2
+            for station in ("1", "2"):
+                assert peekForecast(today, station, "e5") is not None
+            assert peekStaleForecast(today, "1", "e5", pool) is None
+
+    def test_countForecastView_orders_refreshes(self, provide_config_from_env):
+        pool = ForecasterPool(factory=FakeForecast, size=2)
+        yesterday = {**provide_config_from_env[0], "todays_date": date(2024, 10, 13)}
+        refresher = ForecastRefresher(max_workers=1)
+
+        with patch(
+            "tpa_frontend.data_loader.load.create_forecast_cache",
+            return_value=ExpiringLRUCache(max_entries=100),
+        ), patch(
+            "tpa_frontend.data_loader.load.create_ForecastRefresher",
+            return_value=refresher,
+        ):
+            # Station 1 is loaded most often, but only viewed once, the other views are served from cached charts
+            for station, views, loads in (("1", 1, 4), ("2", 3, 1), ("3", 2, 0)):
+                for _ in range(views):
+                    countForecastView(yesterday, station, "e5")
+                for _ in range(loads):
+                    peekForecast(yesterday, station, "e5")
+                    makeForecast(yesterday, station, "e5", pool)
+            makeForecast(yesterday, "3", "e5", pool)
+
+        refreshed = []
+        blocker = threading.Event()
+        # Block the worker, so that the order of the queued refreshes is decided by the views only
+        refresher.schedule("0", "e5", blocker.wait)
+        refresher.schedule_outdated(
+            date(2024, 10, 14),
+            lambda station, gas_type: lambda: refreshed.append(station),
+        )
+        blocker.set()
+
+        assert refresher.wait(timeout=5)
+        assert refreshed == ["2", "3", "1"]
+
+    def test_makeForecast_reads_store(self, provide_config_from_env, tmp_path):
+        config_dict = {
+            **provide_config_from_env[0],
+            "todays_date": date(2024, 10, 14),
+            "runtime_config": {"forecast_store_path": str(tmp_path)},
+        }
+        ForecastStore(root=tmp_path).write(
+            date(2024, 10, 14), "7", "e5", _computeForecast("7", "e5", FakeForecast())
+        )
+        pool = ForecasterPool(factory=FakeForecast, size=1)
+
+        loaded_forecasts = makeForecast(
+            config_dict=config_dict, station="7", gas_type="e5", _forecaster=pool
+        )
+
+        assert pool.created == 0
+        assert (loaded_forecasts["forecast_df"]["pred"] == 7.0).all()
+
+    def test_create_summaries(self):
+        day_hours = pd.date_range(end="2024-10-14", periods=60 * 24, freq="h")
+        history_df = pd.DataFrame(
+            {
+                "price": np.linspace(1.6, 1.9, len(day_hours)),
+                "day_of_week": day_hours.dayofweek,
+                "hour_format": day_hours.strftime("%H:%M"),
+                "week": day_hours.isocalendar().week.to_numpy(),
+            }
+        )
+        history_df.loc[::5, "price"] = np.nan
+
+        summaries = _create_summaries(history_df)
+
+        for col, name, centralize_mean in (
+            ("day_of_week", "summary_weekday_df", True),
+            ("hour_format", "summary_hour_df", True),
+            ("week", "summary_trend_df", False),
+        ):
+            expected = history_df.groupby(col)["price"].mean()
+            if centralize_mean:
+                expected = expected - expected.mean()
+            assert summaries[name][col].tolist() == expected.index.tolist()
+            assert np.allclose(summaries[name].iloc[:, 1], expected.to_numpy())
+        assert list(summaries["summary_hour_df"].columns) == ["hour_format", "diff"]
+        assert list(summaries["summary_trend_df"].columns) == ["week", "price"]
+
+    def test_create_summaries_parity(
+        self, provide_config_from_env, provide_pandasOCI, provide_Forecast
+    ):
+        station = str(
+            loadBaseDFs(
+                config_dict=provide_config_from_env[0],
+                _pandas_connection=provide_pandasOCI,
+            )["station_info_30"]["short_id"].iloc[0]
+        )
+        provide_Forecast.load_df(station=station, sorte="e5")
+
+        # The single pass over Forecast.df returns the summaries of Forecast.create_summaries
+        history_df = _get_history_df(provide_Forecast)
+        assert history_df is not None
+        assert _summaries_match(
+            _create_summaries(history_df), _create_summaries_per_group(provide_Forecast)
+        )
+
+    def test_summarize_falls_back(self):
+        class FilteringForecast(FakeForecast):
+            # A history df whose rows differ from the ones create_summaries groups
+            df = pd.DataFrame(
+                {
+                    "price": [1.0, 2.0, 3.0, 4.0],
+                    "day_of_week": [0, 1, 0, 1],
+                    "hour_format": ["00:00", "01:00"] * 2,
+                    "week": [40, 40, 41, 41],
+                }
+            )
+
+            def create_summaries(self, groupCol, centralize_mean):
+                summary = self.df.tail(2).groupby(groupCol)[["price"]].mean()
+                return summary - summary.mean() if centralize_mean else summary
+
+        forecaster = FilteringForecast()
+        mismatches = REGISTRY.count(stage="summaries_parity_check", cache="mismatch")
+        with patch("tpa_frontend.data_loader.load._single_pass_summaries", None):
+            summaries = _summarize(forecaster)
+            assert _summaries_match(summaries, _create_summaries_per_group(forecaster))
+            assert summaries["summary_trend_df"]["week"].tolist() == [41]
+            # The mismatch is reported as metric
+            assert (
+                REGISTRY.count(stage="summaries_parity_check", cache="mismatch")
+                == mismatches + 1
+            )
+
+            # The mismatch is remembered, the history df isn't used anymore
+            with patch(
+                "tpa_frontend.data_loader.load._create_summaries"
+            ) as create_summaries:
+                _summarize(forecaster)
+            create_summaries.assert_not_called()
+
+    def test_summarize_checks_once(self):
+        class CountingForecast(FakeForecast):
+            df = pd.DataFrame(
+                {
+                    "price": [1.0, 2.0, 3.0, 4.0],
+                    "day_of_week": [0, 1, 0, 1],
+                    "hour_format": ["00:00", "01:00"] * 2,
+                    "week": [40, 40, 41, 41],
+                }
+            )
+            calls = 0
+
+            def create_summaries(self, groupCol, centralize_mean):
+                CountingForecast.calls += 1
+                time.sleep(0.01)
+                summary = self.df.groupby(groupCol)[["price"]].mean()
+                return summary - summary.mean() if centralize_mean else summary
+
+        with patch("tpa_frontend.data_loader.load._single_pass_summaries", None):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: _summarize(CountingForecast()), range(4)))
+
+        # Concurrent first forecasts run the parity check, i.e. the three create_summaries calls, only once
+        assert CountingForecast.calls == 3
+
+    def test_getMap_and_prefetchMaps(self, provide_config_from_env):
+        files_connection = MagicMock()
+        files_connection.retrieve_file_content.side_effect = (
+            lambda file_name, decode: file_name
+        )
+        config_dict = {**provide_config_from_env[0], "todays_date": "maps"}
+
+        map_html = getMap(
+            config_dict=config_dict,
+            last_week="2024_41",
+            gas_type="e10",
+            _files_oci_connection=files_connection,
+        )
+        assert map_html.endswith("Map_e10_2024_41.html")
+        assert files_connection.retrieve_file_content.call_count == 1
+
+        prefetchMaps(
+            config_dict=config_dict,
+            last_week="2024_41",
+            gas_types=["e5", "diesel"],
+            _files_oci_connection=files_connection,
+        )
+        _prefetch_executor.submit(lambda: None).result()
+        retrieved_files = sorted(
+            c.kwargs["file_name"].split("/")[-1]
+            for c in files_connection.retrieve_file_content.call_args_list
+        )
+        assert retrieved_files == [
+            "Map_diesel_2024_41.html",
+            "Map_e10_2024_41.html",
+            "Map_e5_2024_41.html",
+        ]
+
+
+class Test_map_assets:
+    def test_publish_and_serve(self, tmp_path):
+        server = MapAssetServer(directory=tmp_path, port=0)
+        server.start()
+        try:
+            url = server.publish(name="Map_e5_2024_41", map_html="<html>e5</html>")
+            assert url == server.publish(
+                name="Map_e5_2024_41", map_html="<html>e5</html>"
+            )
+            assert url != server.publish(
+                name="Map_e5_2024_41", map_html="<html>e5 new</html>"
+            )
+
+            with urllib.request.urlopen(url) as response:
+                assert response.read() == b"<html>e5</html>"
+                assert "immutable" in response.headers["Cache-Control"]
+
+            # Missing files and the directory aren't listed or cached
+            for missing_url in (
+                url.replace(".html", "0.html"),
+                server.public_url + "/",
+            ):
+                with pytest.raises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(missing_url)
+                assert error.value.code == 404
+                assert "Cache-Control" not in error.value.headers
+        finally:
+            server.stop()
+
+    def test_publish_prunes_superseded(self, tmp_path):
+        server = MapAssetServer(directory=tmp_path, port=0)
+        server.publish(name="Map_e5_2024_40", map_html="<html>e5 40</html>")
+        server.publish(name="Map_e10_2024_40", map_html="<html>e10 40</html>")
+        server.publish(
+            name="Map_e5_2024_41",
+            map_html="<html>e5 41</html>",
+            supersedes_prefix="Map_e5_",
+        )
+        url = server.publish(
+            name="Map_e5_2024_41",
+            map_html="<html>e5 41 new</html>",
+            supersedes_prefix="Map_e5_",
+        )
+
+        # Only the current e5 map and the maps of the other gas_types are left
+        assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+            [url.split("/")[-1], next(tmp_path.glob("Map_e10_2024_40.*")).name]
+        )
+
+
+class Test_disk_cache:
+    def test_cached_pandasOCI(self, tmp_path):
+        pandas_connection = MagicMock()
+        pandas_connection.retrieve_df.return_value = pd.DataFrame({"x": [1, 2]})
+        version_probe = MagicMock()
+        version_probe.version.return_value = "etag1"
+        cached_connection = CachedPandasOCI(
+            pandas_oci=pandas_connection,
+            disk_cache=DiskCache(directory=tmp_path, max_bytes=10_000_000),
+            version_probe=version_probe,
+        )
+
+        for _ in range(2):
+            df = cached_connection.retrieve_df(path="LU.ftr", df_format="ftr")
+            assert df["x"].tolist() == [1, 2]
+        assert pandas_connection.retrieve_df.call_count == 1
+
+        # A new version of the object is retrieved again
+        version_probe.version.return_value = "etag2"
+        cached_connection.retrieve_df(path="LU.ftr", df_format="ftr")
+        assert pandas_connection.retrieve_df.call_count == 2
+
+    def test_cached_filesOCI(self, tmp_path):
+        files_connection = MagicMock()
+        files_connection.retrieve_file_content.return_value = "<html>ä</html>"
+        version_probe = MagicMock()
+        version_probe.version.return_value = "etag1"
+        cached_connection = CachedFilesOCI(
+            files_oci=files_connection,
+            disk_cache=DiskCache(directory=tmp_path, max_bytes=10_000_000),
+            version_probe=version_probe,
+        )
+
+        for _ in range(2):
+            content = cached_connection.retrieve_file_content(
+                file_name="Map.html", decode=True
+            )
+            assert content == "<html>ä</html>"
+        assert files_connection.retrieve_file_content.call_count == 1
+
+    def test_put_fails(self, tmp_path):
+        disk_cache = DiskCache(directory=tmp_path, max_bytes=10_000_000)
+        version_probe = MagicMock()
+        version_probe.version.return_value = "etag1"
+        pandas_connection = MagicMock()
+        pandas_connection.retrieve_df.return_value = pd.DataFrame({"x": [1, 2]})
+        files_connection = MagicMock()
+        files_connection.retrieve_file_content.return_value = b"<html></html>"
+        cached_pandas = CachedPandasOCI(
+            pandas_oci=pandas_connection,
+            disk_cache=disk_cache,
+            version_probe=version_probe,
+        )
+        cached_files = CachedFilesOCI(
+            files_oci=files_connection,
+            disk_cache=disk_cache,
+            version_probe=version_probe,
+        )
+
+        # Both wrappers return the uncached result if the disk is full
+        with patch.object(disk_cache, "put", side_effect=OSError("No space left")):
+            df = cached_pandas.retrieve_df(path="LU.ftr", df_format="ftr")
+            content = cached_files.retrieve_file_content(file_name="Map.html")
+        assert df["x"].tolist() == [1, 2]
+        assert content == b"<html></html>"
+        assert disk_cache.nbytes() == 0
+
+    def test_prune(self, tmp_path):
+        disk_cache = DiskCache(directory=tmp_path, max_bytes=250)
+        for i in range(3):
+            disk_cache.put(
+                f"object_{i}",
+                "etag",
+                ".bin",
+                lambda tmp_file: Path(tmp_file).write_bytes(b"x" * 100),
+            )
+            os.utime(disk_cache.path(f"object_{i}", "etag", ".bin"), (i, i))
+        disk_cache.prune()
+
+        assert disk_cache.nbytes() == 200
+        assert disk_cache.lookup("object_0", "etag", ".bin") is None
+        assert disk_cache.lookup("object_2", "etag", ".bin") is not None
+
+
+class Test_stations:
+    def test_search(self):
+        station_index = StationIndex(
+            station_df=pd.DataFrame(
+                {
+                    "Tankstellen_Name": [
+                        "Shell Bonner Str. 12057",
+                        "Aral Hauptstr. 10115",
+                        "Shell Berliner Allee 40212",
+                        "Esso Bonner Str. 53111",
+                    ],
+                    "short_id": ["s1", "a1", "s2", "e1"],
+                }
+            )
+        )
+
+        assert len(station_index) == 4
+        assert station_index.get_id("Aral Hauptstr. 10115") == "a1"
+        assert station_index.get_id(None) is None
+        # Without a query the stations are offered in their original order
+        assert station_index.search("", limit=2) == [
+            "Shell Bonner Str. 12057",
+            "Aral Hauptstr. 10115",
+        ]
+        # Prefix matches come first and ignore case, substring matches follow
+        assert station_index.search("shell") == [
+            "Shell Berliner Allee 40212",
+            "Shell Bonner Str. 12057",
+        ]
+        assert station_index.search("bonner") == [
+            "Esso Bonner Str. 53111",
+            "Shell Bonner Str. 12057",
+        ]
+        assert station_index.search("12057") == ["Shell Bonner Str. 12057"]
+        # Typos are tolerated
+        assert "Aral Hauptstr. 10115" in station_index.search("aral hauptsrt. 10115")
+        assert station_index.search("shell", limit=1) == ["Shell Berliner Allee 40212"]
+
+    def test_labels(self):
+        station_index = StationIndex(
+            station_df=pd.DataFrame(
+                {
+                    "Tankstellen_Name": ["Shell", "Shell", "Shell", "Aral"],
+                    "short_id": ["s1", "s2", "s3", "a1"],
+                    "post_code": ["10115", "14467", "14467", None],
+                }
+            ),
+            address_cols=["street", "post_code"],
+        )
+
+        # Stations of the same name are told apart by their address, or by their ID
+        assert [
+            station_index.label(short_id) for short_id in station_index.id_to_name
+        ] == [
+            "Shell, 10115",
+            "Shell, 14467 (s2)",
+            "Shell, 14467 (s3)",
+            "Aral",
+        ]
+        assert station_index.get_ids(station_index.search("shell")) == [
+            "s1",
+            "s2",
+            "s3",
+        ]
+        assert "s2" in station_index and "Shell" not in station_index
+
+    def test_nearest(self):
+        nearest_station_index = NearestStationIndex(
+            station_df=pd.DataFrame(
+                {
+                    "Tankstellen_Name": ["Berlin", "Potsdam", "Munich", "No Coords"],
+                    "short_id": ["b", "p", "m", "n"],
+                    "latitude": [52.52, 52.40, 48.14, np.nan],
+                    "longitude": [13.40, 13.06, 11.58, np.nan],
+                    "post_code": [10115, 14467, 80331, 12345],
+                }
+            )
+        )
+
+        assert len(nearest_station_index) == 3
+        nearest_df = nearest_station_index.nearest(
+            location=nearest_station_index.locate("52.45, 13.10"), k=2
+        )
+        assert list(nearest_df["Tankstellen_Name"]) == ["Potsdam", "Berlin"]
+        # Potsdam is about 5km away from the location
+        assert 4 < nearest_df["distance_km"].iloc[0] < 7
+        # Postcodes resolve to the stations in their area
+        nearest_df = nearest_station_index.nearest(
+            location=nearest_station_index.locate("80331"), k=10
+        )
+        assert list(nearest_df["short_id"]) == ["m", "p", "b"]
+        assert nearest_df["distance_km"].iloc[0] == pytest.approx(0, abs=1e-6)
+        # Names, unknown postcodes and invalid coordinates aren't locations
+        for query in ("Shell", "99999", "12345", "123.0, 13.1", "", None):
+            assert nearest_station_index.locate(query) is None
+
+    def test_getNearestStationIndex(self, provide_config_from_env, provide_pandasOCI):
+        loaded_dfs = loadBaseDFs(
+            config_dict=provide_config_from_env[0], _pandas_connection=provide_pandasOCI
+        )
+        nearest_station_index = getNearestStationIndex(
+            config_dict=provide_config_from_env[0], _base_df_dict=loaded_dfs
+        )
+
+        assert isinstance(nearest_station_index, NearestStationIndex)
+        assert len(nearest_station_index) == len(loaded_dfs["station_info"].dropna())
+
+
+class Test_store:
+    def test_roundtrip(self, tmp_path):
+        store = ForecastStore(root=tmp_path)
+        forecast_summary_dict = {
+            name: pd.DataFrame({"x": [1, 2]}, index=[5, 6]) for name in FORECAST_FRAMES
+        }
+
+        assert store.read(date(2024, 10, 14), "13", "e10") is None
+        store.write(date(2024, 10, 14), "13", "e10", forecast_summary_dict)
+        loaded = store.read("2024-10-14", "13", "e10")
+
+        assert set(loaded) == set(FORECAST_FRAMES)
+        assert loaded["forecast_df"]["x"].tolist() == [1, 2]
+        assert store.read(date(2024, 10, 15), "13", "e10") is None
+
+    def test_prune(self, tmp_path):
+        store = ForecastStore(root=tmp_path)
+        forecast_summary_dict = {
+            name: pd.DataFrame({"x": [1, 2]}) for name in FORECAST_FRAMES
+        }
+        for day in (12, 13, 14):
+            store.write(date(2024, 10, day), "13", "e10", forecast_summary_dict)
+        (tmp_path / "other").mkdir()
+
+        # Only the date directories up to keep_after are deleted
+        assert store.prune(keep_after=date(2024, 10, 13)) == 2
+        assert store.read(date(2024, 10, 13), "13", "e10") is None
+        assert store.read(date(2024, 10, 14), "13", "e10") is not None
+        assert (tmp_path / "other").is_dir()
+
+    def test_invalidate(self, tmp_path):
+        store = ForecastStore(root=tmp_path)
+        forecast_summary_dict = {
+            name: pd.DataFrame({"x": [1, 2]}) for name in FORECAST_FRAMES
+        }
+        store.write(date(2024, 10, 14), "13", "e10", forecast_summary_dict)
+        store.invalidate()
+
+        # Forecasts written before are ignored, forecasts written afterwards are read
+        assert store.generation == 1
+        assert store.read(date(2024, 10, 14), "13", "e10") is None
+        store.write(date(2024, 10, 14), "13", "e10", forecast_summary_dict)
+        assert store.read(date(2024, 10, 14), "13", "e10") is not None
+
+        # The generation lives in the store, e.g. the precompute job and the app share it
+        other_store = ForecastStore(root=tmp_path)
+        assert other_store.read(date(2024, 10, 14), "13", "e10") is not None
+        other_store.invalidate()
+        assert store.read(date(2024, 10, 14), "13", "e10") is None
+        # The marker isn't mistaken for a date directory
+        assert store.prune(keep_after=date(2024, 10, 14)) == 1
+        assert store.generation == 2
+
+
+class Test_cache:
+    def test_lru_eviction(self):
+        cache = ExpiringLRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache and "c" in cache
+        assert "b" not in cache
+        assert cache.stats()["evictions"] == 1
+
+    def test_midnight_expiry(self):
+        now = [datetime(2024, 10, 14, 23, 59)]
+        cache = ExpiringLRUCache(max_entries=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+        now[0] = datetime(2024, 10, 15, 0, 0)
+        assert cache.get("a") is None
+        assert cache.stats() == {
+            "size": 0,
+            "max_entries": 10,
+            "hits": 1,
+            "misses": 1,
+            "evictions": 0,
+            "expirations": 1,
+        }
+
+    def test_compressed_map_cache(self):
+        cache = CompressedMapCache(max_bytes=10_000)
+        map_html = "<html>" + "e5 " * 10_000 + "</html>"
+        cache.set("2024_40", "e5", map_html)
+        cache.set("2024_41", "e5", map_html)
+        cache.set("2024_41", "e10", map_html)
+
+        assert cache.get("2024_41", "e5") == map_html
+        assert cache.get("2024_40", "e5") is None
+        assert 0 < cache.nbytes < len(map_html) // 10
+        assert cache.stats()["evictions"] == 1
+
+        # Maps of previous weeks are not cached anymore
+        cache.set("2024_40", "diesel", map_html)
+        assert ("2024_40", "diesel") not in cache
+
+    def test_compressed_map_cache_week_order(self):
+        cache = CompressedMapCache(max_bytes=10_000)
+        cache.set("2024_9", "e5", "<html>9</html>")
+        cache.set("2024_10", "e5", "<html>10</html>")
+        cache.set("2024_9", "e10", "<html>9</html>")
+
+        # The weeks are compared numerically, not as strings
+        assert cache.current_week == "2024_10"
+        assert ("2024_10", "e5") in cache
+        assert ("2024_9", "e10") not in cache
+        assert (
+            _get_last_week(
+                {
+                    "week_mapper": pd.DataFrame(
+                        {"week_total": ["2024_9", "2024_10", "2023_52"]}
+                    )
+                }
+            )
+            == "2024_10"
+        )
+
+    def test_compressed_map_cache_ceiling(self):
+        cache = CompressedMapCache(max_bytes=100)
+        for gas_type in ("e5", "e10", "diesel"):
+            cache.set("2024_41", gas_type, f"<html>{gas_type}</html>" * 20)
+
+        assert cache.nbytes <= 100
+        assert ("2024_41", "diesel") in cache
+        assert ("2024_41", "e5") not in cache
+
+    def test_ttl_expiry(self):
+        now = [datetime(2024, 10, 14, 12, 0)]
+        cache = ExpiringLRUCache(
+            max_entries=10, ttl=60, expire_at_midnight=False, clock=lambda: now[0]
+        )
+        cache.set("a", 1)
+        now[0] += timedelta(seconds=61)
+
+        assert cache.get("a", "missing") == "missing"
+
+
+class Test_watcher:
+    def test_poll_and_swap(self):
+        versions = {"a.ftr": "1"}
+        watcher = DataVersionWatcher(
+            read_versions=lambda snapshot: dict(versions),
+            build_snapshot=lambda new_versions, previous: DataSnapshot(
+                versions=new_versions,
+                base_df_dict={"version": new_versions["a.ftr"]},
+                station_index=MagicMock(),
+                nearest_station_index=MagicMock,
+                map_cache=CompressedMapCache(max_bytes=1000),
+                last_week="2024_41",
+            ),
+            interval=60,
+        )
+        first_snapshot = watcher.snapshot
+
+        assert not watcher.poll()
+        versions["a.ftr"] = None  # An unreadable version is assumed unchanged
+        assert not watcher.poll()
+        versions["a.ftr"] = "2"
+        assert watcher.poll()
+
+        assert watcher.swaps == 1
+        assert watcher.snapshot.base_df_dict == {"version": "2"}
+        # Readers of the old snapshot keep a consistent view
+        assert first_snapshot.base_df_dict == {"version": "1"}
+
+    def test_dependent_versions_and_failed_polls(self):
+        versions = {"a.ftr": "1", "2024_41.html": "1"}
+        read_calls = []
+
+        def read_versions(snapshot):
+            read_calls.append(snapshot)
+            if len(read_calls) > 2:
+                raise OSError("unreachable")
+            # The map of the last week is only watched once a snapshot exists
+            return dict(versions) if snapshot else {"a.ftr": versions["a.ftr"]}
+
+        build_snapshot = MagicMock(
+            side_effect=lambda new_versions, previous: DataSnapshot(
+                versions=new_versions,
+                base_df_dict={},
+                station_index=MagicMock(),
+                nearest_station_index=MagicMock,
+                map_cache=CompressedMapCache(max_bytes=1000),
+                last_week="2024_41",
+            )
+        )
+        watcher = DataVersionWatcher(
+            read_versions=read_versions, build_snapshot=build_snapshot, interval=0.01
+        )
+
+        # The first snapshot is built once and records the versions of its map
+        assert build_snapshot.call_count == 1
+        assert watcher.snapshot.versions == versions
+        assert watcher.swaps == 0
+
+        failed_polls = REGISTRY.count(stage="data_poll", cache="failed")
+        watcher.start()
+        while watcher.failed_polls < 2:
+            time.sleep(0.01)
+        watcher.stop()
+
+        # Failed polls keep the snapshot and are recorded in the metrics
+        assert build_snapshot.call_count == 1
+        assert REGISTRY.count(stage="data_poll", cache="failed") >= failed_polls + 2
+
+    def test_createDataWatcher(self, provide_config_from_env, tmp_path):
+        week = {"last": "2024_41"}
+        pandas_connection = MagicMock()
+        pandas_connection.retrieve_df.side_effect = lambda path, df_format: (
+            pd.DataFrame(
+                {
+                    "Tankstellen_Name": ["A Station"],
+                    "short_id": ["7"],
+                    "week_total": [week["last"]],
+                }
+            )
+        )
+        files_connection = MagicMock()
+        files_connection.retrieve_file_content.side_effect = (
+            lambda file_name, decode: file_name
+        )
+        config_dict = provide_config_from_env[0]
+        object_versions: dict = {}
+        version_probe = MagicMock()
+        version_probe.version.side_effect = lambda object_name: object_versions.get(
+            object_name, "1"
+        )
+        forecast_cache = ExpiringLRUCache(max_entries=10)
+        forecast_store = ForecastStore(root=tmp_path)
+        forecast_store.write(
+            "2024-10-14",
+            "7",
+            "e5",
+            {name: pd.DataFrame({"x": [1]}) for name in FORECAST_FRAMES},
+        )
+
+        watcher = _createDataWatcher(
+            config_dict=config_dict,
+            pandas_connection=pandas_connection,
+            files_oci_connection=files_connection,
+            version_probe=version_probe,
+            data_caches=[forecast_cache],
+            forecast_store=forecast_store,
+        )
+        first_snapshot = watcher.snapshot
+        getMap(
+            config_dict=config_dict,
+            last_week=first_snapshot.last_week,
+            gas_type="e5",
+            _files_oci_connection=files_connection,
+            _map_cache=first_snapshot.map_cache,
+        )
+        assert first_snapshot.last_week == "2024_41"
+        assert not watcher.poll()
+
+        # A changed map keeps the tables and fetches the cached maps again
+        object_versions[_map_file_name(config_dict, "2024_41", "e5")] = "2"
+        retrieved_dfs = pandas_connection.retrieve_df.call_count
+        assert watcher.poll()
+        assert watcher.snapshot.base_df_dict is first_snapshot.base_df_dict
+        assert watcher.snapshot.map_cache is not first_snapshot.map_cache
+        assert ("2024_41", "e5") in watcher.snapshot.map_cache
+        assert pandas_connection.retrieve_df.call_count == retrieved_dfs
+        assert forecast_store.read("2024-10-14", "7", "e5") is not None
+
+        # Changed prices reload the tables and clear the derived caches
+        forecast_cache.set("7_e5", "outdated")
+        week["last"] = "2024_42"
+        object_versions[config_dict["data_config"]["df_path"]] = "2"
+        assert watcher.poll()
+        assert watcher.snapshot.base_df_dict is not first_snapshot.base_df_dict
+        assert watcher.snapshot.last_week == "2024_42"
+        assert ("2024_42", "e5") in watcher.snapshot.map_cache
+        assert forecast_cache.get("7_e5") is None
+        # The precomputed forecasts of the old prices are ignored
+        assert forecast_store.read("2024-10-14", "7", "e5") is None
+        assert first_snapshot.last_week == "2024_41"
+
+
+class Test_refresh:
+    def test_popularity_order(self):
+        refresher = ForecastRefresher(max_workers=1)
+        for station, views in (("1", 1), ("2", 3), ("3", 2)):
+            refresher.remember(date(2024, 10, 13), station, "e5", {})
+            for _ in range(views):
+                refresher.count_view(station, "e5")
+        refreshed = []
+        blocker = threading.Event()
+
+        # Block the worker, so that the order of the queued refreshes is decided by the popularity only
+        refresher.schedule("0", "e5", blocker.wait)
+        assert (
+            refresher.schedule_outdated(
+                date(2024, 10, 14),
+                lambda station, gas_type: lambda: refreshed.append(station),
+            )
+            == 3
+        )
+        assert refresher.schedule_outdated(date(2024, 10, 14), MagicMock()) == 0
+        blocker.set()
+
+        assert refresher.wait(timeout=5)
+        assert refreshed == ["2", "3", "1"]
+        assert refresher.stats()["queued"] == 0
+
+        # The views of the previous day are dropped with the date change, only the new views order the next day
+        refresher.count_view("1", "e5")
+        refreshed.clear()
+        blocker.clear()
+        refresher.schedule("0", "e5", blocker.wait)
+        refresher.schedule_outdated(
+            date(2024, 10, 15),
+            lambda station, gas_type: lambda: refreshed.append(station),
+        )
+        blocker.set()
+
+        assert refresher.wait(timeout=5)
+        assert refreshed == ["1", "2", "3"]
+
+    def test_failed_refresh(self):
+        refresher = ForecastRefresher(max_workers=1)
+        failed_refreshes = REGISTRY.count(stage="forecast_refresh", cache="failed")
+
+        def fail():
+            raise RuntimeError("no forecaster")
+
+        refresher.schedule("1", "e5", fail)
+        refresher.schedule("2", "e5", MagicMock())
+
+        assert refresher.wait(timeout=5)
+        assert refresher.stats()["refreshes"] == 1
+        assert refresher.stats()["failed_refreshes"] == 1
+        assert (
+            REGISTRY.count(stage="forecast_refresh", cache="failed")
+            == failed_refreshes + 1
+        )
+
+
+class Test_singleflight:
+    def test_do(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def leader_call():
+            started.set()
+            release.wait()
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do, "key", leader_call)
+            started.wait()
+            follower = executor.submit(flight.do, "key", MagicMock())
+            while flight.stats()["coalesced"] == 0:
+                time.sleep(0.001)
+            release.set()
+
+            assert leader.result() == ("result", False)
+            assert follower.result() == ("result", True)
+        assert flight.stats() == {"calls": 1, "coalesced": 1, "running": 0}
+
+        # An exception is raised to the caller and the key can be called again
+        with pytest.raises(ValueError):
+            flight.do("key", MagicMock(side_effect=ValueError))
+        assert flight.do("key", lambda: "again") == ("again", False)
+
+    def test_makeForecast_coalesced(self, provide_config_from_env):
+        n_requests = 8
+        created_forecasts = []
+
+        class SlowForecast(FakeForecast):
+            def create_forecast(self) -> pd.DataFrame:
+                created_forecasts.append(self.station)
+                time.sleep(0.2)
+                return super().create_forecast()
+
+        pool = ForecasterPool(factory=SlowForecast, size=n_requests)
+        config_dict = {**provide_config_from_env[0], "todays_date": "coalesced"}
+        coalesced_before = _forecast_flight.coalesced
+        start = threading.Barrier(n_requests)
+
+        def request_forecast():
+            start.wait()
+            return makeForecast(
+                config_dict=config_dict, station="3", gas_type="e5", _forecaster=pool
+            )
+
+        with patch(
+            "tpa_frontend.data_loader.load.create_forecast_cache",
+            return_value=ExpiringLRUCache(max_entries=100),
+        ), ThreadPoolExecutor(max_workers=n_requests) as executor:
+            futures = [executor.submit(request_forecast) for _ in range(n_requests)]
+            results = [future.result() for future in futures]
+
+        assert created_forecasts == ["3"]
+        assert all(result is results[0] for result in results)
+        assert _forecast_flight.coalesced - coalesced_before == n_requests - 1
+
+    def test_getMapDict_coalesced(self, provide_config_from_env):
+        n_requests = 8
+
+        def retrieve_file_content(file_name, decode):
+            time.sleep(0.1)
+            return file_name
+
+        files_connection = MagicMock()
+        files_connection.retrieve_file_content.side_effect = retrieve_file_content
+        config_dict = {**provide_config_from_env[0], "todays_date": "coalesced"}
+        map_cache = CompressedMapCache(max_bytes=1_000_000)
+        start = threading.Barrier(n_requests)
+
+        def request_maps():
+            start.wait()
+            return getMapDict(
+                config_dict=config_dict,
+                last_week="2024_41",
+                _files_oci_connection=files_connection,
+                _map_cache=map_cache,
+            )
+
+        with ThreadPoolExecutor(max_workers=n_requests) as executor:
+            futures = [executor.submit(request_maps) for _ in range(n_requests)]
+            results = [future.result() for future in futures]
+
+        # One download per gas_type
+        assert files_connection.retrieve_file_content.call_count == len(GAS_TYPES)
+        assert all(result == results[0] for result in results)
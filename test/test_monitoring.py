@@ -0,0 +1,71 @@
+import urllib.error
+import urllib.request
+
+import pytest
+from tpa_frontend.monitoring.metrics import MetricsRegistry
+from tpa_frontend.monitoring.metrics import MetricsServer
+from tpa_frontend.monitoring.metrics import span
+
+
+class Test_metrics:
+    def test_span(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        with span("forecast", gas_type="e5", registry=registry) as s:
+            s.cache = "miss"
+        with span("forecast", gas_type="e10", registry=registry) as s:
+            s.cache = "hit"
+        # A span is also recorded if its stage fails
+        with pytest.raises(ValueError):
+            with span("map_fetch", gas_type="e5", registry=registry):
+                raise ValueError("no map")
+
+        assert s.duration is not None and s.duration < 0.1
+        assert registry.count(stage="forecast") == 2
+        assert registry.count(stage="forecast", cache="hit", gas_type="e10") == 1
+        assert registry.count(stage="map_fetch") == 1
+        assert registry.count(stage="rerun") == 0
+
+        registry.clear()
+        assert registry.count() == 0
+
+    def test_render(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        for _ in range(3):
+            with span("chart_build", gas_type='e"5', registry=registry):
+                pass
+
+        lines = registry.render().splitlines()
+        assert "# TYPE tpa_span_duration_seconds histogram" in lines
+        assert "# TYPE tpa_spans_total counter" in lines
+        assert (
+            'tpa_span_duration_seconds_bucket{stage="chart_build",gas_type="e\\"5",cache="",le="0.1"} 3'
+            in lines
+        )
+        assert (
+            'tpa_span_duration_seconds_bucket{stage="chart_build",gas_type="e\\"5",cache="",le="+Inf"} 3'
+            in lines
+        )
+        assert (
+            'tpa_span_duration_seconds_count{stage="chart_build",gas_type="e\\"5",cache=""} 3'
+            in lines
+        )
+        # The label values are escaped and the counter has no station label
+        assert (
+            'tpa_spans_total{stage="chart_build",gas_type="e\\"5",cache=""} 3' in lines
+        )
+
+    def test_metrics_server(self):
+        registry = MetricsRegistry()
+        with span("rerun", registry=registry):
+            pass
+        server = MetricsServer(registry=registry, port=0)
+        server.start()
+        try:
+            with urllib.request.urlopen(server.url) as response:
+                assert response.headers["Content-Type"].startswith("text/plain")
+                assert 'tpa_spans_total{stage="rerun"' in response.read().decode()
+
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(server.url.replace("/metrics", "/other"))
+        finally:
+            server.stop()
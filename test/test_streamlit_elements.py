@@ -1,27 +1,33 @@
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+
 def test_app(provide_App):
     assert not provide_App.exception
 
 
 def test_language_switch(provide_App, provide_config_from_env):
-    assert provide_App.markdown[0].value == provide_config_from_env[1].get(
-        "welcome_text"
-    ).get("Eng").replace("\n", "")
+    assert provide_App.markdown[0].value == provide_config_from_env[1][
+        "Eng"
+    ].welcome_text.replace("\n", "")
 
     provide_App.radio(key="SELECT_language").set_value("Ger").run()
 
-    assert provide_App.markdown[0].value == provide_config_from_env[1].get(
-        "welcome_text"
-    ).get("Ger").replace("\n", "")
+    assert provide_App.markdown[0].value == provide_config_from_env[1][
+        "Ger"
+    ].welcome_text.replace("\n", "")
 
 
 def test_Forecast_page(
     provide_Forecast_page, provide_config_from_env, provide_station_list_forecast
 ):
-    language_dict = provide_config_from_env[1]
+    language_config = provide_config_from_env[1]
     assert not provide_Forecast_page.exception
-    assert provide_Forecast_page.text[0].value == language_dict.get("forecast", {}).get(
-        "Eng"
-    ).get("please_choose")
+    assert (
+        provide_Forecast_page.text[0].value
+        == language_config["Eng"].forecast.please_choose
+    )
 
     # Click through the lower buttons
     for gas_type in ("E10", "E5", "Diesel"):
@@ -48,3 +54,82 @@ def test_Map_page(provide_Map_page):
             timeout=60
         )
         assert not provide_Map_page.exception
+
+
+def test_chart_spec_cache(provide_config_from_env, provide_station_list_forecast):
+    main_patched = (
+        Path("src/tpa_frontend/main.py")
+        .read_text()
+        .replace("selectedSideBar=selectedSideBar", "selectedSideBar='forecast'")
+        .replace('selectedSideBar == "forecast"', "True")
+    )
+    main_patched += (
+        "\nfrom tpa_frontend.config_handler.load_configs import create_chart_spec_cache"
+        "\nst.text(str(create_chart_spec_cache(max_entries=2000).stats()['hits']))\n"
+    )
+    test_app = AppTest.from_string(main_patched)
+    test_app.run(timeout=30)
+
+    hits = []
+    for language in ("Eng", "Ger", "Eng"):
+        test_app.radio(key="SELECT_language").set_value(language).run()
+        test_app.selectbox(key="SELECT_station").set_value(
+            provide_station_list_forecast[0]
+        ).run(timeout=30)
+        assert not test_app.exception
+        hits.append(int(test_app.text[-1].value))
+
+    # Revisiting the station in a language served before is a hit
+    assert hits[2] == hits[1] + 1
+
+
+def test_nearest_station_options(provide_config_from_env):
+    def app():
+        import pandas as pd
+        import streamlit as st
+        from tpa_frontend.config_handler.load_configs import create_config_from_env
+        from tpa_frontend.data_loader.stations import NearestStationIndex
+        from tpa_frontend.data_loader.stations import StationIndex
+        from tpa_frontend.streamlit_elements.sidebar import sidebar_lower_content
+
+        station_df = pd.DataFrame(
+            {
+                "Tankstellen_Name": ["Shell", "Shell", "Esso", "Aral"],
+                "short_id": ["s1", "s2", "e1", "a1"],
+                "latitude": [52.52, 52.40, 52.45, 48.14],
+                "longitude": [13.40, 13.06, 13.10, 11.58],
+                "post_code": ["10115", "14467", "14469", "80331"],
+            }
+        )
+        selection = sidebar_lower_content(
+            language_config=create_config_from_env()[1],
+            language_selection="Eng",
+            selectedSideBar="forecast",
+            # Esso has no forecast
+            station_index=StationIndex(
+                station_df=station_df[station_df["short_id"] != "e1"],
+                address_cols=["post_code"],
+            ),
+            nearest_station_index=NearestStationIndex(station_df=station_df),
+        )
+        st.text(repr(selection))
+
+    test_app = AppTest.from_function(app)
+    test_app.run()
+    test_app.text_input(key="SELECT_station_search").input("52.45, 13.10").run()
+
+    # The stations of the same name are told apart by their addresses
+    assert test_app.selectbox(key="SELECT_station").options == [
+        "Shell, 14467",
+        "Shell, 10115",
+        "Aral, 80331",
+    ]
+    test_app.selectbox(key="SELECT_station").set_value("s1").run()
+    assert not test_app.exception
+    assert test_app.text[0].value == repr(("s1", "E5", {}))
+
+    # The compared stations are keyed by ID, the names are only labels
+    test_app.multiselect(key="SELECT_compare_stations").set_value(["s2"]).run()
+    assert test_app.text[0].value == repr(
+        ("s1", "E5", {"s1": "Shell, 10115", "s2": "Shell, 14467"})
+    )